@@ -0,0 +1,261 @@
+# answer_cache.py
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, width and punctuation so trivially different questions share a key"""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+_NUMBER_RE = re.compile(r"\d+")
+# Negations in the UI languages; on normalized text, so "don't" reads "don t"
+_NEGATION_RE = re.compile(
+    r"\b(?:not|no|never|nor|none|nothing|without|cannot|tidak|tak|bukan|jangan|tiada|belum)\b|n t\b"
+    r"|不|没|沒|无|無|非|别|لا|لم|لن|ليس|غير|இல்லை|அல்ல|வேண்டாம்"
+)
+
+
+def same_specifics(a: str, b: str) -> bool:
+    """True when two normalized queries name the same numbers and timestamps and negate alike
+
+    Trigram cosine can't tell 00:12:30 from 00:12:31 or "in favour" from
+    "not in favour", so such pairs are never treated as the same question.
+    """
+    return (_NUMBER_RE.findall(a) == _NUMBER_RE.findall(b)
+            and sorted(_NEGATION_RE.findall(a)) == sorted(_NEGATION_RE.findall(b)))
+
+
+def hashing_embedding(text: str, dimensions: int = 1024) -> dict:
+    """Sparse unit vector of hashed character trigrams, computed locally
+
+    Works for every UI language without a model download or an API call, and
+    is good enough to match reworded or lightly edited suggestion questions.
+    """
+    padded = f"  {text} "
+    counts = {}
+    for i in range(len(padded) - 2):
+        digest = hashlib.blake2b(padded[i:i + 3].encode(), digest_size=4).digest()
+        index = int.from_bytes(digest, "little") % dimensions
+        counts[index] = counts.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+
+def cosine(a, b) -> float:
+    """Dot product of two unit vectors given as sparse dicts or dense sequences"""
+    if isinstance(a, dict):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(value * b.get(index, 0.0) for index, value in a.items())
+    return sum(x * y for x, y in zip(a, b))
+
+
+class MemoryBackend:
+    """In-process LRU store with TTL, shared by every session of the process"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def scope_entries(self, scope: str):
+        """(key, entry) pairs stored under one assistant/language scope"""
+        with self._lock:
+            return [(k, e) for k, e in self._entries.items() if e["scope"] == scope]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """LRU store with TTL in a SQLite file, shared across processes and restarts"""
+
+    def __init__(self, path: str = "answer_cache.sqlite3", max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, scope TEXT NOT NULL, entry TEXT NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT entry FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE answers SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, entry: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, scope, entry, accessed) VALUES (?, ?, ?, ?)",
+                (key, entry["scope"], json.dumps(entry), time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def scope_entries(self, scope: str):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, entry FROM answers WHERE scope = ?", (scope,)).fetchall()
+        pairs = []
+        for key, entry in rows:
+            entry = json.loads(entry)
+            # JSON turns the sparse vector's int keys into strings
+            if isinstance(entry.get("embedding"), dict):
+                entry["embedding"] = {int(k): v for k, v in entry["embedding"].items()}
+            pairs.append((key, entry))
+        return pairs
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+
+class AnswerCache:
+    """Processed answers keyed on assistant, vector store, language and normalized query
+
+    An exact key hit returns immediately; otherwise, when an embedder is set,
+    the closest stored query in the same scope is used if its cosine
+    similarity reaches similarity_threshold and it names the same numbers
+    and negations.
+    """
+
+    def __init__(self, backend, ttl: float = 24 * 3600, embedder=None, similarity_threshold: float = 0.9):
+        self.backend = backend
+        self.ttl = ttl
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            hits = self.stats["hits"] + self.stats["semantic_hits"]
+            total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    @staticmethod
+    def scope(assistant_id: str, vector_store_id: str, language: str) -> str:
+        return f"{assistant_id}|{vector_store_id}|{language}"
+
+    def key(self, assistant_id: str, vector_store_id: str, language: str, query: str) -> str:
+        return f"{self.scope(assistant_id, vector_store_id, language)}|{normalize_query(query)}"
+
+    def _fresh(self, key: str, entry) -> bool:
+        if entry is None:
+            return False
+        if time.time() - entry["created"] > self.ttl:
+            self.backend.delete(key)
+            self._count("expired")
+            return False
+        return True
+
+    def peek(self, assistant_id: str, vector_store_id: str, language: str, query: str):
+        """Exact-key lookup that leaves the hit/miss counters alone"""
+        key = self.key(assistant_id, vector_store_id, language, query)
+        entry = self.backend.get(key)
+        return entry["answer"] if self._fresh(key, entry) else None
+
+    def get(self, assistant_id: str, vector_store_id: str, language: str, query: str):
+        """Return the cached answer (a list of processed HTML blocks) or None"""
+        key = self.key(assistant_id, vector_store_id, language, query)
+        entry = self.backend.get(key)
+        if self._fresh(key, entry):
+            self._count("hits")
+            return entry["answer"]
+
+        if self.embedder is not None:
+            normalized = normalize_query(query)
+            embedding = self.embedder(normalized)
+            best_key, best_entry, best_score = None, None, self.similarity_threshold
+            for candidate_key, candidate in self.backend.scope_entries(self.scope(assistant_id, vector_store_id, language)):
+                if not candidate.get("embedding") or not same_specifics(normalized, candidate["query"]):
+                    continue
+                score = cosine(embedding, candidate["embedding"])
+                if score >= best_score:
+                    best_key, best_entry, best_score = candidate_key, candidate, score
+            if best_entry is not None and self._fresh(best_key, best_entry):
+                self._count("semantic_hits")
+                return best_entry["answer"]
+
+        self._count("misses")
+        return None
+
+    def put(self, assistant_id: str, vector_store_id: str, language: str, query: str, answer):
+        """Store the processed answer for a query"""
+        normalized = normalize_query(query)
+        self.backend.set(self.key(assistant_id, vector_store_id, language, query), {
+            "scope": self.scope(assistant_id, vector_store_id, language),
+            "query": normalized,
+            "answer": list(answer),
+            "embedding": self.embedder(normalized) if self.embedder is not None else None,
+            "created": time.time(),
+        })
+        self._count("stores")
+
+
+def create_answer_cache(backend: str = "memory", path: str = "answer_cache.sqlite3", max_entries: int = 1000,
+                        ttl: float = 24 * 3600, semantic: bool = False, similarity_threshold: float = 0.9):
+    """Build an AnswerCache for a backend name, or None when caching is turned off"""
+    if backend == "off":
+        return None
+    if backend == "memory":
+        store = MemoryBackend(max_entries=max_entries)
+    elif backend == "sqlite":
+        store = SQLiteBackend(path=path, max_entries=max_entries)
+    else:
+        raise ValueError(f"Unknown answer cache backend: {backend}")
+    return AnswerCache(
+        store,
+        ttl=ttl,
+        embedder=hashing_embedding if semantic else None,
+        similarity_threshold=similarity_threshold
+    )
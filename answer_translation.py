@@ -0,0 +1,238 @@
+# answer_translation.py
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from answer_cache import normalize_query
+from token_budget import run_usage
+
+# Links, tags and bare timestamps are swapped for placeholders the model must copy
+_PROTECTED_RE = re.compile(
+    r'<a\s[^>]*>.*?</a>'
+    r'|<[^>]+>'
+    r'|\b\d{1,2}:\d{2}(?::\d{2})?(?:\.\d{1,3})?\b'
+    r'|https?://\S+',
+    re.DOTALL
+)
+_PLACEHOLDER_RE = re.compile(r'⟦(\d+)⟧')
+
+# Canonical answers are stored in the answer cache under this language tag plus the source language
+CANONICAL = "canonical"
+
+
+def protect(block: str):
+    """(text with ⟦n⟧ placeholders, the protected pieces in order)"""
+    pieces = []
+
+    def replace(match):
+        pieces.append(match.group(0))
+        return f"⟦{len(pieces) - 1}⟧"
+
+    return _PROTECTED_RE.sub(replace, block), pieces
+
+
+def restore(text: str, pieces) -> str:
+    """Put the protected pieces back; None unless every placeholder occurs exactly once"""
+    found = [int(n) for n in _PLACEHOLDER_RE.findall(text)]
+    if sorted(found) != list(range(len(pieces))):
+        return None
+    return _PLACEHOLDER_RE.sub(lambda match: pieces[int(match.group(1))], text)
+
+
+class AnswerTranslator:
+    """Serve a question in one language from the cached answer to the same question in another
+
+    Answers are also stored per canonical question: suggestions map to the
+    canonical language's suggestion at the same index, and other questions
+    are translated into the canonical language with one short chat completion
+    (cached). That completion runs on a background thread in remember(),
+    after the run's answer was shown; lookup() never translates a question
+    and only considers suggestions and questions asked before, so a miss
+    costs no API call. A miss in the requested language that has a canonical
+    answer is translated with one more completion instead of a retrieval
+    run. Timestamp links, tags and URLs are replaced by placeholders before translating and
+    the translation is rejected unless each comes back exactly once, so the
+    links stay byte-for-byte identical. Translations go into the answer cache
+    like any other answer.
+    """
+
+    def __init__(self, client, answer_cache, translations, model: str = "gpt-4o-mini",
+                 canonical_language: str = "English", max_queries: int = 5000):
+        self.client = client
+        self.answer_cache = answer_cache
+        self.model = model
+        self.canonical_language = canonical_language
+        self.languages = list(translations.keys())
+        self.max_queries = max_queries
+        # Suggestion text in any language -> the canonical language's suggestion at that index
+        self._suggestions = {}
+        canonical = translations[canonical_language]["suggestions"]
+        for texts in translations.values():
+            for i, suggestion in enumerate(texts["suggestions"]):
+                if i < len(canonical):
+                    self._suggestions[normalize_query(suggestion)] = canonical[i]
+        self._lock = threading.Lock()
+        self._queries = OrderedDict()
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="answer-translation")
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "unknown": 0, "translated": 0, "rejected": 0,
+                      "failures": 0, "query_translations": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _failed(self, what: str, error: Exception):
+        # Translation is an optimisation; the caller falls back to a retrieval run
+        self._count("failures")
+        os.write(1, f"\nAnswer translation failed ({what}): {error}\n".encode())
+
+    def _complete(self, messages, **kwargs) -> str:
+        response = self.client.chat.completions.create(model=self.model, messages=messages, temperature=0, **kwargs)
+        usage = run_usage(response)
+        if usage:
+            self._count("prompt_tokens", usage[0])
+            self._count("completion_tokens", usage[1])
+        return response.choices[0].message.content or ""
+
+    def known_canonical(self, language: str, query: str):
+        """The question in the canonical language if that needs no completion, else None"""
+        normalized = normalize_query(query)
+        suggestion = self._suggestions.get(normalized)
+        if suggestion is not None:
+            return suggestion
+        if language == self.canonical_language:
+            return query
+        key = (language, normalized)
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+        return None
+
+    def canonical(self, language: str, query: str) -> str:
+        """The question in the canonical language"""
+        canonical = self.known_canonical(language, query)
+        if canonical is not None:
+            return canonical
+        canonical = self._complete([
+            {"role": "system", "content": f"Translate the user's question into {self.canonical_language}. "
+                                          "Reply with the translation only."},
+            {"role": "user", "content": query},
+        ]).strip() or query
+        self._count("query_translations")
+        with self._lock:
+            self._queries[(language, normalize_query(query))] = canonical
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return canonical
+
+    def _canonicalize(self, language: str, query: str):
+        """canonical(), or None after logging the failure"""
+        try:
+            return self.canonical(language, query)
+        except Exception as e:
+            self._failed("question", e)
+            return None
+
+    def _store(self, assistant_id: str, vector_store_id: str, language: str, query: str, answer):
+        canonical = self._canonicalize(language, query)
+        if canonical is None:
+            return
+        self.answer_cache.put(assistant_id, vector_store_id, f"{CANONICAL}:{language}", canonical, answer)
+
+    def remember(self, assistant_id: str, vector_store_id: str, language: str, query: str, answer):
+        """Store a fresh answer as the canonical answer of its question
+
+        Stored right away when the question needs no translation, otherwise
+        from a background thread so the caller doesn't wait for a completion.
+        """
+        if not answer:
+            return
+        if self.known_canonical(language, query) is not None:
+            self._store(assistant_id, vector_store_id, language, query, answer)
+        else:
+            self._background.submit(self._store, assistant_id, vector_store_id, language, query, answer)
+
+    def translate(self, blocks, language: str):
+        """The blocks in language with every protected piece unchanged, or None"""
+        protected = [protect(block) for block in blocks]
+        reply = self._complete([
+            {"role": "system", "content": (
+                f"Translate each string of the JSON array in \"blocks\" into {language}. Copy every ⟦n⟧ "
+                "placeholder unchanged and keep the markdown formatting. Reply with a JSON object "
+                "{\"blocks\": [...]} holding the same number of strings in the same order."
+            )},
+            {"role": "user", "content": json.dumps({"blocks": [text for text, _ in protected]}, ensure_ascii=False)},
+        ], response_format={"type": "json_object"})
+        try:
+            translated = json.loads(reply)["blocks"]
+        except (ValueError, KeyError, TypeError):
+            return None
+        if not isinstance(translated, list) or len(translated) != len(blocks):
+            return None
+        result = []
+        for text, (_, pieces) in zip(translated, protected):
+            block = restore(text, pieces) if isinstance(text, str) else None
+            if block is None:
+                return None
+            result.append(block)
+        return result
+
+    def lookup(self, assistant_id: str, vector_store_id: str, language: str, query: str, sources=None):
+        """An answer built from another language's cached answer, or None
+
+        sources limits and orders the languages to take the answer from. The
+        result is stored in the answer cache under the requested language.
+        """
+        self._count("lookups")
+        canonical = self.known_canonical(language, query)
+        if canonical is None:
+            # Never asked before: translating it now would hold up the run for a likely miss;
+            # remember() translates it once the run has answered
+            self._count("unknown")
+            self._count("misses")
+            return None
+        if sources is None:
+            # A canonical answer already in this language needs no translation
+            sources = [language, self.canonical_language]
+            sources += [other for other in self.languages if other not in sources]
+        for source in sources:
+            blocks = self.answer_cache.peek(assistant_id, vector_store_id, f"{CANONICAL}:{source}", canonical)
+            if blocks is None:
+                continue
+            if source != language:
+                try:
+                    blocks = self.translate(blocks, language)
+                except Exception as e:
+                    self._failed(f"{source} to {language}", e)
+                    return None
+                if blocks is None:
+                    self._count("rejected")
+                    self._count("misses")
+                    return None
+                self._count("translated")
+            self._count("hits")
+            self.answer_cache.put(assistant_id, vector_store_id, language, query, blocks)
+            return blocks
+        self._count("misses")
+        return None
+
+    def render(self) -> list:
+        """Prometheus lines; registered with the telemetry exporter"""
+        with self._lock:
+            stats = dict(self.stats)
+        return [
+            "# HELP ramp_answer_translation_lookups_total Cache misses looked up in other languages by outcome",
+            "# TYPE ramp_answer_translation_lookups_total counter",
+            f'ramp_answer_translation_lookups_total{{outcome="hit"}} {stats["hits"]}',
+            f'ramp_answer_translation_lookups_total{{outcome="miss"}} {stats["misses"]}',
+            "# HELP ramp_answer_translation_unknown_total Lookups of questions with no known canonical form",
+            "# TYPE ramp_answer_translation_unknown_total counter",
+            f"ramp_answer_translation_unknown_total {stats['unknown']}",
+            "# HELP ramp_answer_translation_completions_total Question translations made with a chat completion",
+            "# TYPE ramp_answer_translation_completions_total counter",
+            f"ramp_answer_translation_completions_total {stats['query_translations']}",
+        ]
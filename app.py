@@ -1,117 +1,131 @@
 # app.py
 import streamlit as st
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
 from typing import Dict
 import random
+import time
+import concurrent.futures
+import uuid
+import re
+from openai import RateLimitError
+from assistant_catalog import page_of
+from assistant_configs import BASE_INSTRUCTIONS
+from app_context import AppContext, current_session_id, get_app_context, session_is_active
+from async_service import ServiceOverloaded
+from fan_out import merged
+from run_waiter import RunOutcome, RunWaitCancelled, RunWaitTimeout
+from message_cache import ConversationCache
+from query_pipeline import ASSISTANT_INSTRUCTIONS, first_turn_kwargs, run_instructions, turn_kwargs
+from rendering import MessageList, inject_static_assets, store_cookie
+from streaming import LATENCY_TRACKER, ResponseTimer, stream_run
+from telemetry import TELEMETRY
+from text_processing import clean_source_annotations, process_text, timestamp_to_deciseconds
+
+# Assistants listed per page of the selector
+ASSISTANTS_PER_PAGE = 20
+
+# Cookie holding the anonymous history token
+HISTORY_COOKIE = "ramp_history"
+_TOKEN_RE = re.compile(r"[0-9a-f]{32}")
 
-# Load environment variables
-load_dotenv()
 
 class AssistantUI:
-    def __init__(self):
-        # Load and validate OpenAI API key
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables. Please ensure your .env file contains this key.")
+    def __init__(self, context: AppContext = None):
+        # Shared client, waiter and translations live in the cached app context
+        context = context or get_app_context()
+        self.client = context.client
+        self.run_waiter = context.run_waiter
+        self.stream_responses = context.stream_responses
+        self.answer_cache = context.answer_cache
+        self.answer_translator = context.answer_translator
+        self.single_flight = context.single_flight
+        self.model_router = context.model_router
+        # (key, flight) while this session runs a query other sessions may be waiting on
+        self.leading_flight = None
+        self.warmer = context.warmer
+        self.run_pool = context.run_pool
+        self.token_ledger = context.token_ledger
+        self.timestamp_indexes = context.timestamp_indexes
+        self.snap_tolerance = context.snap_tolerance
+        self.local_retriever = context.local_retriever
+        self.local_answer_model = context.local_answer_model
+        self.context_budget = context.context_budget
+        self.history_store = context.history_store
+        self.fan_out = context.fan_out
+        self.translations = context.translations
+        self.creative_prompts = context.creative_prompts
         
-        # Initialize OpenAI client with API key from .env
-        self.client = OpenAI(api_key=api_key)
-        
-        # Hardcoded assistant and vector store IDs
-        self.ASSISTANT_ID = "asst_k77pCUJSViHjAKtSMQBgnDg8"
-        self.VECTOR_STORE_ID = "vs_9p6gYSeSHs3xtwK4A9yKUKNP"
-        
-        # Dictionary to store assistant names and IDs
-        self.assistants = {
-            "Honouring_Karpal_Singh": "asst_k77pCUJSViHjAKtSMQBgnDg8",
-        }
-
-        # Add translations dictionary
-        self.translations = {
-            "English": {
-                "placeholder": "Ask your question about Minister Gobind Singh Deo...",
-                "ask_button": "Ask",
-                "creative_button": "I'm Feeling Creative",
-                "suggested_questions": "Suggested Questions",
-                "suggestions": [
-                    "What are Gobind Singh Deo's key digital initiatives?",
-                    "How is he transforming Malaysia's digital landscape?",
-                    "What are his main technology policies?",
-                    "How does he approach digital economy development?"
-                ],
-                "processing": "Processing your query...",
-                "select_assistant": "Select Assistant",
-                "start_new_conversation": "Start New Conversation"
-            },
-            "Bahasa Melayu": {
-                "placeholder": "Tanya soalan anda tentang Menteri Gobind Singh Deo...",
-                "ask_button": "Tanya",
-                "creative_button": "Rasa Kreatif",
-                "suggested_questions": "Soalan Dicadangkan",
-                "suggestions": [
-                    "Apakah inisiatif digital utama Gobind Singh Deo?",
-                    "Bagaimana beliau mengubah landskap digital Malaysia?",
-                    "Apakah dasar-dasar teknologi utama beliau?",
-                    "Bagaimana pendekatan beliau dalam pembangunan ekonomi digital?"
-                ],
-                "processing": "Memproses pertanyaan anda...",
-                "select_assistant": "Pilih Pembantu",
-                "start_new_conversation": "Mulakan Perbualan Baru"
-            },
-            "عربي": {  
-                "placeholder": "...اطرح سؤالك حول محتوى فيناس",
-                "ask_button": "اسأل",
-                "creative_button": "أشعر بالإبداع",
-                "suggested_questions": "الأسئلة المقترحة",
-                "suggestions": [
-                    "أرني المشهد حيث يلتقي البطل مع الخصم؟",
-                    "أي مشهد فيه لحظة سعيدة؟",
-                    "ما هو ملخص الفيديو؟",
-                    "ماذا يمكننا أن نتعلم من هذا الفيديو؟"
-                ],
-                "processing": "...جاري معالجة استفسارك",
-                "select_assistant": "اختر مساعد",
-                "start_new_conversation": "ابدأ محادثة جديدة"
-            },
-            "中文": {
-                "placeholder": "询问有关Minister Gobind Singh Deo的问题...",
-                "ask_button": "询问",
-                "creative_button": "创意灵感",
-                "suggested_questions": "建议问题",
-                "suggestions": [
-                    "Gobind Singh Deo的主要数字倡议是什么？",
-                    "他如何改变马来西亚的数字景观？",
-                    "他的主要技术政策是什么？",
-                    "他如何处理数字经济开发？"
-                ],
-                "processing": "正在处理您的查询...",
-                "select_assistant": "选择助手",
-                "start_new_conversation": "开始新对话"
-            },
-            "தமிழ்": {
-                "placeholder": "பிரதான அந்வர் இப்ராஹிம் பற்றி கேள்வி கேளுங்கள்...",
-                "ask_button": "கேள்",
-                "creative_button": "படைப்பாற்றல் உணர்கிறேன்",
-                "suggested_questions": "பரிந்துரைக்கப்பட்ட கேள்விகள்",
-                "suggestions": [
-                    "நந்வர் இப்ராஹிம் பிரதான மாநில மேல்வாய்ப்பு என்ன?",
-                    "அந்வர் குறித்து மாதிரி மலையில் எவ்வாறு வளர்ந்திருக்கிறது?",
-                    "அவரின் முக்கிய நிதி நோக்கங்கள் என்ன?",
-                    "அவர் விரிவாக்க வழியாக இருப்பது ன்ன?"
-                ],
-                "processing": "உங்கள் கேள்வியை செயலாக்குகிறது...",
-                "select_assistant": "உதவியாளரை தேர்ந்தெடுக்கவும்",
-                "start_new_conversation": "புதிய உரையாடலை தொடங்கவும்"
-            }
-        }
+        self.provisioner = context.provisioner
+
+        # Every assistant's IDs, file and description, reloaded when the catalog file changes
+        self.catalog = context.catalog
+        self.catalog.refresh()
+
+        # Finished messages go to a component that only receives what it hasn't shown yet;
+        # both slots are placed by render_page at the same position on every rerun
+        self.message_list = MessageList()
+        self.live_slot = None
+        self.conversation_slot = None
+        self.shown_conversation = None
+
+        # Default assistant and vector store IDs until a selection is made
+        default = self.catalog.get(self.catalog.keys()[0])
+        self.ASSISTANT_ID = default.assistant_id
+        self.VECTOR_STORE_ID = default.vector_store
 
         # Add session state initialization
         if 'thread_id' not in st.session_state:
             st.session_state.thread_id = None
         if 'conversation_active' not in st.session_state:
             st.session_state.conversation_active = False
+        if 'pending_job' not in st.session_state:
+            st.session_state.pending_job = None
+        if 'local_history' not in st.session_state:
+            st.session_state.local_history = []
+        if self.history_store is not None and 'history_user' not in st.session_state:
+            # First run of this browser session: pick up where this user left off
+            st.session_state.history_user = self.history_token()
+            self.restore_history()
+
+    def history_token(self) -> str:
+        """Anonymous user token kept in a cookie, so a refresh or a later visit finds the same history
+
+        It used to be the ?u= URL parameter, which handed the conversation to
+        anyone a link was shared with; such a parameter is dropped, never used.
+        """
+        if "u" in st.query_params:
+            del st.query_params["u"]
+        token = st.context.cookies.get(HISTORY_COOKIE)
+        if not isinstance(token, str) or not _TOKEN_RE.fullmatch(token):
+            token = uuid.uuid4().hex
+        return token
+
+    def restore_history(self):
+        """Show the user's latest conversation from the local store, without API calls"""
+        conversation, summary = self.history_store.latest(st.session_state.history_user)
+        if conversation is None:
+            return
+        st.session_state.conversation_cache = conversation
+        st.session_state.thread_id = conversation.thread_id
+        st.session_state.conversation_active = True
+        record = self.catalog.get(summary["assistant"]) if summary["assistant"] else None
+        if record is not None:
+            st.session_state.current_assistant = record.key
+            st.session_state.current_vector_store = record.vector_store
+
+    def save_history(self, conversation: ConversationCache, run=None, mode: str = None, language: str = None):
+        """Store new messages and the run of this turn for the next visit"""
+        if self.history_store is None:
+            return
+        try:
+            self.history_store.save(
+                st.session_state.history_user, conversation, st.session_state.get("current_assistant"), language
+            )
+            if run is not None:
+                self.history_store.record_run(conversation, run, mode)
+        except Exception as e:
+            # Losing history must not lose the answer
+            os.write(1, f"\nCould not save history: {e}\n".encode())
 
     def get_text(self, key: str, language: str) -> str:
         """Get translated text for the given key and language"""
@@ -119,599 +133,273 @@ class AssistantUI:
 
     def get_creative_prompt(self, selected_language: str) -> str:
         """Generate creative prompts focused on video analysis and scene understanding"""
-        creative_prompts = {
-            "English": [
-                "Analyze the emotional journey of characters throughout this scene",
-                "Identify key visual storytelling techniques used in this segment",
-                "Examine the scene transitions and their impact on storytelling",
-                "Explore how lighting and color are used to convey mood in this scene",
-                "Break down the camera movements and their narrative significance",
-                "Analyze the pacing and rhythm of dialogue and action",
-                "Identify symbolism and visual metaphors in this sequence",
-                "Examine character dynamics and relationships in this scene"
-            ],
-            "Bahasa Melayu": [
-                "Analisis perjalanan emosi watak dalam babak ini",
-                "Kenalpasti teknik penceritaan visual dalam segmen ini",
-                "Teliti peralihan babak dan kesannya terhadap penceritaan",
-                "Terokai penggunaan pencahayaan dan warna untuk menyampaikan suasana",
-                "Huraikan pergerakan kamera dan kepentingannya dalam naratif",
-                "Analisis tempo dan ritma dialog serta aksi",
-                "Kenalpasti simbolisme dan metafora visual dalam urutan ini",
-                "Teliti dinamik dan hubungan antara watak dalam babak ini"
-            ],
-            "عربي": [
-                "تحليل الرحلة العاطفية للشخصيات في هذا المشهد",
-                "تحديد تقنيات السرد البصري في هذا المقطع",
-                "دراسة انتقالات المشهد وتأثيرها على السرد",
-                "استكشاف استخدام الإضاءة واللون لنقل المزاج",
-                "تحليل حركات الكاميرا وأهميتها السردية",
-                "تحليل وتيرة وإيقاع الحوار والعمل",
-                "تحديد الرمزية والاستعارات البصرية في هذا التسلسل",
-                "دراسة ديناميكيات وعلاقات الشخصيات في هذا المشهد"
-            ],
-            "中文": [
-                "分析这个场景中人物的情感变化",
-                "识别此片段中使用的视觉叙事技巧",
-                "研究场景转换及其对故事叙述的影响",
-                "探索光线和色彩如何传达情绪",
-                "分析摄像机运动及其叙事意义",
-                "分析对话和动作的节奏感",
-                "识别此序列中的象征主义和视觉隐喻",
-                "研究这个场景中的角色互动和关系"
-            ],
-            "தமிழ்": [
-                "இந்த காட்சியில் கதாபாத்திரங்களின் உணர்ச்சி பயணத்தை பகுப்பாய்வு செய்க",
-                "இந்த பகுதியில் பயன்படுத்தப்படும் விஷுவல் கதை சொல்லும் நுட்பங்களை கண்டறியவும்",
-                "காட்சி மாற்றங்களையும் கதை சொல்லலில் அவற்றின் தாக்கத்தையும் ஆராயுங்கள்",
-                "மனநிலையை வெளிப்படுத்த ஒளி மற்றும் வண்ணம் பயன்படுத்தப்படும் விதத்தை ஆராயுங்கள்",
-                "கேமரா அசைவுகள் மற்றும் அவற்றின் விவரிப்பு முக்கியத்துவத்தை பகுப்பாய்வு செய்யவும்",
-                "உரையாடல் மற்றும் செயலின் வேகம் ம்ும் ரித்தத்தை பகுப்பாய்வு செய்யவும்",
-                "இந்த வரிசையில் உள்ள சின்னங்கள் மற்றும் காட்சி உருவகங்களை கண்டறியவும்",
-                "இந்த காட்சியில் கதாபாத்திர இயக்கவியல் மற்றும் உறவுகளை ஆராயவும்"
-            ]
-        }
-            
-        return random.choice(creative_prompts[selected_language])
+        return random.choice(self.creative_prompts[selected_language])
 
     def initialize_assistants(self):
-        """Initialize or update assistants with enforced configuration"""
-        # Base instructions for all video analysis assistants
-        base_instructions = """# Video Content Analysis Expert System
-
-You are an expert video content analyst with exceptional attention to detail and precise timestamp handling. Your core responsibility is to provide comprehensive, accurate analysis of video content while maintaining absolute consistency in timestamp formatting.
-
-## Primary Objective
-Deliver precise, source-free timestamp analysis of video content that ensures all time references are clickable and functional.
-
-## Core Rules
-
-### Critical Timestamp Standards
-- **Format**: Always use HH:MM:SS (e.g., 01:23:45)
-- **Presentation**: 
-  - Single point: "At [HH:MM:SS]"
-  - Range: "From [HH:MM:SS] to [HH:MM:SS]"
-- **Leading Format**: Begin scene descriptions with timestamps
-- **Consistency**: Maintain exact format for all time references
-
-### Absolute Prohibitions
-- NO source references (†source, [source], etc.)
-- NO brackets except in "At [timestamp]" format
-- NO annotations or metadata with timestamps
-- NO non-standard time formats
-
-### Pre-Submission Checklist
-1. Timestamp Format Verification
-   - Confirm HH:MM:SS format
-   - Verify 24-hour time
-   - Check leading zeros
-   - Validate colon placement
-
-2. Source Removal Verification
-   - Remove all source references
-   - Clear any metadata
-   - Delete annotations 
-   - Strip brackets (except in standard format)
-
-### Formatting Specifications
-1. Time Components:
-   - Hours: Two digits (00-23)
-   - Minutes: Two digits (00-59)
-   - Seconds: Two digits (00-59)
-
-2. Presentation Rules:
-   - Use 24-hour format
-   - Include leading zeros
-   - Maintain consistent colons
-   - Preserve exact spacing
-
-### Enhanced Clarification Protocol
-
-#### Initial Response to Questions
-1. Acknowledge query explicitly
-2. Assess specificity level
-3. Identify potential ambiguities
-4. Structure clarification approach
-
-# #### Clarification Framework
-# For unclear queries, implement this structured approach:
-
-# 1. **Recognition**
-# ```
-# "I understand you're interested in [element]. To provide precise timestamps, I need to clarify a few points:"
-# ```
-
-# 2. **Scope Definition**
-# ```
-# "Your question could encompass:
-# - [Specific aspect 1]
-# - [Specific aspect 2]
-# - [Specific aspect 3]
-
-# Which aspect is most relevant to your needs?"
-# ```
-
-# 3. **Precision Questions**
-# ```
-# To pinpoint exact timestamps, I should know:
-# 1. Are you interested in [specific element]?
-# 2. Should I focus on [particular aspect]?
-# 3. Would you prefer [option A] or [option B]?
-```
-
-4. **Context Gathering**
-```
-"This will help me provide:
-- Exact timestamps for relevant scenes
-- Appropriate context
-- Connected moments if relevant"
-```
-
-### Query Categories and Response Templates
-
-#### For Timeline Requests
-```
-Structure:
-1. "At [HH:MM:SS]": Primary event
-2. "From [HH:MM:SS] to [HH:MM:SS]": Event duration
-3. Context description
-4. Relevant connections
-```
-
-#### For Content Analysis
-```
-Format:
-1. Timestamp introduction
-2. Scene description
-3. Technical details
-4. Contextual significance
-```
-
-#### For Summary Requests
-```
-Organization:
-1. Chronological overview with precise timestamps
-2. Key moment highlighting
-3. Pattern identification
-4. Temporal relationships
-```
-
-### Response Quality Control
-
-#### Pre-Submission Checklist
-1. Timestamp Format Verification
-   - Confirm HH:MM:SS format
-   - Verify 24-hour time
-   - Check leading zeros
-   - Validate colon placement
-
-2. Source Removal Verification
-   - Remove all source references
-   - Clear any metadata
-   - Delete annotations
-   - Strip brackets (except in standard format)
-
-3. Consistency Check
-   - Uniform timestamp format
-   - Consistent presentation
-   - Proper spacing
-   - Correct sequence
-
-## Advanced Analysis Guidelines
-
-### Scene-by-Scene Analysis Protocol
-
-#### Temporal Mapping
-- Always lead with clean timestamp
-- Maintain chronological order
-- Track scene transitions
-- Note temporal relationships
-
-#### Content Elements
-1. Visual Components
-```
-- Primary action or focus
-- Key visual elements
-- Technical composition
-- Scene transitions
-```
-
-2. Contextual Analysis
-```
-- Scene significance
-- Narrative progression
-- Thematic elements
-- Technical aspects
-```
-
-### Advanced Clarification Scenarios
-
-#### For Complex Queries
-```
-Step 1: Context Assessment
-"Your question about [topic] involves multiple elements. Let's break it down:
-- Temporal aspects
-- Content focus
-- Technical elements"
-
-Step 2: Precision Gathering
-"To provide the most relevant timestamps:
-1. Should we focus on [specific element]?
-2. Are you interested in [particular aspect]?
-3. Would you prefer [detailed aspect] or [broader view]?"
-
-Step 3: Response Preview
-"I can provide:
-- Exact timestamps for each element
-- Detailed scene descriptions
-- Connected moments if relevant"
-```
-
-#### For Multi-Scene Analysis
-```
-Approach:
-1. Establish primary focus
-2. Identify related scenes
-3. Map temporal connections
-4. Build contextual bridges
-```
-
-### Response Architecture
-
-#### Basic Response Template
-```
-Opening:
-- Clear acknowledgment
-- Scope definition
-- Temporal framework
-
-Body:
-- Timestamp-led descriptions
-- Contextual information
-- Technical details
-
-Conclusion:
-- Summary of key points
-- Related timestamps if relevant
-- Optional follow-up suggestions
-```
-
-#### Advanced Response Structure
-```
-For Complex Analysis:
-1. Primary Timeline
-   - Key timestamps
-   - Essential context
-   - Main elements
-
-2. Supporting Details
-   - Related timestamps
-   - Technical aspects
-   - Contextual connections
-
-3. Comprehensive Overview
-   - Pattern identification
-   - Temporal relationships
-   - Thematic links
-```
-
-### Quality Assurance Protocol
-
-#### Content Verification
-1. Timestamp Accuracy
-```
-- Format consistency (HH:MM:SS)
-- Chronological order
-- Range accuracy
-- Transition points
-```
-
-2. Description Quality
-```
-- Clear connection to timestamps
-- Accurate scene details
-- Relevant context
-- Technical precision
-```
-
-3. Final Review Checklist
-```
-□ All timestamps in HH:MM:SS format
-□ No source references or annotations
-□ Consistent presentation
-□ Logical flow
-□ Clear connections
-□ Accurate descriptions
-```
-
-### Special Cases Handling
-
-#### For Technical Analysis
-```
-Focus Areas:
-1. Equipment and setup
-2. Production elements
-3. Technical specifications
-4. Quality indicators
-```
-
-#### For Content Patterns
-```
-Analysis Elements:
-1. Recurring themes
-2. Visual motifs
-3. Technical consistencies
-4. Temporal patterns
-```
-
-### Error Prevention Protocol
-
-#### Common Pitfalls to Avoid
-1. Timestamp Formatting
-```
-CORRECT:
-- At [00:05:30]
-- From [01:15:00] to [01:16:00]
-
-INCORRECT:
-- At 5:30
-- From 1:15 - 1:16
-- [00:05:30†source]
-```
-
-2. Response Structure
-```
-CORRECT:
-1. Clean timestamp
-2. Description
-3. Context
-4. Connections
-
-INCORRECT:
-1. Description
-2. Timestamp with source
-3. Mixed formats
-```
-
-### Final Response Verification
-
-#### Pre-Submission Review
-1. Format Check
-```
-- HH:MM:SS consistency
-- Proper timestamp placement
-- Clean presentation
-- No source references
-```
-
-2. Content Review
-```
-- Accurate descriptions
-- Clear connections
-- Logical flow
-- Comprehensive coverage
-```
-
-3. Quality Control
-```
-- Response completeness
-- Information accuracy
-- Format consistency
-- Technical precision
-```
-
-Remember: The primary goal is to provide precise, clean timestamps with accurate content analysis while maintaining absolute consistency in format and presentation. Never include source references or annotations with timestamps."""
-
-        # Define specific configurations for each assistant
-        assistant_configs = {
-            "Honouring_Karpal_Singh": {
-                "name": "Honouring Karpal Singh Analyst",
-                "vector_store": "vs_9p6gYSeSHs3xtwK4A9yKUKNP",
-                "additional_instructions": """Focus on analyzing Minister Gobind Singh Deo's:
-                    - Digital transformation initiatives
-                    - Technology policies and reforms
-                    - Digital economy development
-                    - MDEC and digital agency oversight"""
-            }
-        }
-
-        # Create or update each assistant
-        for assistant_key, config in assistant_configs.items():
-            complete_instructions = f"{base_instructions}\n\nSPECIFIC INSTRUCTIONS:\n{config['additional_instructions']}"
-            
-            # Update assistant configurations
-            try:
-                assistant = self.client.beta.assistants.create(
-                    name=config['name'],
-                    instructions=complete_instructions,
-                    model="gpt-4-turbo-preview",
-                    tools=[{"type": "retrieval"}],
-                    metadata={"vector_store": config['vector_store']}
-                )
-                
-                # Store the assistant ID
-                self.assistants[assistant_key] = assistant.id
-                
-            except Exception as e:
-                st.error(f"Error configuring assistant {assistant_key}: {str(e)}")
-
-
-    def create_or_get_thread(self):
-        """Create a new thread if none exists or return existing thread ID"""
-        if not st.session_state.thread_id:
-            thread = self.client.beta.threads.create()
-            st.session_state.thread_id = thread.id
-            
-            # Add initial message enforcing timestamp formatting
-            self.client.beta.threads.messages.create(
-                thread_id=thread.id,
-                role="assistant",
-                content="""IMPORTANT: I will follow these rules strictly:
-                1. I will NEVER include source references like [source], †source, or any annotations
-                2. I will ONLY use clean timestamps in HH:MM:SS format 
-                3. The ONLY acceptable brackets are for timestamps as: At [HH:MM:SS]
-                4. I will VERIFY every response to ensure NO source annotations exist
-                5. If I detect any source annotations, I will remove them before responding"""
-            )
-            
-        return st.session_state.thread_id
+        """Create or update the configured assistants; unchanged ones cost no API calls"""
+        try:
+            self.provisioner.provision(self.catalog.configs(), BASE_INSTRUCTIONS)
+        except Exception as e:
+            st.error(f"Error configuring assistants: {str(e)}")
+            return
+        # Pick up the IDs provisioning wrote to the registry
+        self.catalog.reload()
+
+    def get_conversation_cache(self, thread_id: str) -> ConversationCache:
+        """Return the processed message cache for a thread, replacing any stale one"""
+        cache = st.session_state.get("conversation_cache")
+        if cache is not None and cache.thread_id is None:
+            # Cached answers shown before the thread existed stay in the history
+            cache.thread_id = thread_id
+        if cache is None or cache.thread_id != thread_id:
+            cache = ConversationCache(thread_id)
+            st.session_state.conversation_cache = cache
+        return cache
     
     def convert_timestamp_to_deciseconds(self, timestamp_str):
         """Convert HH:MM:SS timestamp to deciseconds"""
-        try:
-            # Handle different timestamp formats
-            if ":" in timestamp_str:
-                parts = timestamp_str.split(":")
-                if len(parts) == 3:  # HH:MM:SS
-                    h, m, s = map(float, parts)
-                    total_seconds = h * 3600 + m * 60 + s
-                elif len(parts) == 2:  # MM:SS
-                    m, s = map(float, parts)
-                    total_seconds = m * 60 + s
-                else:
-                    return None
-                # Convert to deciseconds for more precise timing
-                return int(total_seconds * 10)  # Multiply by 10 for deciseconds
-            return None
-        except:
-            return None
-
-    def create_timestamp_link(self, match, file_id):
-        """Create clickable link for timestamp with decisecond precision"""
-        timestamp = match.group(0)
-        deciseconds = self.convert_timestamp_to_deciseconds(timestamp)
-        if deciseconds is not None:
-            # Add decisecond precision to URL
-            return f'<a href="https://finas.ortana.tv/Clips/View?FleId={file_id}&offset={deciseconds/10}" target="_blank">{timestamp}</a>'
-        return timestamp
+        return timestamp_to_deciseconds(timestamp_str)
 
     def process_message_content(self, content, file_id):
-        """Process message content to add timestamp links"""
-        import re
-        
-        # First remove any source annotations
-        source_patterns = [
-            r'\【\d+:\d+†source\】',  # Matches 【5:1†source】
-            r'\[\d+:\d+†source\]',    # Matches [5:1†source]
-            r'\【\d+:\d+\】',         # Matches 【5:1】
-            r'†source',               # Matches standalone †source
-            r'\[\d+:\d+\](?!.*\])',   # Matches [5:1] when not part of timestamp
-        ]
-        
-        # Remove source annotations
-        for pattern in source_patterns:
-            content = re.sub(pattern, '', content)
-        
-        # Enhanced pattern to match clean timestamps
-        timestamp_pattern = r'\b\d{1,2}:\d{2}(:\d{2})?(\.\d{1,3})?\b'
-        
-        # Replace timestamps with clickable links
-        processed_content = re.sub(
-            timestamp_pattern,
-            lambda m: self.create_timestamp_link(m, file_id),
-            content
-        )
-        
-        return processed_content
+        """Process message content to remove source annotations and add timestamp links"""
+        return process_text(content, file_id)
 
     def clean_source_annotations(self, text):
         """Remove any source annotations from text"""
-        import re
-        
-        patterns = [
-            r'\【\d+:\d+†source\】',
-            r'\[\d+:\d+†source\]',
-            r'\【\d+:\d+\】',
-            r'†source',
-            r'\[\d+:\d+\](?!.*\])'
-        ]
-        
-        for pattern in patterns:
-            text = re.sub(pattern, '', text)
-        
-        return text
+        return clean_source_annotations(text)
+
+    def render_message_html(self, role: str, processed_content: str) -> str:
+        """Wrap processed message content in a chat bubble styled by the static stylesheet"""
+        icon = "🧑" if role == "user" else "🤖"
+        return f'<div class="chat-bubble {role}"><strong>{icon}</strong>: {processed_content}</div>'
+
+    def process_segment(self, text: str, file_id: str, snap=None) -> str:
+        """Clean annotations and link timestamps in a piece of answer text in one pass"""
+        return process_text(text, file_id, snap)
+
+    def render_conversation(self, conversation: ConversationCache, timer: ResponseTimer = None):
+        """Show this conversation in the message list once the page is laid out"""
+        self.shown_conversation = conversation
+        if timer is not None and len(conversation):
+            # In blocking mode the newest reply is the first thing the user sees
+            timer.mark_first_token()
+
+    def render_message_list(self):
+        """Send the message list the messages it doesn't have yet and record the payload"""
+        if self.conversation_slot is None:
+            return
+        conversation = self.shown_conversation or st.session_state.get("conversation_cache")
+        with self.conversation_slot:
+            stats = self.message_list.render(conversation, title="Conversation:")
+        TELEMETRY.observe_render(stats, assistant=st.session_state.get("current_assistant"))
+        if stats["sent"]:
+            os.write(1, (
+                f"\n[render] messages={stats['messages']} sent={stats['sent']} "
+                f"bytes={stats['bytes']} {stats['seconds'] * 1000:.1f}ms\n"
+            ).encode())
+
+    def wait_for_job(self, job_id: str, poll_interval: float = 0.5):
+        """Wait for a background run, cancelling it if the browser session goes away
+
+        The elapsed-time caption is a Streamlit call, which is what lets a rerun
+        interrupt this wait; the job keeps running and the next rerun resumes it.
+        """
+        status = st.empty()
+        started = time.monotonic()
+        while True:
+            try:
+                result = self.run_pool.collect(job_id, timeout=poll_interval)
+                status.empty()
+                return result
+            except concurrent.futures.TimeoutError:
+                if not session_is_active():
+                    self.run_pool.cancel(job_id, settle_timeout=0)
+                    raise RunWaitCancelled("Session ended while waiting for the assistant")
+                status.caption(f"⏳ {time.monotonic() - started:.0f}s")
+
+    def complete_turn(self, conversation: ConversationCache, outcome, process, timer: ResponseTimer,
+                      cache_key=None, labels=None):
+        """Render the conversation after a run and cache the answer when allowed"""
+        TELEMETRY.observe_run(outcome, **(labels or {}))
+        # Failed runs are billed too
+        usage = self.token_ledger.record(conversation.thread_id, outcome.run)
+        self.context_budget.log(conversation.thread_id, usage)
+        self.save_history(conversation, outcome.run, timer.mode, (labels or {}).get("language"))
+
+        if not outcome.completed:
+            st.error(f"Run failed with status: {outcome.status} ({outcome.reason})")
+            return
+
+        # Newest first, each message already processed once
+        self.render_conversation(conversation, timer)
+
+        if cache_key is not None:
+            self.remember_answer(cache_key, conversation.answer_blocks())
+
+        timer.finish()
+        self.log_latency(timer)
+        if self.model_router is not None and "query_class" in (labels or {}) and timer.mode != "resumed":
+            self.model_router.observe(labels["query_class"], labels.get("model"), timer.total)
+
+        # Mark conversation as active
+        st.session_state.conversation_active = True
+
+    def remember_answer(self, cache_key, blocks):
+        """Cache a fresh answer, also as the one other languages are translated from"""
+        self.answer_cache.put(*cache_key, blocks)
+        if self.answer_translator is not None:
+            self.answer_translator.remember(*cache_key, blocks)
+        self.end_flight(blocks)
+
+    def end_flight(self, blocks=None):
+        """Hand this session's answer to sessions that asked the same question meanwhile"""
+        if self.leading_flight is not None:
+            key, flight = self.leading_flight
+            self.leading_flight = None
+            self.single_flight.finish(key, flight, list(blocks) if blocks else None)
+
+    def publish_progress(self, html: str) -> str:
+        """Render streamed text, also for sessions waiting on this query"""
+        if self.leading_flight is not None:
+            self.leading_flight[1].publish(html)
+        return self.render_message_html("assistant", html)
+
+    def answer_with_local_retrieval(self, content: str, process, vector_store_id: str, assistant_name: str,
+                                    language: str, file_id: str, cache_key=None):
+        """Answer from locally retrieved transcript chunks with one chat completion, no thread or run"""
+        # Imported here so the hosted backend doesn't need NumPy
+        from local_retrieval import answer_locally
+
+        history = st.session_state.local_history
+        timer = ResponseTimer("local-retrieval", not history)
+        answer, completion = answer_locally(
+            self.client,
+            self.local_retriever,
+            run_instructions(vector_store_id, assistant_name, language),
+            content,
+            # Same bound on context as the truncation strategy of hosted runs
+            history[-self.context_budget.last_messages:] if self.context_budget.last_messages else history,
+            file_id=file_id,
+            model=self.local_answer_model
+        )
+        timer.count_calls()
+        history.append({"role": "user", "content": content})
+        history.append({"role": "assistant", "content": answer})
+
+        conversation = self.get_conversation_cache(st.session_state.thread_id)
+        usage = self.token_ledger.record(conversation.thread_id, completion)
+        self.context_budget.log(conversation.thread_id, usage)
+        conversation.add_local("user", [process(content)])
+        conversation.add_local("assistant", [process(answer)])
+        self.save_history(conversation, language=language)
+
+        self.render_conversation(conversation, timer)
+        if cache_key is not None:
+            self.remember_answer(cache_key, [process(answer)])
+        timer.finish()
+        self.log_latency(timer)
+        st.session_state.conversation_active = True
+
+    def render_fan_out_answer(self, answer):
+        """One assistant's part of a fanned-out question, with its own timestamp links"""
+        source = "cached" if answer.cached else f"{answer.elapsed:.1f}s"
+        st.markdown(f"**🤖 {answer.record.name}** · {source} · relevance {answer.relevance:.2f}")
+        if answer.error:
+            st.warning(answer.error)
+        for block in answer.blocks:
+            st.markdown(self.render_message_html("assistant", block), unsafe_allow_html=True)
+
+    def answer_fan_out(self, records, query: str, language: str):
+        """Ask several assistants at once, show each answer as it lands, then all of them by relevance"""
+        timer = ResponseTimer("fan-out")
+        with self.live_slot:
+            progress = st.empty()
+            slots = {record.key: st.empty() for record in records}
+        answers = []
+        for answer in self.fan_out.run(records, language, query):
+            if answer is not None:
+                timer.mark_first_token()
+                answers.append(answer)
+                TELEMETRY.observe("fan_out_answer", answer.elapsed, assistant=answer.record.key, language=language)
+                with slots[answer.record.key].container():
+                    self.render_fan_out_answer(answer)
+            # Also what lets a rerun interrupt the wait
+            progress.caption(f"⏳ {len(answers)}/{len(records)} · {timer.total:.0f}s")
+        progress.empty()
+        for slot in slots.values():
+            slot.empty()
+
+        with self.live_slot:
+            st.markdown("#### Merged by relevance")
+            for answer in merged(answers):
+                self.render_fan_out_answer(answer)
+        timer.finish()
+        self.log_latency(timer)
+        elapsed = [answer.elapsed for answer in answers]
+        os.write(1, (
+            f"\n[fan-out] {len(records)} assistants wall={timer.total:.1f}s "
+            f"sum={sum(elapsed):.1f}s slowest={max(elapsed, default=0.0):.1f}s\n"
+        ).encode())
+
+    def resume_pending_job(self, selected_language: str):
+        """Show the answer of a run that a rerun took the script away from"""
+        pending = st.session_state.pending_job
+        if self.run_pool.get(pending["id"]) is None:
+            # Expired or collected elsewhere; the thread still holds the answer
+            st.session_state.pending_job = None
+            return
+
+        st.markdown("---")
+        with st.spinner(self.get_text("processing", selected_language)):
+            try:
+                result = self.wait_for_job(pending["id"])
+                st.session_state.pending_job = None
+                st.session_state.thread_id = result.thread_id
+                conversation = self.get_conversation_cache(result.thread_id)
+                labels = pending.get("labels") or {}
+                TELEMETRY.observe_timings(result.timings, **labels)
+                process = TELEMETRY.timed(
+                    "post_processing", lambda text: self.process_segment(text, pending["file_id"]), **labels
+                )
+                for reply in result.replies:
+                    conversation.add_message(reply, process)
+                timer = ResponseTimer("resumed", pending["first_turn"])
+                timer.count_calls(result.api_calls)
+                self.complete_turn(conversation, result.outcome, process, timer, pending["cache_key"], labels)
+            except RunWaitCancelled:
+                return
+            except (RateLimitError, ServiceOverloaded):
+                st.session_state.pending_job = None
+                st.warning(self.get_text("busy", selected_language))
+            except Exception as e:
+                st.session_state.pending_job = None
+                st.error(f"Error processing query: {str(e)}")
+
+    def log_latency(self, timer: ResponseTimer):
+        """Record a query's latency and write it to the console"""
+        LATENCY_TRACKER.record(timer)
+        summary = LATENCY_TRACKER.summary(timer.key)
+        os.write(1, (
+            f"\n[{timer.key}] ttft={timer.ttft:.2f}s total={timer.total:.2f}s api_calls={timer.api_calls} "
+            f"(p50 ttft={summary['ttft_p50']:.2f}s total={summary['total_p50']:.2f}s, "
+            f"mean api_calls={summary['api_calls']:.1f}, n={summary['count']})\n"
+        ).encode())
 
     def run(self):
+        self.render_page()
+        # After every early return of render_page too, so the list stays mounted
+        self.render_message_list()
+
+    def render_page(self):
         # Set page config and title
         st.set_page_config(page_title="RAMP-AI by BlacX", layout="centered")
         
-        # Custom CSS for Google-like styling
-        st.markdown("""
-            <style>
-            .big-font {
-                font-size:50px !important;
-                font-weight:bold;
-                text-align:center;
-                margin-bottom:30px;
-                background: linear-gradient(45deg, #1e3c72, #2a5298);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-            }
-            .search-box {
-                border-radius:24px !important;
-                border:1px solid #dfe1e5 !important;
-                padding:10px 20px !important;
-                width:100% !important;
-                margin:20px 0 !important;
-            }
-            .stButton button {
-                background-color:#f8f9fa;
-                border:1px solid #f8f9fa;
-                border-radius:4px;
-                color:#3c4043;
-                margin:11px 4px;
-                padding:0 16px;
-                height:36px;
-                cursor:pointer;
-            }
-            .stButton button:hover {
-                border:1px solid #dadce0;
-                box-shadow:0 1px 1px rgba(0,0,0,.1);
-            }
-            
-            /* Add RTL support for Arabic */
-            [lang="ar"] {
-                direction: rtl;
-                text-align: right;
-                font-family: 'Arial', sans-serif;
-            }
-            
-            /* Adjust input fields for RTL when Arabic is selected */
-            .rtl-support {
-                direction: rtl;
-                text-align: right;
-            }
-
-        
-            
-            .assistant-info {
-                font-size: 0.9em;
-                color: #666;
-                margin-top: 5px;
-            }
-            </style>
-            <div class="big-font">RAMP-AI by BlacX</div>
-        """, unsafe_allow_html=True)
+        # Stylesheet goes into the page head once per session instead of every rerun
+        assets = st.container()
+        inject_static_assets(assets)
+        if self.history_store is not None:
+            store_cookie(assets, HISTORY_COOKIE, st.session_state.history_user, self.history_store.retention)
+        st.markdown('<div class="big-font">RAMP-AI by BlacX</div>', unsafe_allow_html=True)
         
         # Language selector and "New Conversation" button side by side
         languages = list(self.translations.keys())
@@ -728,41 +416,71 @@ Remember: The primary goal is to provide precise, clean timestamps with accurate
             if st.session_state.conversation_active:
                 if st.button(self.get_text("start_new_conversation", selected_language)):
                     st.session_state.thread_id = None
+                    st.session_state.conversation_cache = None
+                    st.session_state.local_history = []
                     st.session_state.conversation_active = False
                     st.rerun()
 
         # Add assistant selector with description
         st.markdown("<div class='assistant-selector'>", unsafe_allow_html=True)
 
-        # Define assistant IDs and their corresponding vector stores
-        assistant_vector_stores = {
-            "Honouring_Karpal_Singh": "vs_9p6gYSeSHs3xtwK4A9yKUKNP"
-        }
-
-        # Initialize session state for tracking assistant changes
-        if "current_assistant" not in st.session_state:
-            st.session_state.current_assistant = list(self.assistants.keys())[0]
-            st.session_state.current_vector_store = assistant_vector_stores[st.session_state.current_assistant]
+        # Initialize session state for tracking assistant changes; a catalog
+        # reload may have removed the assistant this session was using
+        if st.session_state.get("current_assistant") not in self.catalog:
+            st.session_state.current_assistant = self.catalog.keys()[0]
+            st.session_state.current_vector_store = self.catalog.get(st.session_state.current_assistant).vector_store
+        if "assistant_page" not in st.session_state:
+            st.session_state.assistant_page = 0
 
         def switch_assistant():
             # Update assistant and vector store IDs
-            st.session_state.current_assistant = selected_assistant_name
-            st.session_state.current_vector_store = assistant_vector_stores[selected_assistant_name]
+            record = self.catalog.get(selected_assistant_name)
+            st.session_state.current_assistant = record.key
+            st.session_state.current_vector_store = record.vector_store
             
             # Log the changes using os.write for console output
-            import os
             os.write(1, f"\nSwitching Assistant:".encode())
-            os.write(1, f"\nAssistant ID: {self.assistants[selected_assistant_name]}".encode())
-            os.write(1, f"\nVector Store ID: {assistant_vector_stores[selected_assistant_name]}\n".encode())
+            os.write(1, f"\nAssistant ID: {record.assistant_id}".encode())
+            os.write(1, f"\nVector Store ID: {record.vector_store}\n".encode())
             
             # Clear conversation state
             st.session_state.thread_id = None
+            st.session_state.conversation_cache = None
+            st.session_state.local_history = []
             st.session_state.conversation_active = False
 
+        # Filter and page through the catalog so hundreds of assistants stay usable
+        matches = self.catalog.keys()
+        if len(self.catalog) > ASSISTANTS_PER_PAGE:
+            assistant_filter = st.text_input(
+                "Filter assistants",
+                placeholder="🔎",
+                label_visibility="collapsed",
+                key="assistant_filter"
+            )
+            matches = self.catalog.search(assistant_filter)
+        page_keys, page, page_count = page_of(matches, st.session_state.assistant_page, ASSISTANTS_PER_PAGE)
+        st.session_state.assistant_page = page
+        if page_count > 1:
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("◀", disabled=page == 0, use_container_width=True):
+                    st.session_state.assistant_page = page - 1
+                    st.rerun()
+            with col_page:
+                st.caption(f"{page + 1} / {page_count} ({len(matches)})")
+            with col_next:
+                if st.button("▶", disabled=page >= page_count - 1, use_container_width=True):
+                    st.session_state.assistant_page = page + 1
+                    st.rerun()
+        if not page_keys:
+            # Nothing matches the filter; keep showing the current assistant
+            page_keys = [st.session_state.current_assistant]
+
         # Add assistant selector
         selected_assistant_name = st.selectbox(
             self.get_text("select_assistant", selected_language),
-            list(self.assistants.keys()),
+            page_keys,
             format_func=lambda x: f"🤖 {x}",
             key="assistant_selector"
         )
@@ -775,17 +493,44 @@ Remember: The primary goal is to provide precise, clean timestamps with accurate
             st.rerun()
 
         # Update the assistant ID and vector store ID from session state
-        self.ASSISTANT_ID = self.assistants[st.session_state.current_assistant]
+        current = self.catalog.get(st.session_state.current_assistant)
+        self.ASSISTANT_ID = current.assistant_id
         self.VECTOR_STORE_ID = st.session_state.current_vector_store
 
+        # Pre-answer the suggested questions of assistants people are using
+        if self.warmer is not None:
+            self.warmer.ensure(
+                self.ASSISTANT_ID,
+                self.VECTOR_STORE_ID,
+                current.key,
+                current.file_id
+            )
+
         # Update assistant description display
-        assistant_descriptions = {
-            "Honouring_Karpal_Singh": "https://f001.backblazeb2.com/file/Kiosk-ZoneTV-Proxy/0E4C36A5-1993-461D-BDCF-3EF4A7613EFA.MP4",
-        }
-        st.markdown(f"<div class='assistant-info'>{assistant_descriptions.get(selected_assistant_name, '')}</div>", 
+        selected = self.catalog.get(selected_assistant_name)
+        st.markdown(f"<div class='assistant-info'>{selected.description_url if selected else ''}</div>", 
                     unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+        # Ask this assistant, or the same question of several videos at once
+        query_mode = st.radio(
+            "Ask",
+            ["This assistant", "Selected assistants", "All assistants"],
+            horizontal=True,
+            label_visibility="collapsed",
+            key="query_mode"
+        )
+        fan_out_keys = None
+        if query_mode == "Selected assistants":
+            fan_out_keys = st.multiselect(
+                "Assistants to ask",
+                self.catalog.keys(),
+                format_func=lambda x: f"🤖 {x}",
+                key="fan_out_selection"
+            )
+        elif query_mode == "All assistants":
+            fan_out_keys = self.catalog.keys()
+
         # Use translated text throughout the interface
         rtl_class = "rtl-support" if selected_language == "عربي" else ""
         query = st.text_input(
@@ -817,22 +562,30 @@ Remember: The primary goal is to provide precise, clean timestamps with accurate
         suggestions = self.get_text("suggestions", selected_language)
         
         # Display suggestions in a grid
+        suggested = False
         cols = st.columns(2)
         for idx, suggestion in enumerate(suggestions):
             with cols[idx % 2]:
                 if st.button(suggestion, key=f"sug_{idx}", use_container_width=True):
                     query = suggestion
                     search = True
+                    suggested = True
 
+        # Fixed positions for the answer being streamed and the conversation below it
+        self.live_slot = st.container()
+        self.conversation_slot = st.container()
         
         # Handle search with translated processing message
         if search or lucky:
             st.markdown("---")
             with st.spinner(self.get_text("processing", selected_language)):
                 try:
-                    # Get or create thread
-                    thread_id = self.create_or_get_thread()
-                    
+                    # A new question supersedes an abandoned one, whose run stops in the background
+                    superseded = None
+                    if st.session_state.pending_job:
+                        superseded = self.run_pool.cancel(st.session_state.pending_job["id"])
+                        st.session_state.pending_job = None
+
                     # Determine the content to send
                     if lucky:  # I'm Feeling Creative button
                         if not query:  # If no query entered, use a random creative prompt
@@ -842,85 +595,234 @@ Remember: The primary goal is to provide precise, clean timestamps with accurate
                             creative_query = f"Please provide a creative and innovative response about: {query}. Think outside the box and suggest unique perspectives or possibilities while staying within FINAS guidelines."
                             query = creative_query
 
-                    # Add message to thread
-                    message = self.client.beta.threads.messages.create(
-                        thread_id=thread_id,
-                        role="user",
-                        content=f"[Language: {selected_language}] {query}"
-                    )
-                    
-                    # Create and run assistant
-                    run = self.client.beta.threads.runs.create(
-                        thread_id=thread_id,
-                        assistant_id=self.ASSISTANT_ID,
-                        additional_instructions=f"""
-                        Use vector store {assistant_vector_stores[selected_assistant_name]} for {selected_assistant_name}.
-                        CRITICAL FORMATTING RULES:
-                        1. NEVER include source references (†source, [source], etc.)
-                        2. ONLY use timestamps in HH:MM:SS format
-                        3. ONLY use brackets for timestamps like: At [HH:MM:SS]
-                        4. Remove ALL source annotations before responding
-                        5. Verify response is free of source references"""
+                    if fan_out_keys is not None:
+                        records = [self.catalog.get(key) for key in fan_out_keys]
+                        records = [record for record in records if record is not None]
+                        if not records:
+                            st.warning("Select at least one assistant")
+                        else:
+                            self.answer_fan_out(records, query, selected_language)
+                        return
+
+                    file_id = selected.file_id if selected else None
+                    timestamp_index = self.timestamp_indexes.get(file_id)
+                    if timestamp_index is not None and self.snap_tolerance:
+                        # Move model timestamps onto real scene boundaries before linking them
+                        snap = lambda text: timestamp_index.snap_text(text, self.snap_tolerance)
+                        process = lambda text: self.process_segment(text, file_id, snap)
+                    else:
+                        process = lambda text: self.process_segment(text, file_id)
+                    labels = {"assistant": selected_assistant_name, "language": selected_language}
+                    process = TELEMETRY.timed("post_processing", process, **labels)
+
+                    # The answer language travels in the run instructions, not in the stored message
+                    content = query
+
+                    # Questions asked before any thread exists carry no context, so they can be shared;
+                    # suggestions are self-contained and pre-warmed, so they are looked up mid-thread too.
+                    # The local backend keeps its context in local_history instead of a thread
+                    cacheable = (
+                        self.answer_cache is not None and not lucky and not st.session_state.thread_id
+                        and not st.session_state.local_history
                     )
-                    
-                    # Wait for completion
-                    while True:
-                        run_status = self.client.beta.threads.runs.retrieve(
-                            thread_id=thread_id,
-                            run_id=run.id
-                        )
-                        if run_status.status == 'completed':
-                            break
-                        elif run_status.status in ['failed', 'cancelled', 'expired']:
-                            st.error(f"Run failed with status: {run_status.status}")
-                            return
-                    
-                    # Get all messages in the thread
-                    messages = self.client.beta.threads.messages.list(
-                        thread_id=thread_id
-                    )
-                    
-                    # Get file_id based on selected assistant
-                    file_ids = {
-                        "Honouring_Karpal_Singh": "920357"
-                    }
-                    file_id = file_ids.get(selected_assistant_name)
-                    
-                    # Display conversation history
-                    st.markdown("### Conversation:")
-
-                    
-                    # Then in the message display loop:
-                    for msg in messages.data:
-                        role = "🧑" if msg.role == "user" else "🤖"
-                        for content in msg.content:
-                            if content.type == 'text':
-                                # Clean source annotations first
-                                cleaned_content = self.clean_source_annotations(content.text.value)
-                                
-                                # Then process timestamps
-                                processed_content = self.process_message_content(
-                                    cleaned_content,
-                                    file_id
+                    cache_key = (self.ASSISTANT_ID, self.VECTOR_STORE_ID, selected_language, query)
+
+                    # "What happens at 00:12:30" and "when is X mentioned" need no retrieval run;
+                    # an exact local answer beats any cached one
+                    cached_answer = None
+                    answer_mode = "local"
+                    if timestamp_index is not None and not lucky:
+                        local_answer = timestamp_index.local_answer(query)
+                        if local_answer is not None:
+                            cached_answer = [self.process_segment(local_answer, file_id)]
+
+                    if cached_answer is None and (cacheable or (suggested and self.answer_cache is not None)):
+                        answer_mode = "cached"
+                        cached_answer = self.answer_cache.get(*cache_key)
+                        if cached_answer is None and self.answer_translator is not None:
+                            # The same question answered in another language, translated instead of run
+                            with TELEMETRY.span("answer_translation", **labels):
+                                cached_answer = self.answer_translator.lookup(*cache_key)
+                            answer_mode = "translated"
+
+                    if cached_answer is None and cacheable and self.single_flight is not None:
+                        # Another session may be running this very question right now
+                        flight_key = self.single_flight.key(*cache_key)
+                        flight, leader = self.single_flight.join(flight_key)
+                        if leader:
+                            self.leading_flight = (flight_key, flight)
+                        else:
+                            timer = ResponseTimer("coalesced")
+                            live_answer = self.live_slot.empty()
+                            with TELEMETRY.span("coalesced_wait", **labels):
+                                cached_answer = self.single_flight.wait(
+                                    flight,
+                                    lambda html: live_answer.markdown(
+                                        self.render_message_html("assistant", html), unsafe_allow_html=True
+                                    )
                                 )
+                            live_answer.empty()
+                            # None: the leader failed or gave up, so this session runs it after all
+                            answer_mode = "coalesced"
+
+                    if cached_answer is not None:
+                        if answer_mode != "coalesced":
+                            timer = ResponseTimer(answer_mode)
+                        conversation = self.get_conversation_cache(st.session_state.thread_id)
+                        conversation.add_local("user", [process(content)])
+                        conversation.add_local("assistant", cached_answer)
+                        self.save_history(conversation, language=selected_language)
+                        self.render_conversation(conversation, timer)
+                        timer.finish()
+                        self.log_latency(timer)
+                        st.session_state.conversation_active = True
+                        return
+
+                    if self.local_retriever is not None:
+                        self.answer_with_local_retrieval(
+                            content, process, selected.vector_store, selected_assistant_name, selected_language,
+                            file_id, cache_key if cacheable else None
+                        )
+                        return
+
+                    # Short lookups run on the fast model, analysis on the assistant's heavy one
+                    route_kwargs = {}
+                    if self.model_router is not None:
+                        labels["query_class"], labels["model"] = self.model_router.route(query)
+                        route_kwargs = self.model_router.run_kwargs(labels["model"])
+
+                    first_turn = not st.session_state.thread_id
+                    conversation = self.get_conversation_cache(st.session_state.thread_id)
+                    timer = ResponseTimer("stream" if self.stream_responses else "blocking", first_turn)
+                    vector_store_id = selected.vector_store
+                    if first_turn:
+                        # createAndRun makes the thread, posts the question and starts the run in one call
+                        thread_id = None
+                        after_message_id = None
+                        if ASSISTANT_INSTRUCTIONS.cached(self.ASSISTANT_ID) is None:
+                            # Once per assistant and process
+                            timer.count_calls()
+                        run_kwargs = first_turn_kwargs(
+                            ASSISTANT_INSTRUCTIONS.get(self.client, self.ASSISTANT_ID),
+                            self.ASSISTANT_ID,
+                            vector_store_id,
+                            selected_assistant_name,
+                            selected_language,
+                            content,
+                            **self.context_budget.run_kwargs(),
+                            **route_kwargs
+                        )
+                    else:
+                        # Add message to thread; it is cached right away so it is never fetched back
+                        thread_id = st.session_state.thread_id
+                        if superseded is not None:
+                            # The thread takes no message while the abandoned run is still active
+                            superseded.result()
+                        with TELEMETRY.span("message_post", **labels):
+                            message = self.client.beta.threads.messages.create(
+                                thread_id=thread_id,
+                                role="user",
+                                content=content
+                            )
+                        timer.count_calls()
+                        conversation.add_message(message, process)
+                        after_message_id = message.id
+                        # Only the last messages are sent, so later turns cost no more than early ones
+                        run_kwargs = turn_kwargs(
+                            self.ASSISTANT_ID,
+                            vector_store_id,
+                            selected_assistant_name,
+                            selected_language,
+                            **self.context_budget.run_kwargs(thread_id),
+                            **route_kwargs
+                        )
 
+                    outcome = None
+                    replies_fetched = False
+                    if self.stream_responses:
+                        live_answer = self.live_slot.empty()
+                        try:
+                            final_run = stream_run(
+                                self.client,
+                                live_answer,
+                                process,
+                                self.publish_progress,
+                                timer,
+                                thread_id=thread_id,
+                                **run_kwargs
+                            )
+                            outcome = RunOutcome(final_run, 0, timer.total)
+                            thread_id = final_run.thread_id
+                            TELEMETRY.observe("stream_first_token", timer.ttft, **labels)
+                            TELEMETRY.observe("stream", timer.total, **labels)
+                        except Exception as e:
+                            # Tokens already shown means the run exists, so don't start another one;
+                            # a blocking run would only hit the same rate limit
+                            if timer.first_token_at is not None or isinstance(e, RateLimitError):
+                                raise
+                            os.write(1, f"\nStreaming unavailable, falling back to blocking run: {e}\n".encode())
+                            timer = ResponseTimer("blocking", first_turn)
+                        # The full history below includes this answer
+                        live_answer.empty()
+
+                    if outcome is None:
+                        # Run in the background pool so a rerun can't orphan it
+                        job = self.run_pool.submit(current_session_id(), thread_id, after_message_id, **run_kwargs)
+                        st.session_state.pending_job = {
+                            "id": job.id,
+                            "file_id": file_id,
+                            "first_turn": first_turn,
+                            "cache_key": cache_key if cacheable else None,
+                            "labels": labels,
+                        }
+                        result = self.wait_for_job(job.id)
+                        st.session_state.pending_job = None
+                        outcome = result.outcome
+                        thread_id = result.thread_id
+                        TELEMETRY.observe_timings(result.timings, **labels)
+                        timer.count_calls(result.api_calls)
+                        conversation = self.get_conversation_cache(thread_id)
+                        for reply in result.replies:
+                            conversation.add_message(reply, process)
+                        replies_fetched = True
+
+                    st.session_state.thread_id = thread_id
+                    conversation = self.get_conversation_cache(thread_id)
+
+                    # Fetch and process only the messages after the cached ones
+                    if outcome.completed and not replies_fetched:
+                        with TELEMETRY.span("message_list", **labels):
+                            conversation.sync(self.client, process)
+                        timer.count_calls()
+
+                    self.complete_turn(
+                        conversation,
+                        outcome,
+                        process,
+                        timer,
+                        cache_key if cacheable else None,
+                        labels
+                    )
 
-                                
-                                st.markdown(f"""
-                                <div style='background-color:{"#f0f2f6" if msg.role == "user" else "#f8f9fa"}; 
-                                         padding:20px; 
-                                         border-radius:10px;
-                                         margin: 5px 0;'>
-                                    <strong>{role}</strong>: {processed_content}
-                                </div>
-                                """, unsafe_allow_html=True)
-                    
-                    # Mark conversation as active
-                    st.session_state.conversation_active = True
-
+                except RunWaitCancelled:
+                    # Nobody is left to show the answer to
+                    return
+                except RunWaitTimeout as e:
+                    st.error(f"Query timed out: {str(e)}")
+                except (RateLimitError, ServiceOverloaded):
+                    # Still limited after the rate limiter's retries
+                    st.warning(self.get_text("busy", selected_language))
                 except Exception as e:
                     st.error(f"Error processing query: {str(e)}")
+                finally:
+                    # Followers run the question themselves unless an answer was handed over
+                    self.end_flight()
+
+        elif st.session_state.pending_job:
+            # A rerun interrupted the last question; its run kept going in the pool
+            self.resume_pending_job(selected_language)
 
 if __name__ == "__main__":
-    app = AssistantUI()
+    # The context is cached, so reruns only rebuild the cheap per-session wrapper
+    app = AssistantUI(get_app_context())
     app.run()
@@ -0,0 +1,328 @@
+# app_context.py
+import os
+from types import MappingProxyType
+
+import httpx
+import streamlit as st
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from answer_cache import create_answer_cache
+from answer_translation import AnswerTranslator
+from assistant_catalog import AssistantCatalog
+from assistant_configs import BASE_INSTRUCTIONS
+from async_service import AsyncAssistantService
+from cassettes import CassetteRecorder, RecordingTransport
+from fan_out import FanOut
+from history_store import HistoryStore
+from model_router import ModelRouter
+from provisioning import AssistantProvisioner, AssistantRegistry
+from query_pipeline import ASSISTANT_INSTRUCTIONS
+from rate_limiter import RateLimitedTransport, RateLimiter
+from run_pool import RunPool
+from run_waiter import RunWaiter
+from single_flight import SingleFlight
+from telemetry import TELEMETRY
+from timestamp_index import TimestampIndexStore
+from token_budget import ContextBudget, TokenLedger
+from translations import CREATIVE_PROMPTS, TRANSLATIONS
+from warmup import SuggestionWarmer
+
+
+def current_session_id():
+    """ID of the browser session running this script, or None outside Streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+    except Exception:
+        return None
+
+
+def session_is_active(session_id: str = None) -> bool:
+    """Return False once the browser session (the current one by default) has gone away"""
+    try:
+        from streamlit.runtime import get_instance
+
+        session_id = session_id or current_session_id()
+        if session_id is None:
+            return True
+        return get_instance().is_active_session(session_id)
+    except Exception:
+        # Outside a Streamlit runtime there is no session to lose
+        return True
+
+
+class AppContext:
+    """Process-wide, read-only state shared by every Streamlit session
+
+    Anything that depends on the user (thread, selected assistant, language)
+    belongs in st.session_state instead.
+    """
+
+    def __init__(self, api_key: str, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, request_timeout: float = 60.0,
+                 run_timeout: float = 180.0, stream_responses: bool = True, answer_cache=None,
+                 warmup: bool = True, warmup_workers: int = 4, warmup_refresh_interval: float = 6 * 3600,
+                 warmup_active_window: float = 6 * 3600, warmup_max_assistants: int = 50,
+                 async_pipeline: bool = True, max_in_flight_runs: int = 32, max_queued_runs: int = 256,
+                 assistant_registry_path: str = "assistant_registry.json",
+                 assistant_catalog_path: str = "assistants.json", truncation_last_messages: int = 6,
+                 min_last_messages: int = 2, max_prompt_tokens: int = 0, thread_token_budget: int = 0,
+                 timestamp_index_dir: str = "timestamp_indexes", snap_tolerance: float = 0.0,
+                 retrieval_backend: str = "hosted", local_retrieval_dir: str = "retrieval_index",
+                 local_answer_model: str = "gpt-4o-mini", metrics_port: int = 0, json_logs: bool = False,
+                 requests_per_minute: float = 0, tokens_per_minute: float = 0, run_token_estimate: int = 4000,
+                 rate_limit_retries: int = 5, history_path: str = None, history_retention_days: float = 30,
+                 history_max_conversations: int = 20, fan_out_parallel: int = 8,
+                 record_cassette: str = None, answer_translation: bool = True,
+                 translation_model: str = "gpt-4o-mini", canonical_language: str = "English",
+                 single_flight: bool = True, model_routing: bool = False, fast_model: str = "gpt-4o-mini",
+                 heavy_model: str = None, factual_max_words: int = 14, fast_classes=("timestamp", "factual")):
+        # One RPM/TPM budget for every session, warm-up and batch job; it also retries 429s
+        self.rate_limiter = RateLimiter(
+            requests_per_minute,
+            tokens_per_minute,
+            run_tokens=run_token_estimate,
+            max_retries=rate_limit_retries
+        )
+        TELEMETRY.add_collector(self.rate_limiter.render)
+
+        # Every API interaction written to a cassette for benchmarks/fake_assistants_api.py to replay
+        self.recorder = CassetteRecorder(record_cassette) if record_cassette else None
+
+        # One pooled keep-alive HTTP client reused by every session and rerun
+        transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+        if self.recorder is not None:
+            transport = RecordingTransport(self.recorder, transport)
+        self.http_client = httpx.Client(
+            transport=RateLimitedTransport(self.rate_limiter, transport),
+            timeout=request_timeout
+        )
+        self.client = OpenAI(api_key=api_key, http_client=self.http_client)
+
+        # Backoff based waiter for run completion
+        self.run_waiter = RunWaiter(self.client, timeout=run_timeout)
+        self.stream_responses = stream_responses
+
+        # Event loop service for non-streamed runs, capping in-flight runs process-wide
+        self.async_service = None
+        if async_pipeline:
+            self.async_service = AsyncAssistantService(
+                api_key,
+                self.run_waiter,
+                max_in_flight=max_in_flight_runs,
+                max_queue=max_queued_runs,
+                deadline=run_timeout,
+                max_connections=max_connections,
+                rate_limiter=self.rate_limiter,
+                recorder=self.recorder
+            )
+
+        # Background runs that survive reruns, picked up again by job ID
+        self.run_pool = RunPool(
+            self.client,
+            self.run_waiter,
+            async_service=self.async_service,
+            is_session_active=session_is_active
+        )
+
+        # Assistants come from the declarative catalog file, with IDs from the local
+        # provisioning registry, so startup makes no API calls
+        self.assistant_registry = AssistantRegistry(assistant_registry_path)
+        self.provisioner = AssistantProvisioner(self.client, self.assistant_registry)
+        self.catalog = AssistantCatalog(assistant_catalog_path, registry=self.assistant_registry)
+        # Provisioned assistants run the instructions we sent, so first turns need not fetch them
+        for assistant_id, instructions in self.provisioner.current_instructions(
+            self.catalog.configs(), BASE_INSTRUCTIONS
+        ).items():
+            ASSISTANT_INSTRUCTIONS.remember(assistant_id, instructions)
+
+        # Token usage of every run and the context limits applied to the next one
+        self.token_ledger = TokenLedger(rate_limiter=self.rate_limiter)
+        self.context_budget = ContextBudget(
+            self.token_ledger,
+            last_messages=truncation_last_messages,
+            min_last_messages=min_last_messages,
+            max_prompt_tokens=max_prompt_tokens,
+            thread_token_budget=thread_token_budget
+        )
+
+        # Offline transcript indexes per file_id; snapping is off at tolerance 0
+        self.timestamp_indexes = TimestampIndexStore(timestamp_index_dir)
+        self.snap_tolerance = snap_tolerance
+
+        # Local BM25 + dense retrieval answered by a chat completion instead of
+        # the hosted vector store; None on the default hosted backend
+        self.local_retriever = None
+        self.local_answer_model = local_answer_model
+
+        # Spans of every query; /metrics only when a port is given
+        TELEMETRY.configure(json_logs=json_logs)
+        if metrics_port:
+            TELEMETRY.serve(metrics_port)
+        if retrieval_backend == "local":
+            # NumPy is only needed for this backend
+            from local_retrieval import LocalRetriever
+
+            self.local_retriever = LocalRetriever(local_retrieval_dir, self.client)
+
+        # Conversations per user for resuming after a refresh or restart, None when disabled
+        self.history_store = None
+        if history_path:
+            self.history_store = HistoryStore(
+                history_path,
+                retention_days=history_retention_days,
+                max_conversations=history_max_conversations
+            )
+
+        # Shared answers for context-free questions, None when disabled
+        self.answer_cache = answer_cache
+
+        # Per-query choice between a fast model and the assistant's heavy one, None when disabled
+        self.model_router = None
+        if model_routing:
+            self.model_router = ModelRouter(
+                fast_model=fast_model,
+                heavy_model=heavy_model,
+                factual_max_words=factual_max_words,
+                fast_classes=fast_classes
+            )
+            TELEMETRY.add_collector(self.model_router.render)
+
+        # Identical context-free questions asked at the same time share one run, None when disabled
+        self.single_flight = None
+        if single_flight:
+            self.single_flight = SingleFlight(timeout=run_timeout)
+            TELEMETRY.add_collector(self.single_flight.render)
+
+        # One question to many assistants at once, each on its own thread
+        self.fan_out = FanOut(
+            self.client,
+            self.run_waiter,
+            async_service=self.async_service,
+            answer_cache=answer_cache,
+            max_parallel=fan_out_parallel
+        )
+
+        self.translations = MappingProxyType(TRANSLATIONS)
+        self.creative_prompts = MappingProxyType(CREATIVE_PROMPTS)
+
+        # Cached answers reused across UI languages by translating them; needs the answer cache
+        self.answer_translator = None
+        if answer_translation and answer_cache is not None:
+            self.answer_translator = AnswerTranslator(
+                self.client,
+                answer_cache,
+                self.translations,
+                model=translation_model,
+                canonical_language=canonical_language
+            )
+            TELEMETRY.add_collector(self.answer_translator.render)
+
+        # Background answers for the suggestion buttons; needs the answer cache
+        self.warmer = None
+        if warmup and answer_cache is not None:
+            self.warmer = SuggestionWarmer(
+                self.client,
+                self.run_waiter,
+                answer_cache,
+                self.translations,
+                translator=self.answer_translator,
+                max_workers=warmup_workers,
+                refresh_interval=warmup_refresh_interval,
+                active_window=warmup_active_window,
+                max_assistants=warmup_max_assistants
+            )
+
+
+def env_flag(name: str, default: str) -> bool:
+    """Read a true/false setting from the environment"""
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+def build_context(**overrides) -> AppContext:
+    """Load .env and build the shared context; usable without Streamlit
+
+    overrides take precedence over the environment, e.g. history_path=None
+    and warmup=False for a caller that needs neither.
+    """
+    load_dotenv()
+
+    # Load and validate OpenAI API key
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment variables. Please ensure your .env file contains this key.")
+
+    settings = dict(
+        max_connections=int(os.getenv('OPENAI_MAX_CONNECTIONS', '100')),
+        max_keepalive_connections=int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '20')),
+        keepalive_expiry=float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '30')),
+        request_timeout=float(os.getenv('OPENAI_REQUEST_TIMEOUT', '60')),
+        run_timeout=float(os.getenv('RUN_TIMEOUT_SECONDS', '180')),
+        stream_responses=env_flag('STREAM_RESPONSES', 'true'),
+        warmup=env_flag('WARMUP_SUGGESTIONS', 'true'),
+        warmup_workers=int(os.getenv('WARMUP_WORKERS', '4')),
+        warmup_refresh_interval=float(os.getenv('WARMUP_REFRESH_SECONDS', '21600')),
+        warmup_active_window=float(os.getenv('WARMUP_ACTIVE_SECONDS', '21600')),
+        warmup_max_assistants=int(os.getenv('WARMUP_MAX_ASSISTANTS', '50')),
+        async_pipeline=env_flag('ASYNC_PIPELINE', 'true'),
+        max_in_flight_runs=int(os.getenv('MAX_IN_FLIGHT_RUNS', '32')),
+        max_queued_runs=int(os.getenv('MAX_QUEUED_RUNS', '256')),
+        assistant_registry_path=os.getenv('ASSISTANT_REGISTRY_PATH', 'assistant_registry.json'),
+        assistant_catalog_path=os.getenv('ASSISTANT_CATALOG_PATH', 'assistants.json'),
+        truncation_last_messages=int(os.getenv('TRUNCATION_LAST_MESSAGES', '6')),
+        min_last_messages=int(os.getenv('MIN_LAST_MESSAGES', '2')),
+        max_prompt_tokens=int(os.getenv('MAX_PROMPT_TOKENS', '0')),
+        thread_token_budget=int(os.getenv('THREAD_TOKEN_BUDGET', '60000')),
+        timestamp_index_dir=os.getenv('TIMESTAMP_INDEX_DIR', 'timestamp_indexes'),
+        snap_tolerance=float(os.getenv('SNAP_TIMESTAMPS_SECONDS', '0')),
+        retrieval_backend=os.getenv('RETRIEVAL_BACKEND', 'hosted'),
+        local_retrieval_dir=os.getenv('LOCAL_RETRIEVAL_DIR', 'retrieval_index'),
+        local_answer_model=os.getenv('LOCAL_ANSWER_MODEL', 'gpt-4o-mini'),
+        metrics_port=int(os.getenv('METRICS_PORT', '0')),
+        json_logs=env_flag('METRICS_JSON_LOGS', 'false'),
+        requests_per_minute=float(os.getenv('OPENAI_RPM_LIMIT', '0')),
+        tokens_per_minute=float(os.getenv('OPENAI_TPM_LIMIT', '0')),
+        run_token_estimate=int(os.getenv('RATE_LIMIT_RUN_TOKENS', '4000')),
+        rate_limit_retries=int(os.getenv('RATE_LIMIT_MAX_RETRIES', '5')),
+        history_path=os.getenv('HISTORY_DB_PATH', 'history.sqlite3') if env_flag('HISTORY_STORE', 'true') else None,
+        history_retention_days=float(os.getenv('HISTORY_RETENTION_DAYS', '30')),
+        history_max_conversations=int(os.getenv('HISTORY_MAX_CONVERSATIONS', '20')),
+        fan_out_parallel=int(os.getenv('FAN_OUT_MAX_PARALLEL', '8')),
+        record_cassette=os.getenv('OPENAI_RECORD_CASSETTE') or None,
+        answer_translation=env_flag('ANSWER_TRANSLATION', 'true'),
+        translation_model=os.getenv('ANSWER_TRANSLATION_MODEL', 'gpt-4o-mini'),
+        canonical_language=os.getenv('CANONICAL_LANGUAGE', 'English'),
+        single_flight=env_flag('SINGLE_FLIGHT', 'true'),
+        model_routing=env_flag('MODEL_ROUTING', 'false'),
+        fast_model=os.getenv('ROUTER_FAST_MODEL', 'gpt-4o-mini'),
+        heavy_model=os.getenv('ROUTER_HEAVY_MODEL') or None,
+        factual_max_words=int(os.getenv('ROUTER_FACTUAL_MAX_WORDS', '14')),
+        fast_classes=tuple(os.getenv('ROUTER_FAST_CLASSES', 'timestamp,factual').split(','))
+    )
+    if 'answer_cache' not in overrides:
+        # Only opened when the caller wants one; the sqlite backend creates its file
+        settings['answer_cache'] = create_answer_cache(
+            backend=os.getenv('ANSWER_CACHE_BACKEND', 'memory'),
+            path=os.getenv('ANSWER_CACHE_PATH', 'answer_cache.sqlite3'),
+            max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '1000')),
+            ttl=float(os.getenv('ANSWER_CACHE_TTL_SECONDS', '86400')),
+            semantic=env_flag('ANSWER_CACHE_SEMANTIC', 'false'),
+            similarity_threshold=float(os.getenv('ANSWER_CACHE_SIMILARITY', '0.9'))
+        )
+    settings.update(overrides)
+    return AppContext(api_key, **settings)
+
+
+@st.cache_resource
+def get_app_context() -> AppContext:
+    """Build the shared context once per process instead of on every rerun"""
+    return build_context()
@@ -0,0 +1,157 @@
+# assistant_catalog.py
+import json
+import os
+import threading
+import time
+
+
+class AssistantRecord:
+    """Everything the app knows about one video assistant"""
+
+    __slots__ = ("key", "name", "assistant_id", "vector_store", "file_id", "description_url",
+                 "model", "tools", "additional_instructions", "search_text")
+
+    def __init__(self, key: str, name: str, vector_store: str, assistant_id: str = None, file_id: str = None,
+                 description_url: str = "", model: str = "gpt-4-turbo-preview", tools=None,
+                 additional_instructions: str = ""):
+        self.key = key
+        self.name = name
+        self.assistant_id = assistant_id
+        self.vector_store = vector_store
+        self.file_id = file_id
+        self.description_url = description_url
+        self.model = model
+        self.tools = tools if tools is not None else [{"type": "retrieval"}]
+        self.additional_instructions = additional_instructions
+        # Lowercased once so filtering the selector is a substring test per record
+        self.search_text = f"{key} {name}".replace("_", " ").lower()
+
+    def config(self) -> dict:
+        """Provisioning config in the shape AssistantProvisioner expects"""
+        return {
+            "name": self.name,
+            "vector_store": self.vector_store,
+            "model": self.model,
+            "tools": self.tools,
+            "additional_instructions": self.additional_instructions,
+        }
+
+
+def read_catalog_file(path: str) -> list:
+    """Assistant entries from a JSON or, when PyYAML is installed, YAML file"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    entries = data.get("assistants", []) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must hold a list of assistants")
+    return entries
+
+
+class AssistantCatalog:
+    """Assistant records loaded from one declarative file, indexed by key
+
+    Lookups are dictionary reads on an immutable snapshot. refresh() is cheap
+    enough to call on every rerun: it stats the file at most every
+    check_interval seconds and swaps in a new snapshot when it has changed.
+    IDs written by provisioning take precedence over the ones in the file.
+    """
+
+    def __init__(self, path: str, registry=None, check_interval: float = 2.0):
+        self.path = path
+        self.registry = registry
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._mtime = None
+        self._records = {}
+        self._keys = ()
+        self.stats = {"loads": 0, "reload_errors": 0}
+        self.reload(strict=True)
+
+    def reload(self, strict: bool = False) -> bool:
+        """Read the file now; a broken file keeps the previous snapshot unless strict"""
+        mtime = None
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            entries = read_catalog_file(self.path)
+            records = {}
+            for entry in entries:
+                record = AssistantRecord(**entry)
+                if record.key in records:
+                    raise ValueError(f"Duplicate assistant key {record.key}")
+                records[record.key] = record
+        except Exception as e:
+            if strict:
+                raise
+            with self._lock:
+                self.stats["reload_errors"] += 1
+                # Don't retry a broken file until it changes again
+                if mtime is not None:
+                    self._mtime = mtime
+            os.write(1, f"\nKeeping previous assistant catalog, {self.path} failed to load: {e}\n".encode())
+            return False
+
+        if self.registry is not None:
+            for key, assistant_id in self.registry.assistant_ids().items():
+                if key in records:
+                    records[key].assistant_id = assistant_id
+
+        with self._lock:
+            self._records = records
+            self._keys = tuple(records)
+            self._mtime = mtime
+            self._checked = time.monotonic()
+            self.stats["loads"] += 1
+        return True
+
+    def refresh(self) -> bool:
+        """Reload if the file changed since the last load; True when a new catalog was loaded"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return False
+            self._checked = now
+            known_mtime = self._mtime
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == known_mtime:
+            return False
+        return self.reload()
+
+    def get(self, key: str) -> AssistantRecord:
+        return self._records.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def keys(self) -> tuple:
+        """Assistant keys in file order"""
+        return self._keys
+
+    def search(self, text: str) -> list:
+        """Keys whose key or name contains every word of text"""
+        words = text.lower().replace("_", " ").split()
+        # One snapshot read, so a concurrent reload can't mix two catalogs
+        records = self._records
+        return [key for key, record in records.items() if all(word in record.search_text for word in words)]
+
+    def configs(self) -> dict:
+        """Provisioning configs of every assistant"""
+        return {key: record.config() for key, record in self._records.items()}
+
+
+def page_of(keys: list, page: int, page_size: int):
+    """Slice one page out of keys; returns (page_keys, page, page_count) with page clamped"""
+    page_count = max(1, -(-len(keys) // page_size))
+    page = min(max(page, 0), page_count - 1)
+    return keys[page * page_size:(page + 1) * page_size], page, page_count
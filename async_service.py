@@ -0,0 +1,210 @@
+# async_service.py
+import asyncio
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from cassettes import AsyncRecordingTransport
+from query_pipeline import ASSISTANT_INSTRUCTIONS, first_turn_kwargs
+from rate_limiter import AsyncRateLimitedTransport, current_priority, request_priority
+from run_waiter import RunWaitTimeout
+from text_processing import process_text
+
+
+class ServiceOverloaded(Exception):
+    """Raised when the wait queue is full and a request is turned away"""
+
+
+class TurnResult:
+    """Outcome of one question: the run outcome and the new reply messages"""
+
+    def __init__(self, thread_id: str, outcome, replies, queued: float, elapsed: float, api_calls: int = 0,
+                 timings: dict = None):
+        self.thread_id = thread_id
+        self.outcome = outcome
+        self.replies = replies
+        self.queued = queued
+        self.elapsed = elapsed
+        # Requests made for the turn: run creation, status polls and the reply listing
+        self.api_calls = api_calls
+        # Seconds spent per step, e.g. run_create and message_list, for telemetry
+        self.timings = timings or {}
+        # Processed answer blocks, filled in by ask()
+        self.answer = None
+
+
+class AsyncAssistantService:
+    """Assistants API calls on one asyncio loop shared by every session
+
+    All requests run on a single background event loop with an AsyncOpenAI
+    client, so an in-progress run costs a coroutine rather than a blocked
+    thread. At most max_in_flight turns talk to the API at once; up to
+    max_queue more wait for a slot and anything beyond that is rejected with
+    ServiceOverloaded. Every turn has a deadline that covers its queue time.
+    """
+
+    def __init__(self, api_key: str, run_waiter, max_in_flight: int = 32, max_queue: int = 256,
+                 deadline: float = 180.0, base_url: str = None, max_connections: int = 100, rate_limiter=None,
+                 recorder=None):
+        self.run_waiter = run_waiter
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.deadline = deadline
+
+        self._lock = threading.Lock()
+        self.stats = {"in_flight": 0, "queued": 0, "completed": 0, "failed": 0,
+                      "rejected": 0, "timeouts": 0, "max_in_flight_seen": 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="assistant-service", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            # Loop-bound objects have to be created on the loop that uses them
+            self._slots = asyncio.Semaphore(max_in_flight)
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+            if recorder is not None:
+                transport = AsyncRecordingTransport(recorder, transport)
+            if rate_limiter is not None:
+                transport = AsyncRateLimitedTransport(rate_limiter, transport)
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=httpx.AsyncClient(transport=transport)
+            )
+
+        asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    def _adjust(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+            if key == "in_flight":
+                self.stats["max_in_flight_seen"] = max(self.stats["max_in_flight_seen"], self.stats["in_flight"])
+
+    async def _admitted(self, work, deadline: float, priority: int):
+        """Wait for a slot, then run work(); the deadline covers both"""
+        with self._lock:
+            if self.stats["queued"] >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise ServiceOverloaded(f"{self.stats['queued']} requests already waiting")
+            self.stats["queued"] += 1
+
+        try:
+            # Each task has its own context, so the priority only applies to this turn's requests
+            with request_priority(priority):
+                return await asyncio.wait_for(self._in_slot(work, time.monotonic()), deadline)
+        except asyncio.TimeoutError:
+            self._adjust("timeouts")
+            raise RunWaitTimeout(f"Request missed its {deadline:.0f}s deadline")
+
+    async def _in_slot(self, work, enqueued: float):
+        try:
+            await self._slots.acquire()
+        finally:
+            self._adjust("queued", -1)
+        self._adjust("in_flight")
+        try:
+            return await work(time.monotonic() - enqueued)
+        finally:
+            self._adjust("in_flight", -1)
+            self._slots.release()
+
+    def submit(self, work, deadline: float = None, priority: int = None):
+        """Schedule work(queued_seconds) from any thread; returns a concurrent.futures.Future
+
+        Requests inherit the caller's request priority unless one is given.
+        """
+        coro = self._admitted(
+            work,
+            deadline if deadline is not None else self.deadline,
+            current_priority() if priority is None else priority
+        )
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _run_turn(self, thread_id: str, after_message_id: str, run_kwargs: dict, queued: float,
+                        on_created=None) -> TurnResult:
+        started = time.monotonic()
+        timings = {}
+        try:
+            step = time.monotonic()
+            if thread_id is None:
+                # First turn: the thread, its messages and the run come from one createAndRun call
+                run = await self.client.beta.threads.create_and_run(**run_kwargs)
+                thread_id = run.thread_id
+                timings["thread_create_and_run"] = time.monotonic() - step
+            else:
+                run = await self.client.beta.threads.runs.create(thread_id=thread_id, **run_kwargs)
+                timings["run_create"] = time.monotonic() - step
+            if on_created is not None:
+                on_created(run)
+            step = time.monotonic()
+            outcome = await self.run_waiter.wait_async(self.client, thread_id, run.id)
+            timings["run_wait"] = time.monotonic() - step
+            api_calls = 1 + outcome.polls
+            replies = []
+            if outcome.completed:
+                params = {"thread_id": thread_id, "order": "asc"}
+                if after_message_id:
+                    params["after"] = after_message_id
+                api_calls += 1
+                step = time.monotonic()
+                # Iterating the paginator follows the cursor across pages
+                async for message in self.client.beta.threads.messages.list(**params):
+                    replies.append(message)
+                timings["message_list"] = time.monotonic() - step
+        except Exception:
+            self._adjust("failed")
+            raise
+        self._adjust("completed")
+        return TurnResult(thread_id, outcome, replies, queued, time.monotonic() - started, api_calls, timings)
+
+    def run_turn(self, thread_id: str, after_message_id: str, deadline: float = None, on_created=None, **run_kwargs):
+        """Run the assistant on a thread whose user message is already posted
+
+        Returns a Future of TurnResult whose replies are the messages after
+        after_message_id. Without a thread_id the run_kwargs are createAndRun
+        arguments and the replies include the question. on_created is called
+        with the run as soon as it exists.
+        """
+        return self.submit(
+            lambda queued: self._run_turn(thread_id, after_message_id, run_kwargs, queued, on_created),
+            deadline
+        )
+
+    async def _ask(self, assistant_id: str, vector_store_id: str, assistant_name: str, file_id: str,
+                   language: str, query: str, queued: float):
+        base_instructions = await ASSISTANT_INSTRUCTIONS.get_async(self.client, assistant_id)
+        result = await self._run_turn(
+            None,
+            None,
+            first_turn_kwargs(base_instructions, assistant_id, vector_store_id, assistant_name, language, query),
+            queued
+        )
+        if not result.outcome.completed:
+            raise RuntimeError(f"Run failed with status: {result.outcome.status} ({result.outcome.reason})")
+        result.answer = [
+            process_text(content.text.value, file_id)
+            for reply in result.replies if reply.role == "assistant"
+            for content in reply.content if content.type == 'text'
+        ]
+        return result
+
+    def ask(self, assistant_id: str, vector_store_id: str, assistant_name: str, file_id: str,
+            language: str, query: str, deadline: float = None, priority: int = None):
+        """Ask one question on a fresh thread; the Future's result has a processed .answer"""
+        return self.submit(
+            lambda queued: self._ask(assistant_id, vector_store_id, assistant_name, file_id, language, query, queued),
+            deadline,
+            priority
+        )
+
+    def close(self):
+        async def shutdown():
+            await self.client.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -0,0 +1,211 @@
+# batch_qa.py
+# Headless batch entry point: questions from JSONL go through the same
+# assistant catalog, run instructions and post-processing as the UI. The output
+# JSONL doubles as the checkpoint, so rerunning the same command skips every
+# question that already has an "ok" result.
+#
+#     python batch_qa.py questions.jsonl answers.jsonl --workers 8 --rpm 300
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from app_context import build_context
+from query_pipeline import answer_once
+from rate_limiter import BATCH, request_priority
+from streaming import percentile
+from token_budget import run_usage
+
+
+def question_id(item: dict) -> str:
+    """The item's own id, or a stable hash of what is being asked"""
+    if item.get("id") is not None:
+        return str(item["id"])
+    key = json.dumps([item["question"], item.get("assistant"), item.get("language")], ensure_ascii=False)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def read_jsonl(path: str) -> list:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                # A line cut short by an interrupted write is simply asked again
+                print(f"{path}:{number}: skipping unreadable line ({e})", file=sys.stderr)
+    return items
+
+
+def completed_ids(path: str) -> set:
+    """IDs that already have a successful answer in the output file"""
+    if not os.path.exists(path):
+        return set()
+    return {record["id"] for record in read_jsonl(path) if record.get("status") == "ok"}
+
+
+def build_batch_context(requests_per_minute: float = None, tokens_per_minute: float = None):
+    """The shared context without the UI-only services: no history, answer cache or warm-up
+
+    API requests still go through the shared rate limiter; limits given here
+    replace OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT.
+    """
+    overrides = dict(history_path=None, answer_cache=None, warmup=False, single_flight=False, model_routing=False)
+    if requests_per_minute is not None:
+        overrides["requests_per_minute"] = requests_per_minute
+    if tokens_per_minute is not None:
+        overrides["tokens_per_minute"] = tokens_per_minute
+    return build_context(**overrides)
+
+
+class BatchRunner:
+    """Submit questions with bounded parallelism and append results as they finish"""
+
+    def __init__(self, context, workers: int = 4, default_assistant: str = None, default_language: str = "English"):
+        self.context = context
+        self.workers = workers
+        self.default_assistant = default_assistant or context.catalog.keys()[0]
+        self.default_language = default_language
+        self.stop = threading.Event()
+        self._executor = None
+        if context.async_service is None:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+    def _answer_sync(self, record, item):
+        started = time.monotonic()
+        # Interactive users of the same process go first
+        with request_priority(BATCH):
+            blocks = answer_once(
+                self.context.client, self.context.run_waiter, record.assistant_id, record.vector_store,
+                record.key, record.file_id, item.get("language") or self.default_language, item["question"],
+                should_cancel=self.stop.is_set
+            )
+        return {"answer": blocks, "elapsed": time.monotonic() - started}
+
+    def submit(self, item: dict):
+        """Start one question; returns a Future of the partial result record"""
+        record = self.context.catalog.get(item.get("assistant") or self.default_assistant)
+        if record is None:
+            raise KeyError(f"Unknown assistant {item.get('assistant')}")
+        language = item.get("language") or self.default_language
+        if self._executor is not None:
+            return self._executor.submit(self._answer_sync, record, item)
+        return self.context.async_service.ask(
+            record.assistant_id, record.vector_store, record.key, record.file_id, language, item["question"],
+            priority=BATCH
+        )
+
+    @staticmethod
+    def result_record(item: dict, future, submitted: float) -> dict:
+        record = {
+            "id": question_id(item),
+            "question": item["question"],
+            "assistant": item.get("assistant"),
+            "language": item.get("language"),
+            "latency": round(time.monotonic() - submitted, 3),
+        }
+        try:
+            result = future.result()
+        except Exception as e:
+            record.update(status="error", error=f"{type(e).__name__}: {e}")
+            return record
+        if isinstance(result, dict):
+            record.update(status="ok", answer="\n".join(result["answer"]), elapsed=round(result["elapsed"], 3))
+            return record
+        usage = run_usage(result.outcome.run)
+        record.update(
+            status="ok",
+            answer="\n".join(result.answer),
+            thread_id=result.thread_id,
+            elapsed=round(result.elapsed, 3),
+            queued=round(result.queued, 3),
+            api_calls=result.api_calls,
+            prompt_tokens=usage[0] if usage else None,
+            completion_tokens=usage[1] if usage else None,
+        )
+        return record
+
+    def run(self, items, output_path: str) -> list:
+        """Answer every item, appending to output_path; returns the new result records"""
+        pending, records = {}, []
+        items = iter(items)
+        with open(output_path, "a", encoding="utf-8") as out:
+            def drain(block: bool):
+                done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item, submitted = pending.pop(future)
+                    result = self.result_record(item, future, submitted)
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    # Flushed per line so an interrupted job loses at most the answers in flight
+                    out.flush()
+                    records.append(result)
+                    status = result["status"] if result["status"] == "ok" else f"error: {result['error']}"
+                    print(f"[{len(records)}] {result['id']} {result['latency']:.1f}s {status}", file=sys.stderr)
+
+            try:
+                for item in items:
+                    while len(pending) >= self.workers:
+                        drain(block=True)
+                    if self.stop.is_set():
+                        break
+                    try:
+                        future = self.submit(item)
+                    except KeyError as e:
+                        # Recorded like any other failure instead of ending the job
+                        future = Future()
+                        future.set_exception(e)
+                    pending[future] = (item, time.monotonic())
+                    drain(block=False)
+                while pending:
+                    drain(block=True)
+            except KeyboardInterrupt:
+                self.stop.set()
+                for future in pending:
+                    future.cancel()
+                print("\nInterrupted; rerun the same command to resume", file=sys.stderr)
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the video assistants")
+    parser.add_argument("input", help="JSONL with a \"question\" per line")
+    parser.add_argument("output", help="JSONL of answers; also the checkpoint for resuming")
+    parser.add_argument("--workers", type=int, default=4, help="questions in flight at once")
+    parser.add_argument("--rpm", type=float, help="API requests per minute for this job (default OPENAI_RPM_LIMIT)")
+    parser.add_argument("--tpm", type=float, help="API tokens per minute for this job (default OPENAI_TPM_LIMIT)")
+    parser.add_argument("--assistant", help="catalog key used when a line names none")
+    parser.add_argument("--language", default="English", help="answer language when a line names none")
+    args = parser.parse_args()
+
+    items = [item for item in read_jsonl(args.input) if item.get("question")]
+    done = completed_ids(args.output)
+    todo = [item for item in items if question_id(item) not in done]
+    print(f"{len(items)} questions, {len(items) - len(todo)} already answered, {len(todo)} to go", file=sys.stderr)
+
+    context = build_batch_context(args.rpm, args.tpm)
+    runner = BatchRunner(context, args.workers, args.assistant, args.language)
+    started = time.monotonic()
+    records = runner.run(todo, args.output)
+    wall = time.monotonic() - started
+
+    ok = [r for r in records if r["status"] == "ok"]
+    latencies = [r["latency"] for r in ok]
+    print(
+        f"\n{len(ok)} answered, {len(records) - len(ok)} failed in {wall:.1f}s: "
+        f"{len(ok) / wall * 60 if wall else 0.0:.1f} questions/min; latency "
+        f"p50={percentile(latencies, 50):.1f}s p95={percentile(latencies, 95):.1f}s",
+        file=sys.stderr
+    )
+    if context.async_service is not None:
+        context.async_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/bench_query_path.py
+"""Headless benchmark of the whole query path against the fake Assistants API
+
+Each simulated conversation is a fresh Streamlit session of app.py driven
+with streamlit.testing.v1.AppTest: every turn types the question into the
+search box and clicks Ask, so the timings cover AssistantUI's own code
+(first turn through createAndRun, follow-ups, run waiting, message sync,
+post-processing and the message list payload). Runs use the blocking path;
+the fake API does not stream. The answer cache, single flight, history and
+warm-up are switched off so every turn reaches the API.
+
+The fake server runs in its own process, so the CPU time reported per turn
+is the app's alone; API calls per turn come from the server's /_stats.
+Per kind of turn and per query class it reports p50/p95/p99 latency, API
+calls and CPU. --route on turns on the app's model routing; --route ab runs
+the same conversations without and with it and prints both. --check
+compares the report against the stored baseline and exits non-zero when a
+metric is worse by more than --tolerance; --update-baseline stores the
+current report instead.
+
+The committed baseline replays benchmarks/cassettes/query_path.jsonl.
+Run from the repository root:
+    python benchmarks/bench_query_path.py --cassette benchmarks/cassettes/query_path.jsonl --check
+    python benchmarks/bench_query_path.py --cassette benchmarks/cassettes/query_path.jsonl --update-baseline
+    python benchmarks/bench_query_path.py --route ab --model-speed gpt-4o-mini=0.4
+Record a new cassette by running the app (or this script against the real
+API) with OPENAI_RECORD_CASSETTE=path.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+import app_context
+from model_router import classify
+from streaming import percentile
+from translations import TRANSLATIONS
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline_query_path.json")
+FAKE_SERVER = os.path.join(ROOT, "benchmarks", "fake_assistants_api.py")
+QUESTIONS = (
+    "What are the key digital initiatives?",
+    "When is broadband for rural areas mentioned?",
+    "What does the minister say about cyber security talent?",
+    "Summarise the part about data centre investment",
+    "What happens at 00:12:30?",
+    "Why does the minister link 5G rollout to rural schools, and how does that compare with the data centre plans?",
+)
+# Absolute slack on top of the relative tolerance, so small values and Streamlit's rerun overhead don't flap
+SLACK = {"p50": 0.15, "p95": 0.3, "p99": 0.5, "api_calls": 0.3, "cpu_ms": 30.0}
+# p95/p99 of fewer turns are the slowest one or two and too noisy to gate on
+TAIL_MIN_TURNS = 40
+
+
+class FakeServer:
+    """benchmarks/fake_assistants_api.py in a child process"""
+
+    def __init__(self, args):
+        command = [
+            sys.executable, FAKE_SERVER, "--port", "0",
+            "--request-latency", str(args.request_latency), "--run-latency", str(args.run_latency),
+            "--run-jitter", str(args.run_jitter), "--seed", str(args.seed), "--model-speed", args.model_speed,
+        ]
+        if args.cassette:
+            command += ["--cassette", args.cassette]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if "listening on" not in line:
+            self.process.kill()
+            raise RuntimeError(f"fake server did not start: {line!r}")
+        self.base_url = line.rsplit(" ", 1)[-1].strip()
+
+    def requests(self) -> int:
+        with urlopen(f"{self.base_url}/_stats") as response:
+            return json.load(response)["requests"]
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Turn:
+    """Requests and app CPU of one turn"""
+
+    def __init__(self, server: FakeServer):
+        self.server = server
+
+    def __enter__(self):
+        self.requests = self.server.requests()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.wall
+        self.cpu_ms = (time.process_time() - self.cpu) * 1000
+        self.api_calls = self.server.requests() - self.requests
+
+
+def conversation(server: FakeServer, turns: int, factual_max_words: int, samples: dict, index: int):
+    """One session of `turns` questions through the UI, recording each turn into samples"""
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    # The first script run renders the page without touching the API
+    at.run()
+    ask = TRANSLATIONS["English"]["ask_button"]
+    for number in range(turns):
+        question = QUESTIONS[(index + number) % len(QUESTIONS)]
+        kind = "first_turn" if number == 0 else "follow_up"
+        at.text_input(key="search_box").input(question)
+        button = next(button for button in at.button if button.label == ask)
+        with Turn(server) as turn:
+            button.click().run()
+        failures = [element.value for element in list(at.exception) + list(at.error)]
+        if failures:
+            raise RuntimeError(f"turn failed: {failures[0]}")
+        samples.setdefault(kind, []).append(turn)
+        # Classified either way so both arms of an A/B run report the same classes
+        samples.setdefault(f"class/{classify(question, factual_max_words)}", []).append(turn)
+
+
+def report(samples: dict) -> dict:
+    result = {}
+    for kind, turns in samples.items():
+        latencies = [turn.elapsed for turn in turns]
+        result[kind] = {
+            "turns": len(turns),
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "api_calls": round(sum(turn.api_calls for turn in turns) / len(turns), 2),
+            "cpu_ms": round(sum(turn.cpu_ms for turn in turns) / len(turns), 3),
+        }
+    return result
+
+
+def regressions(current: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics worse than baseline * (1 + tolerance) plus slack"""
+    worse = []
+    for kind, metrics in baseline.items():
+        for metric, slack in SLACK.items():
+            if kind not in current or metric not in metrics:
+                continue
+            if metric in ("p95", "p99") and metrics["turns"] < TAIL_MIN_TURNS:
+                continue
+            limit = metrics[metric] * (1 + tolerance) + slack
+            if current[kind][metric] > limit:
+                worse.append(f"{kind}.{metric}: {current[kind][metric]} > {limit:.4f} (baseline {metrics[metric]})")
+    return worse
+
+
+def run_benchmark(args, routed: bool = False) -> dict:
+    """Drive the conversations against a fresh fake server; returns the report"""
+    server = FakeServer(args)
+    registry = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    registry.close()
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": server.base_url,
+        "ASSISTANT_REGISTRY_PATH": registry.name,
+        "STREAM_RESPONSES": "false",
+        "ANSWER_CACHE_BACKEND": "off",
+        "SINGLE_FLIGHT": "false",
+        "HISTORY_STORE": "false",
+        "WARMUP_SUGGESTIONS": "false",
+        "MODEL_ROUTING": "true" if routed else "false",
+        "ROUTER_FAST_MODEL": args.fast_model,
+        "ROUTER_FACTUAL_MAX_WORDS": str(args.factual_max_words),
+    })
+    # A context built for another server or arm must not be reused
+    app_context.get_app_context.clear()
+    # The run waiter's backoff jitter; unseeded, a turn can move by a whole poll interval between runs
+    random.seed(args.seed)
+    samples = {}
+    try:
+        for index in range(args.conversations):
+            conversation(server, args.turns, args.factual_max_words, samples, index)
+    finally:
+        server.close()
+        os.unlink(registry.name)
+    return report(samples)
+
+
+def print_report(report: dict):
+    for kind, metrics in report.items():
+        print(f"{kind:<20} turns={metrics['turns']:<4} p50={metrics['p50']:.3f}s p95={metrics['p95']:.3f}s "
+              f"p99={metrics['p99']:.3f}s api_calls={metrics['api_calls']:.2f} cpu={metrics['cpu_ms']:.2f}ms")
+
+
+def settings(args) -> dict:
+    """What a baseline is only comparable under"""
+    return {name: getattr(args, name) for name in (
+        "conversations", "turns", "request_latency", "run_latency", "run_jitter", "seed", "cassette",
+        "model_speed", "route", "fast_model", "factual_max_words"
+    )}
+
+
+def add_arguments(parser):
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3, help="questions per conversation")
+    parser.add_argument("--request-latency", type=float, default=0.01)
+    parser.add_argument("--run-latency", type=float, default=0.5)
+    parser.add_argument("--run-jitter", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--cassette", help="replay a recording instead of the synthetic answers and latencies")
+    parser.add_argument("--model-speed", default="", help='run latency multipliers, e.g. "gpt-4o-mini=0.4"')
+    parser.add_argument("--route", choices=("off", "on", "ab"), default="off", help="model routing")
+    parser.add_argument("--fast-model", default="gpt-4o-mini")
+    parser.add_argument("--factual-max-words", type=int, default=14)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the query path and gate on a stored baseline")
+    add_arguments(parser)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--check", action="store_true", help="exit 1 when worse than the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.route == "ab":
+        for arm, routed in (("A: routing off", False), ("B: routing on", True)):
+            print(arm)
+            print_report(run_benchmark(args, routed))
+        return
+
+    current = run_benchmark(args, args.route == "on")
+    print_report(current)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings(args), "results": current}, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    elif args.check:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --update-baseline first")
+            sys.exit(2)
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["settings"] != settings(args):
+            print(f"warning: baseline was taken with {baseline['settings']}")
+        worse = regressions(current, baseline["results"], args.tolerance)
+        for line in worse:
+            print(f"REGRESSION {line}")
+        if worse:
+            sys.exit(1)
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
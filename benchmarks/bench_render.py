@@ -0,0 +1,100 @@
+# benchmarks/bench_render.py
+"""Per-rerun conversation payload and render time against conversation length
+
+Before: every rerun sent the inline <style> block, and a rerun that showed
+the conversation rebuilt every bubble as an f-string st.markdown.
+After: the stylesheet is sent once per session and the message list
+component receives only the messages it doesn't have yet.
+
+Two kinds of rerun are measured: one after a new turn (question and answer
+added) and one with nothing new, such as a widget change. Sizes are the
+HTML/JSON bytes of the elements, without Streamlit's protobuf framing.
+
+Run from the repository root:  python benchmarks/bench_render.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering import APP_CSS, message_list_args
+from streaming import percentile
+from text_processing import process_text
+
+FILE_ID = "920357"
+WORDS = ("digital economy minister policy broadband rollout agency reform data centre cyber "
+         "security talent investment startup platform village network budget parliament").split()
+
+
+def old_bubble(role: str, processed_content: str) -> str:
+    icon = "🧑" if role == "user" else "🤖"
+    return f"""
+        <div style='background-color:{"#f0f2f6" if role == "user" else "#f8f9fa"};
+                 padding:20px;
+                 border-radius:10px;
+                 margin: 5px 0;'>
+            <strong>{icon}</strong>: {processed_content}
+        </div>
+        """
+
+
+def synthetic_entries(count: int, rng: random.Random) -> list:
+    entries = []
+    for i in range(count):
+        if i % 2 == 0:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "?"
+            role = "user"
+        else:
+            lines = [
+                f"At {rng.randint(0, 2)}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} the minister discusses "
+                + " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 40))) + " 【4:0†source】"
+                for _ in range(rng.randint(3, 8))
+            ]
+            text, role = "\n".join(lines), "assistant"
+        entries.append({"id": f"msg_{i}", "role": role, "html": [process_text(text, FILE_ID)]})
+    return entries
+
+
+def old_rerun(entries, show_conversation: bool) -> int:
+    size = len(APP_CSS.encode())
+    if show_conversation:
+        for entry in reversed(entries):
+            for html in entry["html"]:
+                size += len(old_bubble(entry["role"], html).encode())
+    return size
+
+
+def new_rerun(entries, base: int) -> int:
+    args = message_list_args("conversation", entries, base)
+    return len(json.dumps(args, ensure_ascii=False).encode())
+
+
+def timed(fn, repeat: int = 50) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50)
+
+
+def main():
+    rng = random.Random(5)
+    print(f"stylesheet: {len(APP_CSS.encode())} bytes, sent once per session after the change\n")
+    print(f"{'messages':>8} | {'turn rerun: before':>19} {'after':>9} | {'idle rerun: before':>19} {'after':>9} "
+          f"| {'render p50: before':>18} {'after':>9}")
+    for count in (10, 50, 100, 200, 400):
+        entries = synthetic_entries(count, rng)
+        turn_before, turn_after = old_rerun(entries, True), new_rerun(entries, count - 2)
+        idle_before, idle_after = old_rerun(entries, False), new_rerun(entries, count)
+        render_before = timed(lambda: old_rerun(entries, True))
+        render_after = timed(lambda: new_rerun(entries, count - 2))
+        print(f"{count:>8} | {turn_before:>17}B {turn_after:>8}B | {idle_before:>17}B {idle_after:>8}B "
+              f"| {render_before:>16.3f}ms {render_after:>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
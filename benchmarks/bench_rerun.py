@@ -0,0 +1,82 @@
+# benchmarks/bench_rerun.py
+"""Compare per-rerun setup cost with and without the cached app context
+
+Before: every rerun loaded .env, built a new OpenAI client (and its HTTP
+connection pool), rebuilt the translation dictionaries and initialised the
+session state, as the original AssistantUI.__init__ did.
+After: every rerun fetches the cached AppContext with get_app_context() and
+constructs AssistantUI around it, as app.py does now.
+
+Both run in the same process, outside a Streamlit server (bare mode).
+Run from the repository root:  python benchmarks/bench_rerun.py
+"""
+import copy
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import streamlit as st
+import streamlit.logger
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from app import AssistantUI
+from app_context import get_app_context
+from translations import CREATIVE_PROMPTS, TRANSLATIONS
+
+
+def time_reruns(setup, reruns: int):
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        setup()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label: str, samples):
+    ordered = sorted(samples)
+    print(f"{label:<8} mean={statistics.mean(samples):8.3f}ms "
+          f"p50={ordered[len(ordered) // 2]:8.3f}ms p99={ordered[int(len(ordered) * 0.99) - 1]:8.3f}ms")
+
+
+def main(reruns: int = 200):
+    clients = []
+
+    def uncached():
+        # The original script's module level and AssistantUI.__init__
+        load_dotenv()
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        # Keep the clients alive like abandoned sessions would until GC
+        clients.append(OpenAI(api_key=api_key))
+        translations = copy.deepcopy(TRANSLATIONS)
+        creative_prompts = copy.deepcopy(CREATIVE_PROMPTS)
+        if 'thread_id' not in st.session_state:
+            st.session_state.thread_id = None
+        if 'conversation_active' not in st.session_state:
+            st.session_state.conversation_active = False
+        return translations, creative_prompts
+
+    def cached():
+        return AssistantUI(get_app_context())
+
+    # Build the shared context once, as the first session after a deploy would
+    cached()
+    # Session state outside a server warns on every access
+    streamlit.logger.set_log_level("error")
+
+    report("before", time_reruns(uncached, reruns))
+    report("after", time_reruns(cached, reruns))
+
+    for client in clients:
+        client.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,146 @@
+# benchmarks/bench_retrieval.py
+"""Recall and latency of local hybrid retrieval, optionally against the hosted path
+
+A synthetic corpus of multi-hour transcripts gets facts planted at known
+timestamps, one per question. Local retrieval is scored by recall@k: did a
+chunk covering the planted timestamp come back in the top k? Dense-only,
+BM25-only and the fused ranking are reported separately, with per-query
+latency for single and batched queries.
+
+With --hosted the same questions go through the Assistants API (answer_once,
+file search on --vector-store) and an answer counts as a hit when it cites
+the planted timestamp. The hosted vector store has to contain the same
+transcripts: write them with --transcripts-out and upload them first.
+
+Run from the repository root:
+    python benchmarks/bench_retrieval.py --videos 20 --hours 2
+    python benchmarks/bench_retrieval.py --hosted --assistant-id asst_... --vector-store vs_... --questions 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_retrieval import LocalRetriever, make_embedder, top_k
+from streaming import percentile
+from timestamp_index import format_timestamp
+
+FILLER = ("digital economy minister policy broadband agency reform data centre cyber talent investment "
+          "startup platform village network budget parliament citizens services connectivity").split()
+TOPICS = ("rural broadband", "cyber security training", "data centre investment", "startup grants",
+          "5G spectrum", "digital literacy", "e-government services", "semiconductor design")
+PROGRAMMES = ("Kembara", "Lestari", "Cahaya", "Gemilang", "Harapan", "Mutiara", "Perdana", "Sinar")
+
+
+def build_corpus(videos: int, hours: float, questions: int, rng: random.Random):
+    """Transcripts as {file_id: text} and (question, file_id, planted seconds) triples"""
+    transcripts = {f"9{i:05d}": [] for i in range(videos)}
+    for lines in transcripts.values():
+        t = 0.0
+        while t < hours * 3600:
+            lines.append([t, " ".join(rng.choice(FILLER) for _ in range(rng.randint(8, 16)))])
+            t += rng.uniform(3.0, 6.0)
+
+    planted = []
+    for _ in range(questions):
+        file_id = rng.choice(list(transcripts))
+        line = rng.choice(transcripts[file_id])
+        topic, programme = rng.choice(TOPICS), f"{rng.choice(PROGRAMMES)}-{rng.randint(100, 999)}"
+        line[1] = f"The minister announced the {programme} programme for {topic} in every state"
+        planted.append((f"Which programme did the minister announce for {topic}, the {programme} one?",
+                        file_id, line[0]))
+    texts = {
+        file_id: "\n".join(f"{format_timestamp(t)} {text}" for t, text in lines)
+        for file_id, lines in transcripts.items()
+    }
+    return texts, planted
+
+
+def covers(chunk, file_id, seconds) -> bool:
+    return chunk["file_id"] == file_id and chunk["start"] <= int(seconds) <= chunk["end"]
+
+
+def recall(rankings, planted) -> float:
+    hits = sum(any(covers(c, f, s) for c in ranking) for ranking, (_, f, s) in zip(rankings, planted))
+    return hits / len(planted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vs hosted retrieval recall and latency")
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embedder", default="hashing:512")
+    parser.add_argument("--transcripts-out")
+    parser.add_argument("--hosted", action="store_true")
+    parser.add_argument("--assistant-id")
+    parser.add_argument("--vector-store")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    texts, planted = build_corpus(args.videos, args.hours, args.questions, rng)
+    directory = args.transcripts_out or tempfile.mkdtemp(prefix="transcripts-")
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for file_id, text in texts.items():
+        paths[file_id] = os.path.join(directory, f"{file_id}.txt")
+        with open(paths[file_id], "w", encoding="utf-8") as f:
+            f.write(text)
+
+    index_dir = tempfile.mkdtemp(prefix="retrieval-index-")
+    started = time.perf_counter()
+    chunks = LocalRetriever.build(index_dir, paths, make_embedder(args.embedder))
+    print(f"{args.videos} videos x {args.hours}h -> {chunks} chunks, built in {time.perf_counter() - started:.1f}s")
+    retriever = LocalRetriever(index_dir)
+    questions = [q for q, _, _ in planted]
+
+    # Each ranking on its own, then the fused result
+    query_vectors = retriever.embedder.embed(questions)
+    dense = [[retriever.chunks[row] for row in rows.tolist()] for _, rows in top_k(retriever.vectors, query_vectors, args.k)]
+    bm25 = [[retriever.chunks[row] for _, row in retriever.bm25.search(q, args.k)] for q in questions]
+    latencies, fused = [], []
+    for question in questions:
+        t = time.perf_counter()
+        fused.append(retriever.search(question, args.k))
+        latencies.append((time.perf_counter() - t) * 1000)
+    t = time.perf_counter()
+    retriever.search_many(questions, args.k)
+    batched = (time.perf_counter() - t) * 1000 / len(questions)
+
+    print(f"recall@{args.k}: dense={recall(dense, planted):.2f} bm25={recall(bm25, planted):.2f} "
+          f"hybrid={recall(fused, planted):.2f}")
+    print(f"local latency: p50={percentile(latencies, 50):.2f}ms p95={percentile(latencies, 95):.2f}ms "
+          f"p99={percentile(latencies, 99):.2f}ms; batched {batched:.2f}ms/query")
+
+    if args.hosted:
+        from dotenv import load_dotenv
+        from openai import OpenAI
+
+        from query_pipeline import answer_once
+        from run_waiter import RunWaiter
+
+        load_dotenv()
+        client = OpenAI()
+        waiter = RunWaiter(client)
+        hits, hosted_latencies = 0, []
+        for question, file_id, seconds in planted:
+            t = time.perf_counter()
+            try:
+                blocks = answer_once(client, waiter, args.assistant_id, args.vector_store, "Benchmark",
+                                     file_id, "English", question)
+            except Exception as e:
+                print(f"hosted failed: {e}")
+                continue
+            hosted_latencies.append((time.perf_counter() - t) * 1000)
+            hits += any(format_timestamp(seconds) in block for block in blocks)
+        print(f"hosted hit rate: {hits / len(planted):.2f}; latency p50={percentile(hosted_latencies, 50):.0f}ms "
+              f"p95={percentile(hosted_latencies, 95):.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
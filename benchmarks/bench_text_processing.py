@@ -0,0 +1,48 @@
+# benchmarks/bench_text_processing.py
+"""Time the text processor against the old implementation
+
+The old clean_source_annotations + process_message_content pair lives in
+tests/test_text_processing.py, which also checks that both give the same
+output. The timings cover long answers with many timestamps and
+annotations, including one long line that made the old (?!.*\\]) lookahead
+quadratic.
+
+Run from the repository root:  python benchmarks/bench_text_processing.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from text_processing import process_text
+
+from test_text_processing import FILE_ID, long_answer, long_line, old_process
+
+
+def bench(label: str, func, text: str, repeat: int):
+    # Best of several rounds keeps scheduler noise out of the comparison
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(text, FILE_ID)
+        best = min(best, (time.perf_counter() - started) / repeat * 1000)
+    print(f"{label:<40} {best:10.3f}ms")
+
+
+def main():
+    for lines in (20, 200, 2000):
+        text = long_answer(lines)
+        bench(f"old  answer, {lines} lines", old_process, text, 20)
+        bench(f"new  answer, {lines} lines", process_text, text, 20)
+    for markers in (200, 2000):
+        text = long_line(markers)
+        bench(f"old  single line, {markers} markers", old_process, text, 3)
+        bench(f"new  single line, {markers} markers", process_text, text, 3)
+
+
+if __name__ == "__main__":
+    main()
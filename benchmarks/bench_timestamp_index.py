@@ -0,0 +1,99 @@
+# benchmarks/bench_timestamp_index.py
+"""Lookup latency of the per-video timestamp index on multi-hour transcripts
+
+Synthetic SRT transcripts of 1, 4 and 12 hours (one cue every ~4 seconds)
+are parsed and indexed, then point lookups, snapping and phrase searches are
+timed against a linear scan over the same segments. Every index answer is
+checked against the scan; a mismatch exits non-zero.
+
+Run from the repository root:  python benchmarks/bench_timestamp_index.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming import percentile
+from timestamp_index import TimestampIndex, parse_transcript
+
+WORDS = ("digital economy minister policy broadband rollout agency reform data centre cyber "
+         "security talent investment startup platform village network budget parliament").split()
+
+
+def srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d},{millis % 1000:03d}"
+
+
+def synthetic_srt(hours: float, rng: random.Random) -> str:
+    cues, t, n = [], 0.0, 1
+    while t < hours * 3600:
+        length = rng.uniform(2.0, 6.0)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+        cues.append(f"{n}\n{srt_time(t)} --> {srt_time(t + length)}\n{text}\n")
+        t += length + rng.uniform(0.0, 0.5)
+        n += 1
+    return "\n".join(cues)
+
+
+def scan_at(segments, seconds):
+    return [i for i, (start, end, _) in enumerate(segments) if start <= seconds < end]
+
+
+def scan_search(segments, phrase):
+    words = phrase.split()
+    return [i for i, (_, _, text) in enumerate(segments) if all(w in text.lower().split() for w in words)]
+
+
+def timed(fn, queries):
+    """Per-call latencies in microseconds and the results"""
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies, results
+
+
+def report(label, latencies):
+    print(f"{label:<34} p50={percentile(latencies, 50):9.1f}us  p99={percentile(latencies, 99):9.1f}us")
+
+
+def main():
+    rng = random.Random(7)
+    ok = True
+    for hours in (1, 4, 12):
+        transcript = synthetic_srt(hours, rng)
+        started = time.perf_counter()
+        index = TimestampIndex("920357", parse_transcript(transcript, "bench.srt"))
+        built = time.perf_counter() - started
+        segments = list(zip(index.starts, index.ends, index.texts))
+        print(f"\n{hours}h transcript: {len(index)} segments, parsed and indexed in {built * 1000:.0f}ms")
+
+        points = [rng.uniform(0, index.duration) for _ in range(2000)]
+        index_lat, index_res = timed(index.at, points)
+        scan_lat, scan_res = timed(lambda s: scan_at(segments, s), points[:200])
+        ok &= index_res[:200] == scan_res
+        report("at() binary search", index_lat)
+        report("at() linear scan", scan_lat)
+
+        snap_lat, _ = timed(lambda s: index.snap(s, 5.0), points)
+        report("snap() within 5s", snap_lat)
+
+        phrases = [" ".join(rng.sample(WORDS, 2)) for _ in range(200)]
+        index.search("warm up")
+        search_lat, search_res = timed(lambda p: index.search(p, limit=10 ** 9), phrases)
+        scan_lat, scan_res = timed(lambda p: scan_search(segments, p), phrases[:50])
+        ok &= search_res[:50] == scan_res
+        report("search() word index", search_lat)
+        report("search() linear scan", scan_lat)
+
+    if not ok:
+        print("\nIndex results differ from the linear scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+# benchmarks/fake_assistants_api.py
+"""Local stand-in for the Assistants API endpoints the app uses
+
+Threads, messages and runs are kept in memory. A run stays queued/in_progress
+for a randomised run latency (normal or log-normal) and then completes with a
+canned answer full of timestamps and source annotations. Every request can be
+delayed and a share of them can fail with 429/500, so clients can be load
+tested without the live API.
+
+With --cassette the server replays a recording made with
+OPENAI_RECORD_CASSETTE: questions get the answers recorded for them, and run
+and request latencies and the error rate are drawn from the recording. Run
+durations are kept per model, so a model override replays that model's
+latency; --model-speed scales the run latency of models without samples.
+
+Start it on its own:  python benchmarks/fake_assistants_api.py --port 8765
+then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cassettes import read_cassette
+
+CANNED_ANSWER = (
+    "At [00:01:15] the minister opens the session【4:0†source】.\n"
+    "From [00:03:02] to [00:04:40] he outlines the digital economy plan [1:2]\n"
+    "At [00:12:30]†source the audience asks about 5G rollout."
+)
+
+
+class FakeAssistantsState:
+    """In-memory threads, messages and runs plus the latency/error settings"""
+
+    def __init__(self, request_latency: float = 0.0, run_latency: float = 2.0, run_jitter: float = 0.5,
+                 error_rate: float = 0.0, answer: str = CANNED_ANSWER, seed: int = None,
+                 run_distribution: str = "normal", error_statuses=(429, 500), model_speed=None):
+        self.request_latency = request_latency
+        self.run_latency = run_latency
+        self.run_jitter = run_jitter
+        self.run_distribution = run_distribution
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        # Run latency multiplier per model, e.g. {"gpt-4o-mini": 0.4}
+        self.model_speed = dict(model_speed or {})
+        self.answer = answer
+        # Filled from a cassette: answers per question and samples to draw latencies from
+        self.answers = {}
+        self.recorded_answers = []
+        self.run_durations = []
+        self.model_durations = {}
+        self.request_latencies = []
+        self.random = random.Random(seed)
+        # Its own stream, so a seeded replay gives each run the same duration however many polls came before
+        self.run_random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.threads = {}
+        self.runs = {}
+        self.requests = 0
+
+    @classmethod
+    def from_cassette(cls, path: str, **kwargs):
+        """State that replays a recorded cassette's answers, latencies and error rate"""
+        state = cls(**kwargs)
+        questions, thread_answers, run_started, durations, models = {}, {}, {}, {}, {}
+        entries = read_cassette(path)
+        for entry in entries:
+            method, path_, body, response = entry["method"], entry["path"], entry["request"], entry["response"]
+            started = entry["ts"] - entry["elapsed"]
+            if entry["status"] >= 400:
+                continue
+            if isinstance(response, str) and "event:" in response:
+                # A streamed run: its answer and duration come from the event stream
+                events = parse_events(response)
+                run = next((data for event, data in events if event == "thread.run.created"), None)
+                if run is not None:
+                    durations[run["id"]] = entry["elapsed"]
+                    models[run["id"]] = run.get("model")
+                    for event, data in events:
+                        if event == "thread.message.completed" and data.get("role") == "assistant":
+                            thread_answers[run["thread_id"]] = message_text(data)
+                    messages = (body or {}).get("thread", {}).get("messages") or []
+                    if messages:
+                        questions[run["thread_id"]] = messages[-1]["content"]
+                continue
+            state.request_latencies.append(entry["elapsed"])
+            if method == "POST" and path_.endswith("/threads/runs"):
+                messages = (body or {}).get("thread", {}).get("messages") or []
+                if messages:
+                    questions[response["thread_id"]] = messages[-1]["content"]
+                run_started[response["id"]] = started
+                models[response["id"]] = response.get("model")
+            elif method == "POST" and re.fullmatch(r".*/threads/[^/]+/runs", path_):
+                run_started[response["id"]] = started
+                models[response["id"]] = response.get("model")
+            elif method == "POST" and re.fullmatch(r".*/threads/[^/]+/messages", path_):
+                questions[response["thread_id"]] = body.get("content")
+            elif method == "GET" and re.fullmatch(r".*/threads/[^/]+/runs/[^/]+", path_):
+                if response.get("status") == "completed" and response["id"] in run_started:
+                    durations.setdefault(response["id"], entry["ts"] - run_started[response["id"]])
+            elif method == "GET" and re.fullmatch(r".*/threads/[^/]+/messages", path_):
+                for message in response.get("data", []):
+                    if message["role"] == "assistant":
+                        thread_answers[message["thread_id"]] = message_text(message)
+        for thread_id, answer in thread_answers.items():
+            state.recorded_answers.append(answer)
+            if isinstance(questions.get(thread_id), str):
+                state.answers[questions[thread_id]] = answer
+        state.run_durations = list(durations.values())
+        for run_id, duration in durations.items():
+            state.model_durations.setdefault(models.get(run_id), []).append(duration)
+        if "error_rate" not in kwargs and entries:
+            state.error_rate = sum(entry["status"] >= 400 for entry in entries) / len(entries)
+        return state
+
+    def answer_for(self, thread_id: str) -> str:
+        """The recorded answer to the thread's last question, else any recorded or the canned one"""
+        for message in reversed(self.threads.get(thread_id, [])):
+            if message["role"] == "user":
+                answer = self.answers.get(message["content"][0]["text"]["value"])
+                if answer is not None:
+                    return answer
+                break
+        return self.random.choice(self.recorded_answers) if self.recorded_answers else self.answer
+
+    def run_duration(self, model: str = None) -> float:
+        if self.model_durations.get(model):
+            return self.run_random.choice(self.model_durations[model])
+        speed = self.model_speed.get(model, 1.0)
+        if self.run_durations:
+            return speed * self.run_random.choice(self.run_durations)
+        if self.run_distribution == "lognormal":
+            # run_latency is the median, run_jitter the spread of the log
+            return speed * self.run_random.lognormvariate(math.log(max(self.run_latency, 1e-3)), self.run_jitter)
+        return speed * max(0.0, self.run_random.gauss(self.run_latency, self.run_jitter))
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self.ids):08d}"
+
+    def message(self, thread_id: str, role: str, content: str, run_id: str = None) -> dict:
+        message = {
+            "id": self.new_id("msg"),
+            "object": "thread.message",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "role": role,
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "assistant_id": None,
+            "run_id": run_id,
+            "attachments": [],
+            "metadata": {},
+        }
+        self.threads.setdefault(thread_id, []).append(message)
+        return message
+
+    def create_run(self, thread_id: str, body: dict) -> dict:
+        run = {
+            "id": self.new_id("run"),
+            "object": "thread.run",
+            "created_at": int(time.time()),
+            "thread_id": thread_id,
+            "assistant_id": body.get("assistant_id"),
+            "status": "queued",
+            "model": body.get("model") or "gpt-4-turbo-preview",
+            "instructions": body.get("instructions") or "",
+            "tools": [],
+            "metadata": {},
+            "usage": None,
+            "_finishes_at": time.monotonic() + self.run_duration(body.get("model")),
+        }
+        self.runs[run["id"]] = run
+        return run
+
+    def refresh_run(self, run: dict) -> dict:
+        """Advance a run's status based on how long it has been running"""
+        if run["status"] in ("queued", "in_progress"):
+            now = time.monotonic()
+            if now >= run["_finishes_at"]:
+                run["status"] = "completed"
+                run["completed_at"] = int(time.time())
+                run["usage"] = {"prompt_tokens": 1200, "completion_tokens": 180, "total_tokens": 1380}
+                self.message(run["thread_id"], "assistant", self.answer_for(run["thread_id"]), run_id=run["id"])
+            else:
+                run["status"] = "in_progress"
+        return run
+
+
+def parse_events(stream: str) -> list:
+    """(event, data) pairs of a server-sent event stream"""
+    events, event = [], None
+    for line in stream.splitlines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:") and event:
+            try:
+                events.append((event, json.loads(line[5:])))
+            except ValueError:
+                pass
+    return events
+
+
+def message_text(message: dict) -> str:
+    return "\n".join(c["text"]["value"] for c in message.get("content", []) if c.get("type") == "text")
+
+
+def parse_model_speed(text: str) -> dict:
+    """{"gpt-4o-mini": 0.4} from "gpt-4o-mini=0.4,..." """
+    return {model: float(speed) for model, speed in (item.split("=", 1) for item in text.split(",") if item)}
+
+
+def public(obj: dict) -> dict:
+    return {k: v for k, v in obj.items() if not k.startswith("_")}
+
+
+def make_handler(state: FakeAssistantsState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status: int, payload: dict, headers: dict = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def simulate(self) -> bool:
+            """Apply request latency and injected errors; False when an error was sent"""
+            with state.lock:
+                state.requests += 1
+                fail = state.random.random() < state.error_rate
+                status = state.random.choice(state.error_statuses) if fail else None
+                latency = (state.random.choice(state.request_latencies) if state.request_latencies
+                           else state.request_latency)
+            if latency:
+                time.sleep(latency)
+            if fail:
+                headers = {"Retry-After": "1"} if status == 429 else None
+                self.send_json(status, {"error": {"message": "injected failure", "type": "fake"}}, headers)
+                return False
+            return True
+
+        def do_POST(self):
+            body = self.read_body()
+            if not self.simulate():
+                return
+            path = urlparse(self.path).path
+            with state.lock:
+                response = self.route_post(path, body)
+            if response is None:
+                self.send_json(404, {"error": {"message": f"no route for POST {path}"}})
+            else:
+                self.send_json(200, response)
+
+        def route_post(self, path: str, body: dict):
+            if path == "/v1/threads":
+                thread_id = state.new_id("thread")
+                state.threads[thread_id] = []
+                for message in body.get("messages", []):
+                    state.message(thread_id, message["role"], message["content"])
+                return {"id": thread_id, "object": "thread", "created_at": int(time.time()), "metadata": {}}
+            if path == "/v1/threads/runs":
+                thread_id = state.new_id("thread")
+                state.threads[thread_id] = []
+                for message in body.get("thread", {}).get("messages", []):
+                    state.message(thread_id, message["role"], message["content"])
+                return public(state.create_run(thread_id, body))
+            match = re.fullmatch(r"/v1/threads/([^/]+)/messages", path)
+            if match:
+                return state.message(match.group(1), body.get("role", "user"), body.get("content", ""))
+            match = re.fullmatch(r"/v1/threads/([^/]+)/runs", path)
+            if match:
+                return public(state.create_run(match.group(1), body))
+            match = re.fullmatch(r"/v1/threads/([^/]+)/runs/([^/]+)/cancel", path)
+            if match and match.group(2) in state.runs:
+                run = state.runs[match.group(2)]
+                if run["status"] in ("queued", "in_progress"):
+                    run["status"] = "cancelled"
+                return public(run)
+            return None
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path.endswith("/_stats"):
+                # For benchmarks driving the server from another process; not counted as a request
+                with state.lock:
+                    self.send_json(200, {"requests": state.requests})
+                return
+            if not self.simulate():
+                return
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            with state.lock:
+                response = self.route_get(parsed.path, query)
+            if response is None:
+                self.send_json(404, {"error": {"message": f"no route for GET {parsed.path}"}})
+            else:
+                self.send_json(200, response)
+
+        def route_get(self, path: str, query: dict):
+            match = re.fullmatch(r"/v1/assistants/([^/]+)", path)
+            if match:
+                return {"id": match.group(1), "object": "assistant", "created_at": int(time.time()),
+                        "model": "gpt-4-turbo-preview", "instructions": "You are a helpful assistant.",
+                        "tools": [], "metadata": {}}
+            match = re.fullmatch(r"/v1/threads/([^/]+)/runs/([^/]+)", path)
+            if match and match.group(2) in state.runs:
+                return public(state.refresh_run(state.runs[match.group(2)]))
+            match = re.fullmatch(r"/v1/threads/([^/]+)/messages", path)
+            if match:
+                messages = list(state.threads.get(match.group(1), []))
+                if query.get("order", "desc") == "desc":
+                    messages.reverse()
+                if "after" in query:
+                    ids = [m["id"] for m in messages]
+                    messages = messages[ids.index(query["after"]) + 1:] if query["after"] in ids else []
+                limit = int(query.get("limit", 20))
+                page = messages[:limit]
+                return {
+                    "object": "list",
+                    "data": page,
+                    "first_id": page[0]["id"] if page else None,
+                    "last_id": page[-1]["id"] if page else None,
+                    "has_more": len(messages) > limit,
+                }
+            return None
+
+    return Handler
+
+
+def start_server(state: FakeAssistantsState = None, host: str = "127.0.0.1", port: int = 0):
+    """Start the fake API on a daemon thread; returns (server, base_url)"""
+    state = state or FakeAssistantsState()
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, name="fake-assistants-api", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--request-latency", type=float, default=0.05)
+    parser.add_argument("--run-latency", type=float, default=2.0)
+    parser.add_argument("--run-jitter", type=float, default=0.5)
+    parser.add_argument("--run-distribution", choices=("normal", "lognormal"), default="normal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", default="429,500", help="statuses injected failures pick from")
+    parser.add_argument("--cassette", help="replay answers, latencies and errors from a recording")
+    parser.add_argument("--model-speed", default="", help='run latency multipliers, e.g. "gpt-4o-mini=0.4"')
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = dict(
+        request_latency=args.request_latency,
+        run_latency=args.run_latency,
+        run_jitter=args.run_jitter,
+        run_distribution=args.run_distribution,
+        error_statuses=[int(status) for status in args.error_statuses.split(",")],
+        model_speed=parse_model_speed(args.model_speed),
+        seed=args.seed,
+    )
+    if args.cassette:
+        state = FakeAssistantsState.from_cassette(args.cassette, **settings)
+    else:
+        state = FakeAssistantsState(error_rate=args.error_rate, **settings)
+    server, base_url = start_server(state, args.host, args.port)
+    print(f"Fake Assistants API listening on {base_url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
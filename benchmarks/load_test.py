@@ -0,0 +1,88 @@
+# benchmarks/load_test.py
+"""Drive many concurrent questions through AsyncAssistantService against the fake API
+
+Every simulated session asks one question on a fresh thread. The report
+shows throughput, end-to-end and queue latency percentiles, and the peak
+number of runs in flight, which should never exceed --max-in-flight.
+
+Run from the repository root:
+    python benchmarks/load_test.py --sessions 200 --max-in-flight 32 --run-latency 2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_service import AsyncAssistantService
+from run_waiter import RunWaiter
+from streaming import percentile
+
+from fake_assistants_api import FakeAssistantsState, start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the async assistant pipeline")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--max-in-flight", type=int, default=32)
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--deadline", type=float, default=120.0)
+    parser.add_argument("--request-latency", type=float, default=0.02)
+    parser.add_argument("--run-latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_server(FakeAssistantsState(
+        request_latency=args.request_latency,
+        run_latency=args.run_latency,
+        error_rate=args.error_rate,
+        seed=1
+    ))
+    # Short waits keep polling overhead visible without dominating the runs
+    waiter = RunWaiter(None, initial_delay=0.1, max_delay=1.0, timeout=args.deadline)
+    service = AsyncAssistantService(
+        "sk-load-test",
+        waiter,
+        max_in_flight=args.max_in_flight,
+        max_queue=args.max_queue,
+        deadline=args.deadline,
+        base_url=base_url
+    )
+
+    threads_before = threading.active_count()
+    started = time.monotonic()
+    futures = [
+        service.ask("asst_load", "vs_load", "Load_Test", "920357", "English", f"Question {i}?")
+        for i in range(args.sessions)
+    ]
+
+    latencies, queued, failures = [], [], 0
+    for future in futures:
+        try:
+            result = future.result()
+        except Exception as e:
+            failures += 1
+            print(f"failed: {type(e).__name__}: {e}")
+            continue
+        latencies.append(result.elapsed + result.queued)
+        queued.append(result.queued)
+    wall = time.monotonic() - started
+
+    print(f"sessions={args.sessions} ok={len(latencies)} failed={failures} wall={wall:.2f}s "
+          f"throughput={len(latencies) / wall * 60:.1f} questions/min")
+    for label, samples in (("latency", latencies), ("queued", queued)):
+        print(f"{label:<8} p50={percentile(samples, 50):.2f}s p95={percentile(samples, 95):.2f}s "
+              f"p99={percentile(samples, 99):.2f}s")
+    print(f"service stats: {service.stats}")
+    print(f"polls per run: {waiter.polls_per_run():.1f}; API requests: {server.state.requests} "
+          f"({server.state.requests / max(1, args.sessions):.1f} per question)")
+    print(f"threads: {threads_before} before, {threading.active_count()} after")
+
+    service.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# cassettes.py
+import json
+import threading
+import time
+
+import httpx
+
+
+def _decode(content: bytes, content_type: str):
+    """JSON bodies as objects, anything else (e.g. a run's event stream) as text"""
+    if not content:
+        return None
+    if "json" in content_type:
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass
+    return content.decode("utf-8", "replace")
+
+
+def read_cassette(path: str) -> list:
+    """Recorded interactions in the order they finished"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+class CassetteRecorder:
+    """Appends every API interaction to a JSONL cassette
+
+    Each line holds the method, path, query, request and response bodies,
+    status and how long the response took. Headers are not kept, so API keys
+    never reach the file. benchmarks/fake_assistants_api.py replays cassettes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self.stats = {"recorded": 0}
+
+    def entry(self, request: httpx.Request, response: httpx.Response, started: float, body: bytes) -> dict:
+        encoding = response.headers.get("content-encoding")
+        if encoding and body:
+            # The transport sees the body before the client undoes gzip/br
+            body = httpx.Response(200, headers={"content-encoding": encoding}, content=body).content
+        return {
+            "ts": round(time.time(), 3),
+            "elapsed": round(time.monotonic() - started, 4),
+            "method": request.method,
+            "path": request.url.path,
+            "query": dict(request.url.params),
+            "request": _decode(request.content, request.headers.get("content-type", "")),
+            "status": response.status_code,
+            "response": _decode(body, response.headers.get("content-type", "")),
+        }
+
+    def write(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            # One interrupted session shouldn't lose the whole recording
+            self._file.flush()
+            self.stats["recorded"] += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class _RecordedStream(httpx.SyncByteStream):
+    """Passes the body through and records it once the client has read it all"""
+
+    def __init__(self, stream, on_close):
+        self.stream = stream
+        self.on_close = on_close
+        self.chunks = []
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.chunks.append(chunk)
+            yield chunk
+
+    def close(self):
+        self.stream.close()
+        self.on_close(b"".join(self.chunks))
+
+
+class _AsyncRecordedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, on_close):
+        self.stream = stream
+        self.on_close = on_close
+        self.chunks = []
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.chunks.append(chunk)
+            yield chunk
+
+    async def aclose(self):
+        await self.stream.aclose()
+        self.on_close(b"".join(self.chunks))
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """httpx transport that writes every request and response to a cassette"""
+
+    def __init__(self, recorder: CassetteRecorder, transport: httpx.BaseTransport):
+        self.recorder = recorder
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        response = self.transport.handle_request(request)
+        # Streamed answers are recorded when the stream ends, with its full duration
+        stream = _RecordedStream(
+            response.stream,
+            lambda body: self.recorder.write(self.recorder.entry(request, response, started, body))
+        )
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream,
+                              extensions=response.extensions)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """RecordingTransport for the AsyncOpenAI client"""
+
+    def __init__(self, recorder: CassetteRecorder, transport: httpx.AsyncBaseTransport):
+        self.recorder = recorder
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        stream = _AsyncRecordedStream(
+            response.stream,
+            lambda body: self.recorder.write(self.recorder.entry(request, response, started, body))
+        )
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream,
+                              extensions=response.extensions)
+
+    async def aclose(self):
+        await self.transport.aclose()
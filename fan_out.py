@@ -0,0 +1,130 @@
+# fan_out.py
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from answer_cache import cosine, hashing_embedding, normalize_query
+from query_pipeline import answer_once
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_LINK_RE = re.compile(r'<a\s')
+
+
+def relevance(query: str, blocks) -> float:
+    """How well an answer matches the question: trigram cosine plus a bonus per cited timestamp
+
+    Answers that say the video doesn't cover the question share few words
+    with it and cite no timestamps, so they sort below real answers.
+    """
+    html = "\n".join(blocks)
+    if not html.strip():
+        return 0.0
+    text = normalize_query(_TAG_RE.sub(" ", html))
+    score = cosine(hashing_embedding(normalize_query(query)), hashing_embedding(text))
+    return score + 0.05 * min(len(_LINK_RE.findall(html)), 5)
+
+
+class FanOutAnswer:
+    """One assistant's answer to a fanned-out question"""
+
+    __slots__ = ("record", "blocks", "error", "elapsed", "relevance", "cached")
+
+    def __init__(self, record, blocks=None, error: str = None, elapsed: float = 0.0, relevance: float = 0.0,
+                 cached: bool = False):
+        self.record = record
+        self.blocks = blocks or []
+        self.error = error
+        self.elapsed = elapsed
+        self.relevance = relevance
+        self.cached = cached
+
+
+class FanOut:
+    """Ask one question of many assistants at once and hand back answers as they finish
+
+    Each assistant gets its own fresh thread, so the session's conversation
+    is untouched. At most max_parallel runs of one question are in flight;
+    the rest start as earlier ones finish, so the wall-clock time approaches
+    the slowest run rather than the sum. Runs go through the async service
+    when it is enabled, otherwise through a shared thread pool.
+    """
+
+    def __init__(self, client, run_waiter, async_service=None, answer_cache=None, max_parallel: int = 8,
+                 max_workers: int = 16):
+        self.client = client
+        self.run_waiter = run_waiter
+        self.async_service = async_service
+        self.answer_cache = answer_cache
+        self.max_parallel = max_parallel
+        self._executor = None
+        if async_service is None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fan-out")
+        self._lock = threading.Lock()
+        self.stats = {"questions": 0, "runs": 0, "cached": 0, "failures": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _submit(self, record, language: str, query: str, cancel: threading.Event):
+        if self.async_service is not None:
+            return self.async_service.ask(
+                record.assistant_id, record.vector_store, record.key, record.file_id, language, query
+            )
+        return self._executor.submit(
+            answer_once, self.client, self.run_waiter, record.assistant_id, record.vector_store,
+            record.key, record.file_id, language, query, should_cancel=cancel.is_set
+        )
+
+    def run(self, records, language: str, query: str, poll_interval: float = 0.5):
+        """Yield a FanOutAnswer per record in the order they finish
+
+        None is yielded every poll_interval while runs are going, so a UI can
+        refresh its progress. Closing the generator early cancels what is left.
+        """
+        self._count("questions")
+        cancel = threading.Event()
+        waiting = list(records)
+        pending = {}
+        try:
+            while waiting or pending:
+                while waiting and len(pending) < self.max_parallel:
+                    record = waiting.pop(0)
+                    cached = None
+                    if self.answer_cache is not None:
+                        cached = self.answer_cache.get(record.assistant_id, record.vector_store, language, query)
+                    if cached is not None:
+                        self._count("cached")
+                        yield FanOutAnswer(record, cached, relevance=relevance(query, cached), cached=True)
+                        continue
+                    pending[self._submit(record, language, query, cancel)] = (record, time.monotonic())
+                if not pending:
+                    continue
+                done, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                if not done:
+                    yield None
+                for future in done:
+                    record, started = pending.pop(future)
+                    yield self._answer(record, future, language, query, time.monotonic() - started)
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+
+    def _answer(self, record, future, language: str, query: str, elapsed: float) -> FanOutAnswer:
+        self._count("runs")
+        try:
+            result = future.result()
+        except Exception as e:
+            self._count("failures")
+            return FanOutAnswer(record, error=f"{type(e).__name__}: {e}", elapsed=elapsed)
+        blocks = result.answer if hasattr(result, "answer") else result
+        if self.answer_cache is not None and blocks:
+            self.answer_cache.put(record.assistant_id, record.vector_store, language, query, blocks)
+        return FanOutAnswer(record, blocks, elapsed=elapsed, relevance=relevance(query, blocks))
+
+
+def merged(answers) -> list:
+    """Answers by relevance, best first; failures last"""
+    return sorted(answers, key=lambda answer: (answer.error is None, answer.relevance), reverse=True)
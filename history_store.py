@@ -0,0 +1,149 @@
+# history_store.py
+import json
+import sqlite3
+import threading
+import time
+
+from message_cache import ConversationCache
+from token_budget import run_usage
+
+
+class HistoryStore:
+    """Conversations of each user in a SQLite file, so a refresh or restart resumes without API calls
+
+    A conversation row holds the thread ID and assistant, its messages are
+    stored already processed, in thread order, and runs keep their status and
+    token usage. Conversations untouched for retention_days are deleted, and
+    each user keeps at most max_conversations of the most recent ones.
+    """
+
+    def __init__(self, path: str = "history.sqlite3", retention_days: float = 30, max_conversations: int = 20,
+                 evict_interval: float = 3600):
+        self.retention = retention_days * 86400
+        self.max_conversations = max_conversations
+        self.evict_interval = evict_interval
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            " key TEXT PRIMARY KEY, user TEXT NOT NULL, thread_id TEXT, assistant TEXT, language TEXT,"
+            " created REAL NOT NULL, updated REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS conversations_user ON conversations (user, updated);"
+            "CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated);"
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " conversation TEXT NOT NULL REFERENCES conversations (key) ON DELETE CASCADE,"
+            " seq INTEGER NOT NULL, message_id TEXT, role TEXT NOT NULL, html TEXT NOT NULL,"
+            " PRIMARY KEY (conversation, seq)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " conversation TEXT NOT NULL REFERENCES conversations (key) ON DELETE CASCADE,"
+            " run_id TEXT NOT NULL, mode TEXT, status TEXT, prompt_tokens INTEGER, completion_tokens INTEGER,"
+            " created_at REAL, completed_at REAL, PRIMARY KEY (conversation, run_id)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+        self.stats = {"saved_messages": 0, "restored": 0, "evicted": 0}
+
+    def save(self, user: str, conversation: ConversationCache, assistant: str = None, language: str = None) -> int:
+        """Store the conversation's thread and any messages not stored yet; returns how many were added"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO conversations (key, user, thread_id, assistant, language, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET thread_id = excluded.thread_id,"
+                " assistant = COALESCE(excluded.assistant, assistant),"
+                " language = COALESCE(excluded.language, language), updated = excluded.updated",
+                (conversation.key, user, conversation.thread_id, assistant, language, now, now)
+            )
+            # Messages are append-only, so everything past the stored count is new
+            stored = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation = ?", (conversation.key,)
+            ).fetchone()[0]
+            new = conversation.entries[stored:]
+            self._conn.executemany(
+                "INSERT INTO messages (conversation, seq, message_id, role, html) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (conversation.key, stored + i, entry["id"], entry["role"], json.dumps(entry["html"]))
+                    for i, entry in enumerate(new)
+                ]
+            )
+            self._conn.commit()
+            self.stats["saved_messages"] += len(new)
+        if now - self._last_evict >= self.evict_interval:
+            self.evict(now)
+        return len(new)
+
+    def record_run(self, conversation: ConversationCache, run, mode: str = None):
+        """Keep a run's status, timing and token usage next to the conversation"""
+        run_id = getattr(run, "id", None)
+        if run_id is None:
+            return
+        usage = run_usage(run) or (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs"
+                " (conversation, run_id, mode, status, prompt_tokens, completion_tokens, created_at, completed_at)"
+                " SELECT ?, ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM conversations WHERE key = ?)",
+                (conversation.key, run_id, mode, getattr(run, "status", None), usage[0], usage[1],
+                 getattr(run, "created_at", None), getattr(run, "completed_at", None), conversation.key)
+            )
+            self._conn.commit()
+
+    def conversations(self, user: str, limit: int = 20) -> list:
+        """The user's conversations, most recently updated first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, thread_id, assistant, language, updated FROM conversations"
+                " WHERE user = ? ORDER BY updated DESC LIMIT ?",
+                (user, limit)
+            ).fetchall()
+        return [
+            {"key": key, "thread_id": thread_id, "assistant": assistant, "language": language, "updated": updated}
+            for key, thread_id, assistant, language, updated in rows
+        ]
+
+    def load(self, key: str):
+        """The stored conversation as a ConversationCache, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT thread_id FROM conversations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            messages = self._conn.execute(
+                "SELECT message_id, role, html FROM messages WHERE conversation = ? ORDER BY seq", (key,)
+            ).fetchall()
+            self.stats["restored"] += 1
+        return ConversationCache.restore(
+            key, row[0], [{"id": message_id, "role": role, "html": json.loads(html)} for message_id, role, html in messages]
+        )
+
+    def latest(self, user: str):
+        """(conversation, summary) of the user's most recent conversation, or (None, None)"""
+        recent = self.conversations(user, limit=1)
+        if not recent:
+            return None, None
+        return self.load(recent[0]["key"]), recent[0]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM conversations WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self, now: float = None) -> int:
+        """Drop expired conversations and each user's oldest beyond max_conversations"""
+        now = now or time.time()
+        with self._lock:
+            self._last_evict = now
+            expired = self._conn.execute(
+                "DELETE FROM conversations WHERE updated < ?", (now - self.retention,)
+            ).rowcount
+            surplus = self._conn.execute(
+                "DELETE FROM conversations WHERE key IN ("
+                " SELECT key FROM (SELECT key, ROW_NUMBER() OVER (PARTITION BY user ORDER BY updated DESC) AS rank"
+                " FROM conversations) WHERE rank > ?)",
+                (self.max_conversations,)
+            ).rowcount
+            self._conn.commit()
+            self.stats["evicted"] += expired + surplus
+        return expired + surplus
@@ -0,0 +1,264 @@
+# local_retrieval.py
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from answer_cache import hashing_embedding, normalize_query
+from timestamp_index import format_timestamp, parse_transcript
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(normalize_query(text))
+
+
+def chunk_segments(file_id: str, segments, window: float = 60.0, max_chars: int = 1200) -> list:
+    """Group consecutive transcript segments into chunks of about window seconds
+
+    Every segment keeps its timestamp inside the chunk text, so answers built
+    from a chunk can still cite exact times.
+    """
+    chunks, lines, start, end, size = [], [], None, None, 0
+    for seg_start, seg_end, text in sorted(segments, key=lambda s: s[0]):
+        if not text:
+            continue
+        if lines and (seg_start - start >= window or size + len(text) > max_chars):
+            chunks.append({"file_id": file_id, "start": start, "end": end, "text": "\n".join(lines)})
+            lines, size = [], 0
+        if not lines:
+            start = seg_start
+        end = seg_end if seg_end is not None else seg_start
+        lines.append(f"[{format_timestamp(seg_start)}] {text}")
+        size += len(text)
+    if lines:
+        chunks.append({"file_id": file_id, "start": start, "end": end, "text": "\n".join(lines)})
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts with an in-memory inverted index"""
+
+    def __init__(self, texts, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        total = len(self.lengths)
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 10, rows: range = None) -> list:
+        """(score, doc_id) of the k best chunks, best first; rows limits the chunks scored"""
+        scores = {}
+        k1, b, average = self.k1, self.b, self.average_length or 1.0
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                if rows is not None and doc_id not in rows:
+                    continue
+                norm = k1 * (1 - b + b * self.lengths[doc_id] / average)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+class HashingEmbedder:
+    """Dense version of the answer cache's hashed trigram vectors; needs no API"""
+
+    # Hashed trigrams only repeat the lexical match BM25 already makes, with collisions on top;
+    # fused at full weight they pushed BM25's hits out of the top k (recall@5 1.00 -> 0.40)
+    fusion_weight = 0.0
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+        self.name = f"hashing:{dimensions}"
+
+    def embed(self, texts) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index, value in hashing_embedding(normalize_query(text), self.dimensions).items():
+                matrix[row, index] = value
+        return matrix
+
+
+class OpenAIEmbedder:
+    """Embeddings API vectors, normalised so a dot product is the cosine"""
+
+    fusion_weight = 1.0
+
+    def __init__(self, client, model: str = "text-embedding-3-small", batch_size: int = 256):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai:{model}"
+
+    def embed(self, texts) -> np.ndarray:
+        rows = []
+        for i in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model, input=list(texts[i:i + self.batch_size]))
+            rows.extend(item.embedding for item in response.data)
+        matrix = np.asarray(rows, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+def make_embedder(name: str, client=None):
+    """Embedder recorded in an index's metadata, e.g. "hashing:512" or "openai:text-embedding-3-small" """
+    kind, _, option = name.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(int(option or 512))
+    if kind == "openai":
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI()
+        return OpenAIEmbedder(client, option or "text-embedding-3-small")
+    raise ValueError(f"Unknown embedder {name}")
+
+
+def top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> list:
+    """(scores, rows) per query: one matrix product for the batch, then a partial sort"""
+    scores = queries @ matrix.T
+    k = min(k, matrix.shape[0])
+    if k <= 0:
+        return [(np.empty(0), np.empty(0, dtype=int)) for _ in range(len(queries))]
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    results = []
+    for row, cols in enumerate(candidates):
+        order = cols[np.argsort(-scores[row, cols])]
+        results.append((scores[row, order], order))
+    return results
+
+
+class LocalRetriever:
+    """Hybrid BM25 + dense retrieval over chunks saved in a directory
+
+    chunks.json holds the chunk texts and the embedder name, vectors.npy the
+    normalised chunk embeddings, which are memory-mapped rather than read into
+    memory. Results from both rankings are merged with reciprocal rank fusion,
+    the dense one weighted by dense_weight; by default the embedder's
+    fusion_weight, which leaves the hashing embedder out entirely.
+    """
+
+    def __init__(self, directory: str, client=None, rrf_k: int = 60, dense_weight: float = None):
+        self.directory = directory
+        self.rrf_k = rrf_k
+        with open(os.path.join(directory, "chunks.json"), encoding="utf-8") as f:
+            data = json.load(f)
+        self.chunks = data["chunks"]
+        self.embedder = make_embedder(data["embedder"], client)
+        self.dense_weight = self.embedder.fusion_weight if dense_weight is None else dense_weight
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.bm25 = BM25Index(chunk["text"] for chunk in self.chunks)
+        # build() writes each video's chunks consecutively, so a video is one row range
+        self.file_rows = {}
+        for row, chunk in enumerate(self.chunks):
+            rows = self.file_rows.get(chunk["file_id"])
+            if rows is not None and rows.stop != row:
+                raise ValueError(f"Chunks of {chunk['file_id']} are not contiguous; rebuild the index")
+            self.file_rows[chunk["file_id"]] = range(rows.start if rows else row, row + 1)
+        self.stats = {"queries": 0}
+
+    @staticmethod
+    def build(directory: str, transcripts: dict, embedder, window: float = 60.0) -> int:
+        """Chunk and embed transcripts ({file_id: path}) into directory; returns the chunk count"""
+        chunks = []
+        for file_id, path in transcripts.items():
+            with open(path, encoding="utf-8") as f:
+                chunks.extend(chunk_segments(file_id, parse_transcript(f.read(), path), window))
+        vectors = embedder.embed([chunk["text"] for chunk in chunks])
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), vectors)
+        with open(os.path.join(directory, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump({"embedder": embedder.name, "chunks": chunks}, f, ensure_ascii=False)
+        return len(chunks)
+
+    def search_many(self, queries, k: int = 5, file_id: str = None, candidates: int = 50) -> list:
+        """Top-k chunks per query; dense scores for the whole batch come from one matrix product
+
+        With a file_id only that video's rows are scored, so it gets its
+        chunks however strongly other videos match.
+        """
+        self.stats["queries"] += len(queries)
+        rows = range(len(self.chunks))
+        if file_id is not None:
+            rows = self.file_rows.get(file_id, range(0))
+        if self.dense_weight:
+            dense = top_k(self.vectors[rows.start:rows.stop], self.embedder.embed(list(queries)), candidates)
+        else:
+            # No embedding or matrix product when the dense ranking would not count
+            dense = [(None, np.empty(0, dtype=int))] * len(queries)
+        results = []
+        for query, (_, dense_rows) in zip(queries, dense):
+            fused = {}
+            for rank, row in enumerate(dense_rows.tolist()):
+                row += rows.start
+                fused[row] = fused.get(row, 0.0) + self.dense_weight / (self.rrf_k + rank + 1)
+            for rank, (_, row) in enumerate(self.bm25.search(query, candidates, rows)):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+            ranked = sorted(fused, key=fused.get, reverse=True)
+            results.append([self.chunks[row] for row in ranked[:k]])
+        return results
+
+    def search(self, query: str, k: int = 5, file_id: str = None) -> list:
+        return self.search_many([query], k, file_id)[0]
+
+
+def chat_messages(instructions: str, chunks, history, question: str) -> list:
+    """Chat completion messages: instructions and retrieved excerpts, recent turns, the question"""
+    context = "\n\n".join(
+        f"Excerpt {i + 1} (video {chunk['file_id']}, {format_timestamp(chunk['start'])}):\n{chunk['text']}"
+        for i, chunk in enumerate(chunks)
+    )
+    system = (
+        f"{instructions}\n\nAnswer only from these transcript excerpts and cite their timestamps. "
+        f"Say so if they do not contain the answer.\n\n{context}"
+    )
+    return [{"role": "system", "content": system}, *history, {"role": "user", "content": question}]
+
+
+def answer_locally(client, retriever: LocalRetriever, instructions: str, question: str, history=(),
+                   file_id: str = None, model: str = "gpt-4o-mini", k: int = 5):
+    """Retrieve chunks locally and answer with a single chat completion, no thread or run
+
+    Returns (answer text, completion) so the caller can account its usage.
+    """
+    chunks = retriever.search(question, k, file_id)
+    response = client.chat.completions.create(
+        model=model,
+        messages=chat_messages(instructions, chunks, list(history), question)
+    )
+    return response.choices[0].message.content or "", response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local retrieval index from transcripts")
+    parser.add_argument("--dir", default=os.getenv("LOCAL_RETRIEVAL_DIR", "retrieval_index"))
+    parser.add_argument("--embedder", default="hashing:512", help='"hashing:<dims>" or "openai:<model>"')
+    parser.add_argument("--window", type=float, default=60.0, help="seconds of transcript per chunk")
+    parser.add_argument("transcripts", nargs="+", metavar="FILE_ID=PATH")
+    args = parser.parse_args()
+
+    transcripts = dict(item.split("=", 1) for item in args.transcripts)
+    count = LocalRetriever.build(args.dir, transcripts, make_embedder(args.embedder), args.window)
+    print(f"{count} chunks from {len(transcripts)} transcripts -> {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
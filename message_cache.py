@@ -0,0 +1,70 @@
+# message_cache.py
+import uuid
+
+
+class ConversationCache:
+    """Already-processed messages of one thread, kept in chronological order
+
+    Each message is cleaned and timestamp-linked once, when it is first seen;
+    later turns only fetch what comes after the newest cached message ID.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        # Identifies this conversation to the message list component, also before a thread exists
+        self.key = uuid.uuid4().hex
+        self.entries = []
+        self.last_message_id = None
+        self._seen = set()
+
+    @classmethod
+    def restore(cls, key: str, thread_id: str, entries):
+        """Rebuild a cache from stored entries, e.g. from the history store"""
+        cache = cls(thread_id)
+        cache.key = key
+        for entry in entries:
+            cache.entries.append(entry)
+            if entry["id"] and not entry["id"].startswith("local-"):
+                cache._seen.add(entry["id"])
+                cache.last_message_id = entry["id"]
+        return cache
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add_message(self, message, process) -> bool:
+        """Process and store a message object unless it is already cached"""
+        if message.id in self._seen:
+            return False
+        blocks = [process(content.text.value) for content in message.content if content.type == 'text']
+        self.entries.append({"id": message.id, "role": message.role, "html": blocks})
+        self._seen.add(message.id)
+        self.last_message_id = message.id
+        return True
+
+    def add_local(self, role: str, blocks):
+        """Show already-processed content that does not exist in the thread, e.g. a cached answer"""
+        self.entries.append({"id": f"local-{len(self.entries)}", "role": role, "html": list(blocks)})
+
+    def answer_blocks(self):
+        """Processed blocks of the newest assistant message"""
+        for entry in reversed(self.entries):
+            if entry["role"] == "assistant":
+                return entry["html"]
+        return []
+
+    def sync(self, client, process) -> int:
+        """Fetch and process only the messages newer than the last cached one"""
+        params = {"thread_id": self.thread_id, "order": "asc"}
+        if self.last_message_id:
+            params["after"] = self.last_message_id
+
+        added = 0
+        # Iterating the page follows the cursor across pages
+        for message in client.beta.threads.messages.list(**params):
+            added += self.add_message(message, process)
+        return added
+
+    def newest_first(self):
+        """Entries in the order the thread listing used to show them"""
+        return reversed(self.entries)
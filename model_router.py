@@ -0,0 +1,118 @@
+# model_router.py
+import os
+import re
+import threading
+from collections import deque
+
+from streaming import percentile
+from telemetry import DEFAULT_BUCKETS, Histogram
+from text_processing import TIMESTAMP_RE
+
+TIMESTAMP = "timestamp"
+FACTUAL = "factual"
+ANALYTICAL = "analytical"
+QUERY_CLASSES = (TIMESTAMP, FACTUAL, ANALYTICAL)
+
+# "When is X mentioned" in the five UI languages; a timestamp in the question counts too
+_WHEN_RE = re.compile(
+    r'^\s*(?:when|at what (?:time|point)|bila|bilakah|pada minit)\b|何时|什么时候|哪个时间|متى|எப்போது',
+    re.I
+)
+# Questions that need reasoning over scenes rather than looking something up
+_ANALYTICAL_RE = re.compile(
+    r'\b(?:why|how|explain|analy[sz]e|analysis|compare|contrast|evaluate|interpret|discuss|summari[sz]e|'
+    r'describe|implications?|impact|themes?|symbolism|creative|innovative|suggest|recommend|'
+    r'mengapa|kenapa|bagaimana|terangkan|huraikan|jelaskan|bandingkan|analisis|ringkaskan|kreatif)\b'
+    r'|为什么|为何|如何|怎么|分析|比较|解释|总结|评价|'
+    r'لماذا|كيف|حلل|تحليل|قارن|اشرح|لخص|'
+    r'ஏன்|எப்படி|விளக்கு|பகுப்பாய்வு|ஒப்பிடு|சுருக்கம்',
+    re.I
+)
+_CJK_RE = re.compile(r'[㐀-鿿]')
+
+
+def query_length(query: str) -> int:
+    """Words in the query; Chinese has no spaces, so two characters count as a word"""
+    return max(len(query.split()), len(_CJK_RE.findall(query)) // 2)
+
+
+def classify(query: str, factual_max_words: int = 14) -> str:
+    """timestamp, factual or analytical, from the query text alone"""
+    if _ANALYTICAL_RE.search(query):
+        return ANALYTICAL
+    if TIMESTAMP_RE.search(query) or _WHEN_RE.search(query):
+        return TIMESTAMP
+    if query_length(query) <= factual_max_words:
+        return FACTUAL
+    # Long questions without a cue still get the heavy model
+    return ANALYTICAL
+
+
+class ModelRouter:
+    """Send each run to a fast or the heavy model depending on what the query asks
+
+    Queries are classified locally, without an API call, before the run is
+    created; classes in fast_classes get fast_model through the run's model
+    override, the rest run on heavy_model, or the assistant's own model when
+    heavy_model is empty. Decisions and per-class latency go to the console
+    and to /metrics, so the split can be tuned and A/B tested with
+    benchmarks/bench_query_path.py --route ab.
+    """
+
+    def __init__(self, fast_model: str = "gpt-4o-mini", heavy_model: str = None, factual_max_words: int = 14,
+                 fast_classes=(TIMESTAMP, FACTUAL)):
+        self.fast_model = fast_model
+        self.heavy_model = heavy_model or None
+        self.factual_max_words = factual_max_words
+        self.fast_classes = frozenset(fast_classes)
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self.latency = Histogram(
+            "ramp_routed_query_seconds", "End-to-end latency of routed queries by class and model",
+            ("query_class", "model"), DEFAULT_BUCKETS
+        )
+        self.stats = {query_class: 0 for query_class in QUERY_CLASSES}
+
+    def choose(self, query: str):
+        """(query class, model override or None for the assistant's model)"""
+        query_class = classify(query, self.factual_max_words)
+        return query_class, self.fast_model if query_class in self.fast_classes else self.heavy_model
+
+    def route(self, query: str):
+        """choose(), counted and logged"""
+        query_class, model = self.choose(query)
+        with self._lock:
+            self.stats[query_class] += 1
+        os.write(1, f"\n[route] class={query_class} model={model or 'assistant'} words={query_length(query)}\n".encode())
+        return query_class, model
+
+    @staticmethod
+    def run_kwargs(model: str) -> dict:
+        """The run's model override; nothing when the assistant's own model is used"""
+        return {"model": model} if model else {}
+
+    def observe(self, query_class: str, model: str, seconds: float):
+        """Record a routed query's latency and write the class's running p50/p95"""
+        model = model or "assistant"
+        with self._lock:
+            self.latency.observe((query_class, model), seconds)
+            samples = self._latencies.setdefault((query_class, model), deque(maxlen=500))
+            samples.append(seconds)
+            p50, p95 = percentile(list(samples), 50), percentile(list(samples), 95)
+            count = len(samples)
+        os.write(1, (
+            f"\n[route/{query_class}] model={model} total={seconds:.2f}s "
+            f"(p50={p50:.2f}s p95={p95:.2f}s, n={count})\n"
+        ).encode())
+
+    def render(self) -> list:
+        """Prometheus lines; registered with the telemetry exporter"""
+        with self._lock:
+            lines = self.latency.render()
+            stats = dict(self.stats)
+        lines += [
+            "# HELP ramp_routed_queries_total Queries by the class the router gave them",
+            "# TYPE ramp_routed_queries_total counter",
+        ]
+        lines += [f'ramp_routed_queries_total{{query_class="{name}"}} {count}' for name, count in stats.items()]
+        return lines
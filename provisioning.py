@@ -0,0 +1,173 @@
+# provisioning.py
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+# Metadata keys that tie a remote assistant to an entry of the assistant catalog
+ASSISTANT_KEY_FIELD = "app_assistant_key"
+CONFIG_HASH_FIELD = "config_hash"
+
+
+def assistant_spec(assistant_key: str, config: dict, base_instructions: str) -> dict:
+    """assistants.create/update arguments for one configured assistant, without the hash"""
+    return {
+        "name": config["name"],
+        "instructions": f"{base_instructions}\n\nSPECIFIC INSTRUCTIONS:\n{config['additional_instructions']}",
+        "model": config.get("model", "gpt-4-turbo-preview"),
+        "tools": config.get("tools", [{"type": "retrieval"}]),
+        "metadata": {
+            "vector_store": config["vector_store"],
+            ASSISTANT_KEY_FIELD: assistant_key,
+        },
+    }
+
+
+def config_hash(spec: dict) -> str:
+    """Stable digest of an assistant spec; any change to it means the assistant needs an update"""
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class AssistantRegistry:
+    """Local JSON file mapping each assistant key to its ID and config hash
+
+    Reading it is all startup needs; the API is only consulted when a
+    configuration no longer matches the hash recorded here.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            os.write(1, f"\nIgnoring unreadable assistant registry {self.path}: {e}\n".encode())
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self, entries: dict):
+        # Write-then-rename so a crash never leaves a truncated registry
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+
+    def assistant_ids(self) -> dict:
+        """Assistant key -> assistant ID"""
+        return {key: entry["id"] for key, entry in self.load().items() if entry.get("id")}
+
+
+class AssistantProvisioner:
+    """Create or update configured assistants idempotently
+
+    Each assistant carries its key and config hash in metadata. Provisioning
+    skips assistants whose registry entry already has the current hash, and
+    otherwise finds the remote assistant by its key: an unchanged hash is
+    adopted, a changed one is updated in place, and only a missing assistant
+    is created. Repeated runs therefore never create duplicates.
+    """
+
+    def __init__(self, client, registry: AssistantRegistry):
+        self.client = client
+        self.registry = registry
+        self.stats = {"created": 0, "updated": 0, "unchanged": 0, "api_calls": 0}
+
+    def _remote_assistants(self) -> dict:
+        """Existing assistants by key; the most recently created wins if there are duplicates"""
+        remote = {}
+        self.stats["api_calls"] += 1
+        # Iterating the page follows the cursor across pages; newest first
+        for assistant in self.client.beta.assistants.list(order="desc", limit=100):
+            key = (assistant.metadata or {}).get(ASSISTANT_KEY_FIELD)
+            if key and key not in remote:
+                remote[key] = assistant
+        return remote
+
+    def current_instructions(self, configs: dict, base_instructions: str) -> dict:
+        """Assistant ID -> instructions for registry entries that match their configuration"""
+        entries = self.registry.load()
+        known = {}
+        for assistant_key, config in configs.items():
+            entry = entries.get(assistant_key, {})
+            spec = assistant_spec(assistant_key, config, base_instructions)
+            if entry.get("id") and entry.get(CONFIG_HASH_FIELD) == config_hash(spec):
+                known[entry["id"]] = spec["instructions"]
+        return known
+
+    def provision(self, configs: dict, base_instructions: str, force: bool = False) -> dict:
+        """Bring every configured assistant up to date; returns assistant key -> ID"""
+        entries = self.registry.load()
+        remote = None
+        ids = {}
+        changed = False
+
+        for assistant_key, config in configs.items():
+            spec = assistant_spec(assistant_key, config, base_instructions)
+            digest = config_hash(spec)
+            entry = entries.get(assistant_key, {})
+            if not force and entry.get("id") and entry.get(CONFIG_HASH_FIELD) == digest:
+                self.stats["unchanged"] += 1
+                ids[assistant_key] = entry["id"]
+                continue
+
+            if remote is None:
+                remote = self._remote_assistants()
+            spec["metadata"][CONFIG_HASH_FIELD] = digest
+            existing = remote.get(assistant_key)
+            if existing is not None and (existing.metadata or {}).get(CONFIG_HASH_FIELD) == digest:
+                self.stats["unchanged"] += 1
+                assistant_id = existing.id
+            elif existing is not None:
+                self.stats["api_calls"] += 1
+                assistant_id = self.client.beta.assistants.update(existing.id, **spec).id
+                self.stats["updated"] += 1
+            else:
+                self.stats["api_calls"] += 1
+                assistant_id = self.client.beta.assistants.create(**spec).id
+                self.stats["created"] += 1
+
+            entries[assistant_key] = {
+                "id": assistant_id,
+                CONFIG_HASH_FIELD: digest,
+                "vector_store": config["vector_store"],
+            }
+            ids[assistant_key] = assistant_id
+            changed = True
+
+        if changed:
+            self.registry.save(entries)
+        return ids
+
+
+def main():
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    from assistant_catalog import AssistantCatalog
+    from assistant_configs import BASE_INSTRUCTIONS
+
+    parser = argparse.ArgumentParser(description="Create or update the configured assistants")
+    parser.add_argument("--catalog", default=os.getenv("ASSISTANT_CATALOG_PATH", "assistants.json"))
+    parser.add_argument("--registry", default=os.getenv("ASSISTANT_REGISTRY_PATH", "assistant_registry.json"))
+    parser.add_argument("--force", action="store_true", help="check the API even when the registry is current")
+    args = parser.parse_args()
+
+    load_dotenv()
+    provisioner = AssistantProvisioner(OpenAI(), AssistantRegistry(args.registry))
+    configs = AssistantCatalog(args.catalog).configs()
+    for assistant_key, assistant_id in provisioner.provision(configs, BASE_INSTRUCTIONS, args.force).items():
+        print(f"{assistant_key}: {assistant_id}")
+    print(f"stats: {provisioner.stats}")
+
+
+if __name__ == "__main__":
+    main()
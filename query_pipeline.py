@@ -0,0 +1,107 @@
+# query_pipeline.py
+# Thread, message and run steps of a query, shared by the UI and background jobs
+import threading
+
+from text_processing import process_text
+
+
+# Formatting rules sent with every run rather than stored in the thread, so they
+# are not part of the history that is re-read and billed on each turn. Kept
+# compact because every run pays for them again.
+FORMATTING_RULES = """CRITICAL FORMATTING RULES:
+1. NEVER include source references (†source, [source], etc.)
+2. ONLY use timestamps in HH:MM:SS format
+3. ONLY use brackets for timestamps like: At [HH:MM:SS]
+4. Remove ALL source annotations before responding"""
+
+
+def run_instructions(vector_store_id: str, assistant_name: str, language: str) -> str:
+    """Per-run additional instructions carrying the answer language and the formatting rules
+
+    The language used to be a "[Language: ...]" prefix on every user message,
+    which then stayed in the thread and was re-read on every later turn.
+    """
+    return f"Use vector store {vector_store_id} for {assistant_name}. Answer in {language}.\n{FORMATTING_RULES}"
+
+
+class AssistantInstructions:
+    """Base instructions of each assistant, fetched once per process
+
+    threads.createAndRun takes no additional_instructions, so a first turn has
+    to override instructions with the assistant's own followed by the run rules.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instructions = {}
+
+    def remember(self, assistant_id: str, instructions: str) -> str:
+        with self._lock:
+            self._instructions[assistant_id] = instructions or ""
+        return instructions or ""
+
+    def cached(self, assistant_id: str):
+        with self._lock:
+            return self._instructions.get(assistant_id)
+
+    def get(self, client, assistant_id: str) -> str:
+        instructions = self.cached(assistant_id)
+        if instructions is None:
+            instructions = self.remember(assistant_id, client.beta.assistants.retrieve(assistant_id).instructions)
+        return instructions
+
+    async def get_async(self, async_client, assistant_id: str) -> str:
+        instructions = self.cached(assistant_id)
+        if instructions is None:
+            assistant = await async_client.beta.assistants.retrieve(assistant_id)
+            instructions = self.remember(assistant_id, assistant.instructions)
+        return instructions
+
+
+# Shared by every session in the process
+ASSISTANT_INSTRUCTIONS = AssistantInstructions()
+
+
+def turn_kwargs(assistant_id: str, vector_store_id: str, assistant_name: str, language: str, **budget) -> dict:
+    """Run arguments for a question on an existing thread; budget adds ContextBudget.run_kwargs()"""
+    return {
+        "assistant_id": assistant_id,
+        "additional_instructions": run_instructions(vector_store_id, assistant_name, language),
+        **budget,
+    }
+
+
+def first_turn_kwargs(base_instructions: str, assistant_id: str, vector_store_id: str,
+                      assistant_name: str, language: str, content: str, **budget) -> dict:
+    """threads.createAndRun arguments that create the thread, post the question and start the run in one call"""
+    return {
+        "assistant_id": assistant_id,
+        "instructions": f"{base_instructions}\n{run_instructions(vector_store_id, assistant_name, language)}",
+        "thread": {"messages": [{"role": "user", "content": content}]},
+        **budget,
+    }
+
+
+def answer_once(client, run_waiter, assistant_id: str, vector_store_id: str, assistant_name: str,
+                file_id: str, language: str, query: str, should_cancel=None):
+    """Ask one question on a fresh thread and return the processed answer blocks
+
+    Raises RuntimeError when the run does not complete.
+    """
+    run = client.beta.threads.create_and_run(**first_turn_kwargs(
+        ASSISTANT_INSTRUCTIONS.get(client, assistant_id),
+        assistant_id,
+        vector_store_id,
+        assistant_name,
+        language,
+        query
+    ))
+    outcome = run_waiter.wait(run.thread_id, run.id, should_cancel=should_cancel)
+    if not outcome.completed:
+        raise RuntimeError(f"Run failed with status: {outcome.status} ({outcome.reason})")
+
+    blocks = []
+    for reply in client.beta.threads.messages.list(thread_id=run.thread_id, order="asc"):
+        if reply.role == "assistant":
+            blocks.extend(process_text(c.text.value, file_id) for c in reply.content if c.type == 'text')
+    return blocks
@@ -0,0 +1,317 @@
+# rate_limiter.py
+import asyncio
+import contextvars
+import email.utils
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from telemetry import DEFAULT_BUCKETS, Histogram
+
+# Lower goes first: people waiting on an answer, then suggestion warm-up, then batch jobs
+INTERACTIVE = 0
+WARMUP = 1
+BATCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", WARMUP: "warmup", BATCH: "batch"}
+
+_PRIORITY = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+# Requests that start a run; their tokens are only known once the run finishes
+_RUN_PATHS = ("/runs", "/chat/completions")
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Send the API requests made inside the with block at this priority"""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def with_priority(priority: int, fn):
+    """Wrap fn so it runs at the given priority, e.g. on a worker thread"""
+    def wrapper(*args, **kwargs):
+        with request_priority(priority):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def retry_after(headers, default: float) -> float:
+    """Seconds to back off from Retry-After (or OpenAI's retry-after-ms), else default"""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                parsed = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                # Neither seconds nor an HTTP date: use the backoff
+                return default
+            if parsed is not None:
+                return max(0.0, parsed.timestamp() - time.time())
+    return default
+
+
+class TokenBucket:
+    """Refills per_minute units over a minute; 0 means unlimited
+
+    The level may go negative when actual usage turns out higher than what
+    was taken up front, which delays the next takers until it is paid back.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until amount (capped at capacity) is available"""
+        if not self.capacity:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        if self.capacity:
+            self.level -= amount
+
+
+class RateLimiter:
+    """Process-wide requests-per-minute and tokens-per-minute limits for OpenAI calls
+
+    Every request waits in one priority queue and only the head of the queue
+    may take from the buckets, so interactive questions overtake warm-up and
+    batch work that is still waiting. A 429 pauses the whole queue for the
+    Retry-After the API asked for, since every session shares the same limit.
+    Requests that start a run are charged run_tokens up front; settle() swaps
+    that estimate for the run's real usage once it is known.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, run_tokens: int = 4000,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.run_tokens = run_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.paused_until = 0.0
+        self._ready = threading.Condition()
+        self._queue = []
+        self._order = itertools.count()
+        self.waits = Histogram(
+            "ramp_rate_limit_wait_seconds", "Time OpenAI requests waited for the client-side rate limit",
+            ("priority",), DEFAULT_BUCKETS
+        )
+        self.stats = {"requests": 0, "waited": 0, "wait_seconds": 0.0, "max_queue_depth": 0,
+                      "throttled": 0, "retries": 0, "gave_up": 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def tokens_for(self, request: httpx.Request) -> int:
+        """Tokens charged up front for a request"""
+        if request.method == "POST" and request.url.path.endswith(_RUN_PATHS):
+            return self.run_tokens
+        return 0
+
+    def _enqueue(self, priority: int, order) -> tuple:
+        ticket = (priority, next(self._order) if order is None else order)
+        with self._ready:
+            heapq.heappush(self._queue, ticket)
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+        return ticket
+
+    def _try_take(self, ticket: tuple, tokens: int):
+        """None once taken, otherwise seconds to wait before trying again; holds the lock"""
+        if self._queue[0] != ticket:
+            return None
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        delay = max(self.paused_until - now, self.requests.delay(1), self.tokens.delay(tokens))
+        if delay > 0:
+            return delay
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        heapq.heappop(self._queue)
+        self._ready.notify_all()
+        return 0.0
+
+    def _leave(self, ticket: tuple):
+        with self._ready:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._ready.notify_all()
+
+    def _record(self, ticket: tuple, waited: float):
+        with self._ready:
+            self.stats["requests"] += 1
+            if waited > 0.001:
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += waited
+            self.waits.observe((PRIORITY_NAMES.get(ticket[0], str(ticket[0])),), waited)
+
+    def acquire(self, tokens: int = 0, priority: int = None, order=None):
+        """Block until the request may be sent; returns its place in line for retries
+
+        Passing the returned order back in keeps a retried request ahead of
+        later ones of the same priority.
+        """
+        ticket = self._enqueue(current_priority() if priority is None else priority, order)
+        started = time.monotonic()
+        try:
+            with self._ready:
+                while True:
+                    delay = self._try_take(ticket, tokens)
+                    if delay == 0.0:
+                        break
+                    # Woken early when the head of the queue moves
+                    self._ready.wait(delay)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record(ticket, time.monotonic() - started)
+        return ticket[1]
+
+    async def acquire_async(self, tokens: int = 0, priority: int = None, order=None):
+        """acquire() for the event loop: sleeps instead of blocking the loop"""
+        ticket = self._enqueue(current_priority() if priority is None else priority, order)
+        started = time.monotonic()
+        try:
+            while True:
+                with self._ready:
+                    delay = self._try_take(ticket, tokens)
+                if delay == 0.0:
+                    break
+                # Not at the head yet: check back soon instead of waiting on the condition
+                await asyncio.sleep(0.02 if delay is None else delay)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record(ticket, time.monotonic() - started)
+        return ticket[1]
+
+    def throttled(self, response: httpx.Response, tokens: int, attempt: int) -> bool:
+        """Handle a 429: pause the queue and refund the tokens; False when it should not be retried"""
+        with self._ready:
+            self.stats["throttled"] += 1
+            # Out of credit rather than over the rate; waiting won't help
+            if b"insufficient_quota" in response.content or attempt >= self.max_retries:
+                self.stats["gave_up"] += 1
+                return False
+            backoff = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            delay = min(self.max_delay, retry_after(response.headers, backoff))
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.tokens.take(-tokens)
+            self.stats["retries"] += 1
+            self._ready.notify_all()
+        return True
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the tokens bucket once a run reports what it really used"""
+        with self._ready:
+            self.tokens.take(actual - estimated)
+
+    def render(self) -> list:
+        """Prometheus lines for the queue; registered with the telemetry exporter"""
+        with self._ready:
+            lines = self.waits.render()
+            depth = len(self._queue)
+            throttled = self.stats["throttled"]
+        return lines + [
+            "# HELP ramp_rate_limit_queue_depth OpenAI requests waiting for the client-side rate limit",
+            "# TYPE ramp_rate_limit_queue_depth gauge",
+            f"ramp_rate_limit_queue_depth {depth}",
+            "# HELP ramp_rate_limit_throttled_total 429 responses from the API",
+            "# TYPE ramp_rate_limit_throttled_total counter",
+            f"ramp_rate_limit_throttled_total {throttled}",
+        ]
+
+
+# The OpenAI client reads this and does not retry the response itself
+_NO_RETRY = "x-should-retry"
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that waits for the rate limiter and retries 429s
+
+    A 429 it gives up on is marked so the OpenAI client doesn't retry it
+    again, which would multiply the attempts; the client still retries
+    server errors and timeouts.
+    """
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = self.limiter.tokens_for(request)
+        order, attempt = None, 0
+        while True:
+            order = self.limiter.acquire(tokens, order=order)
+            response = self.transport.handle_request(request)
+            if response.status_code != 429:
+                return response
+            response.read()
+            if not self.limiter.throttled(response, tokens, attempt):
+                response.headers[_NO_RETRY] = "false"
+                return response
+            response.close()
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """RateLimitedTransport for the AsyncOpenAI client"""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = self.limiter.tokens_for(request)
+        order, attempt = None, 0
+        while True:
+            order = await self.limiter.acquire_async(tokens, order=order)
+            response = await self.transport.handle_async_request(request)
+            if response.status_code != 429:
+                return response
+            await response.aread()
+            if not self.limiter.throttled(response, tokens, attempt):
+                response.headers[_NO_RETRY] = "false"
+                return response
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,114 @@
+# rendering.py
+import json
+import os
+import time
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+with open(os.path.join(_FRONTEND, "app.css"), encoding="utf-8") as _f:
+    APP_CSS = _f.read()
+
+# Served from frontend/message_list by Streamlit's component server
+_message_list = components.declare_component("message_list", path=os.path.join(_FRONTEND, "message_list"))
+
+
+def inject_static_assets(slot):
+    """Add the app stylesheet to the page head once per browser session
+
+    A <style> block in st.markdown has to be sent again on every rerun or it
+    disappears with the other stale elements. Written into the parent page's
+    head it stays until the tab is reloaded, which starts a new session. slot
+    is a container emitted on every rerun, so the frame doesn't shift the
+    position of the elements after it.
+    """
+    if st.session_state.get("static_assets_injected"):
+        return
+    with slot:
+        components.html(
+            "<script>"
+            "const doc = window.parent.document;"
+            "if (!doc.getElementById('ramp-app-css')) {"
+            "  const style = doc.createElement('style');"
+            "  style.id = 'ramp-app-css';"
+            f"  style.textContent = {json.dumps(APP_CSS)};"
+            "  doc.head.appendChild(style);"
+            "}"
+            "</script>",
+            height=0
+        )
+    st.session_state.static_assets_injected = True
+
+
+def store_cookie(slot, name: str, value: str, max_age: float):
+    """Set a cookie on the app's origin once per browser session
+
+    Streamlit reads cookies (st.context.cookies) but cannot set them, so like
+    inject_static_assets a zero-height frame writes it into the parent page.
+    """
+    if st.session_state.get(f"cookie_{name}") == value:
+        return
+    cookie = f"{name}={value}; Path=/; Max-Age={int(max_age)}; SameSite=Strict"
+    with slot:
+        components.html(
+            "<script>"
+            "const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';"
+            f"window.parent.document.cookie = {json.dumps(cookie)} + secure;"
+            "</script>",
+            height=0
+        )
+    st.session_state[f"cookie_{name}"] = value
+
+
+def message_list_args(conversation_key: str, entries, base: int) -> dict:
+    """Component arguments carrying only the entries past base"""
+    return {
+        "conversation": conversation_key,
+        "base": base,
+        "messages": [
+            {"id": entry["id"], "role": entry["role"], "html": entry["html"]}
+            for entry in entries[base:]
+        ],
+    }
+
+
+class MessageList:
+    """Conversation shown by a component that keeps the messages it was already sent
+
+    Messages are append-only, so the browser's copy is described by a count.
+    Each rerun sends only the messages past what this session already sent;
+    a rerun without a new turn sends none. When the frame is remounted or
+    misses an update it reports the count it actually holds and the next
+    rerun resends from there.
+    """
+
+    def __init__(self, key: str = "message_list"):
+        self.key = key
+
+    def render(self, conversation, title: str = "") -> dict:
+        """Show the conversation; returns what was sent and how long it took"""
+        started = time.perf_counter()
+        state = st.session_state.get("message_list_state") or {"conversation": None, "sent": 0, "report": None}
+        entries = conversation.entries if conversation is not None else []
+        conversation_key = conversation.key if conversation is not None else None
+
+        base = state["sent"] if state["conversation"] == conversation_key else 0
+        reported = st.session_state.get(self.key)
+        if reported and reported.get("report") != state["report"]:
+            # A new report from the frame: trust its count over our record
+            state["report"] = reported.get("report")
+            base = reported.get("count", 0) if reported.get("conversation") == conversation_key else 0
+        base = min(base, len(entries))
+
+        args = message_list_args(conversation_key, entries, base)
+        _message_list(title=title if entries else "", key=self.key, default=None, **args)
+        state.update(conversation=conversation_key, sent=len(entries))
+        st.session_state.message_list_state = state
+        return {
+            "messages": len(entries),
+            "sent": len(args["messages"]),
+            "bytes": len(json.dumps(args["messages"], ensure_ascii=False).encode()),
+            "seconds": time.perf_counter() - started,
+        }
@@ -0,0 +1,182 @@
+# run_pool.py
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import APIError
+
+from async_service import TurnResult
+from run_waiter import TERMINAL_STATUSES
+
+
+class RunJob:
+    """One assistant turn running in the background for a session"""
+
+    def __init__(self, job_id: str, session_id: str, thread_id: str):
+        self.id = job_id
+        self.session_id = session_id
+        self.thread_id = thread_id
+        self.run_id = None
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.submitted = time.monotonic()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class RunPool:
+    """Run assistant turns off the Streamlit script thread so reruns can't orphan them
+
+    A rerun or a second click abandons the script run that submitted a job,
+    but not the job: the next rerun picks up its result by job ID. Jobs
+    whose session has gone away are cancelled on the server, and finished
+    jobs nobody collects are dropped after result_ttl seconds. Cancelling
+    and waiting for a run to stop happen on a thread of their own.
+    """
+
+    def __init__(self, client, run_waiter, async_service=None, max_workers: int = 16,
+                 result_ttl: float = 600.0, is_session_active=None):
+        self.client = client
+        self.run_waiter = run_waiter
+        self.async_service = async_service
+        self.result_ttl = result_ttl
+        self.is_session_active = is_session_active
+        self._executor = None if async_service is not None else ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="run-pool"
+        )
+        self._cancellations = ThreadPoolExecutor(max_workers=4, thread_name_prefix="run-cancel")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self.stats = {"submitted": 0, "collected": 0, "cancelled": 0, "expired": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _execute(self, job: RunJob, after_message_id: str, run_kwargs: dict) -> TurnResult:
+        started = time.monotonic()
+        timings = {}
+        step = time.monotonic()
+        if job.thread_id is None:
+            run = self.client.beta.threads.create_and_run(**run_kwargs)
+            timings["thread_create_and_run"] = time.monotonic() - step
+        else:
+            run = self.client.beta.threads.runs.create(thread_id=job.thread_id, **run_kwargs)
+            timings["run_create"] = time.monotonic() - step
+        self._created(job, run)
+        step = time.monotonic()
+        outcome = self.run_waiter.wait(job.thread_id, run.id, cancel_event=job.cancel_event)
+        timings["run_wait"] = time.monotonic() - step
+        api_calls = 1 + outcome.polls
+        replies = []
+        if outcome.completed:
+            params = {"thread_id": job.thread_id, "order": "asc"}
+            if after_message_id:
+                params["after"] = after_message_id
+            api_calls += 1
+            step = time.monotonic()
+            replies = list(self.client.beta.threads.messages.list(**params))
+            timings["message_list"] = time.monotonic() - step
+        return TurnResult(job.thread_id, outcome, replies, 0.0, time.monotonic() - started, api_calls, timings)
+
+    @staticmethod
+    def _created(job: RunJob, run):
+        job.thread_id = run.thread_id
+        job.run_id = run.id
+
+    def submit(self, session_id: str, thread_id: str, after_message_id: str, **run_kwargs) -> RunJob:
+        """Start a run on a thread whose user message is already posted
+
+        With thread_id None the run_kwargs are threads.createAndRun arguments
+        and the job learns its thread once the run exists.
+        """
+        self.sweep()
+        job = RunJob(f"job_{next(self._ids)}", session_id, thread_id)
+        if self.async_service is not None:
+            job.future = self.async_service.run_turn(
+                thread_id,
+                after_message_id,
+                on_created=lambda run: self._created(job, run),
+                **run_kwargs
+            )
+        else:
+            job.future = self._executor.submit(self._execute, job, after_message_id, run_kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._count("submitted")
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def collect(self, job_id: str, timeout: float = None) -> TurnResult:
+        """Wait up to timeout for a job and hand over its result; the job is forgotten afterwards"""
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown or expired job {job_id}")
+        result = job.future.result(timeout=timeout)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        self._count("collected")
+        return result
+
+    def cancel(self, job_id: str, settle_timeout: float = 10.0):
+        """Stop a job and cancel its run in the background
+
+        Returns a Future that is True once the thread accepts new messages,
+        or False if the run had not stopped after settle_timeout seconds;
+        None when the job had no run yet.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.future is not None:
+            job.future.cancel()
+        self._count("cancelled")
+        if job.run_id is None:
+            return None
+        return self._cancellations.submit(self._cancel_run, job, settle_timeout)
+
+    def _cancel_run(self, job: RunJob, settle_timeout: float) -> bool:
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=job.thread_id, run_id=job.run_id)
+        except APIError:
+            # Already finished runs refuse to be cancelled
+            pass
+        deadline = time.monotonic() + settle_timeout
+        delay = 0.2
+        while time.monotonic() < deadline:
+            try:
+                run = self.client.beta.threads.runs.retrieve(thread_id=job.thread_id, run_id=job.run_id)
+                if run.status in TERMINAL_STATUSES:
+                    return True
+            except APIError:
+                # A failed poll is retried like a run still cancelling
+                pass
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 2, 2.0)
+        return False
+
+    def sweep(self):
+        """Cancel jobs of sessions that went away and drop results nobody collected"""
+        now = time.monotonic()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.done and now - job.submitted > self.result_ttl:
+                with self._lock:
+                    self._jobs.pop(job.id, None)
+                self._count("expired")
+            elif not job.done and self.is_session_active is not None and not self.is_session_active(job.session_id):
+                self.cancel(job.id, settle_timeout=0)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
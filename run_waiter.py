@@ -0,0 +1,178 @@
+# run_waiter.py
+import asyncio
+import random
+import threading
+import time
+
+
+# Statuses after which a run will not change any more
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired", "incomplete")
+
+
+class RunWaitTimeout(Exception):
+    """Raised when a run does not finish before the configured deadline"""
+
+
+class RunWaitCancelled(Exception):
+    """Raised when waiting is abandoned because the caller went away"""
+
+
+class RunOutcome:
+    """Final state of a run together with how much polling it took"""
+
+    def __init__(self, run, polls: int, elapsed: float):
+        self.run = run
+        self.status = run.status
+        self.polls = polls
+        self.elapsed = elapsed
+
+    @property
+    def completed(self) -> bool:
+        return self.status == "completed"
+
+    @property
+    def reason(self) -> str:
+        """Human readable reason for a run that did not complete"""
+        details = getattr(self.run, "incomplete_details", None) or getattr(self.run, "last_error", None)
+        if details is None:
+            return self.status
+        return getattr(details, "reason", None) or getattr(details, "message", None) or self.status
+
+
+class RunWaiter:
+    """Wait for an assistant run to finish using exponential backoff with jitter
+
+    The delay is capped at max_delay because a run is noticed up to one delay
+    after it finishes; at 4s that added more latency than most runs took.
+    """
+
+    def __init__(self, client, initial_delay: float = 0.25, max_delay: float = 1.0,
+                 multiplier: float = 2.0, jitter: float = 0.25, timeout: float = 180.0):
+        self.client = client
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+
+        # Counters are shared by every caller of this waiter
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "polls": 0, "max_polls": 0, "timeouts": 0, "cancelled": 0}
+
+    def next_delay(self, delay: float) -> float:
+        """Return the sleep before the next poll, with +/- jitter applied"""
+        spread = delay * self.jitter
+        return max(0.0, delay + random.uniform(-spread, spread))
+
+    def polls_per_run(self) -> float:
+        """Average number of retrieve calls made per finished run"""
+        with self._lock:
+            if not self.stats["runs"]:
+                return 0.0
+            return self.stats["polls"] / self.stats["runs"]
+
+    def _record(self, polls: int, outcome_key: str = None):
+        with self._lock:
+            self.stats["runs"] += 1
+            self.stats["polls"] += polls
+            self.stats["max_polls"] = max(self.stats["max_polls"], polls)
+            if outcome_key:
+                self.stats[outcome_key] += 1
+
+    def _cancel_run(self, thread_id: str, run_id: str):
+        """Best-effort server side cancel so an abandoned run stops using tokens"""
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception:
+            pass
+
+    def wait(self, thread_id: str, run_id: str, should_cancel=None, cancel_event: threading.Event = None,
+             on_requires_action=None, timeout: float = None) -> RunOutcome:
+        """Poll a run until it reaches a terminal state and return the outcome
+
+        should_cancel is called before every poll and cancel_event wakes the waiter
+        immediately when set; either one cancels the run and raises RunWaitCancelled.
+        on_requires_action receives the run and returns tool outputs to submit; without
+        it a run asking for tool calls is cancelled instead of waiting forever.
+        """
+        cancel_event = cancel_event or threading.Event()
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        delay = self.initial_delay
+        polls = 0
+
+        while True:
+            if cancel_event.is_set() or (should_cancel is not None and should_cancel()):
+                self._cancel_run(thread_id, run_id)
+                self._record(polls, "cancelled")
+                raise RunWaitCancelled(f"Stopped waiting for run {run_id}")
+
+            run = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+            polls += 1
+
+            if run.status in TERMINAL_STATUSES:
+                self._record(polls)
+                return RunOutcome(run, polls, time.monotonic() - started)
+
+            if run.status == "requires_action":
+                if on_requires_action is None:
+                    self._cancel_run(thread_id, run_id)
+                    self._record(polls)
+                    return RunOutcome(run, polls, time.monotonic() - started)
+                self.client.beta.threads.runs.submit_tool_outputs(
+                    thread_id=thread_id,
+                    run_id=run_id,
+                    tool_outputs=on_requires_action(run)
+                )
+                # Tool outputs restart generation, so poll eagerly again
+                delay = self.initial_delay
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._cancel_run(thread_id, run_id)
+                self._record(polls, "timeouts")
+                raise RunWaitTimeout(f"Run {run_id} still {run.status} after {timeout:.0f}s")
+
+            # Sleep on the event so a cancel wakes us without waiting out the delay
+            cancel_event.wait(min(self.next_delay(delay), remaining))
+            delay = min(delay * self.multiplier, self.max_delay)
+
+    async def wait_async(self, async_client, thread_id: str, run_id: str, timeout: float = None) -> RunOutcome:
+        """Asyncio version of wait() for an AsyncOpenAI client; cancel the task to stop waiting"""
+        timeout = timeout if timeout is not None else self.timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        delay = self.initial_delay
+        polls = 0
+
+        try:
+            while True:
+                run = await async_client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+                polls += 1
+
+                if run.status in TERMINAL_STATUSES or run.status == "requires_action":
+                    if run.status == "requires_action":
+                        await self._cancel_run_async(async_client, thread_id, run_id)
+                    self._record(polls)
+                    return RunOutcome(run, polls, time.monotonic() - started)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    await self._cancel_run_async(async_client, thread_id, run_id)
+                    self._record(polls, "timeouts")
+                    raise RunWaitTimeout(f"Run {run_id} still {run.status} after {timeout:.0f}s")
+
+                await asyncio.sleep(min(self.next_delay(delay), remaining))
+                delay = min(delay * self.multiplier, self.max_delay)
+        except asyncio.CancelledError:
+            await asyncio.shield(self._cancel_run_async(async_client, thread_id, run_id))
+            self._record(polls, "cancelled")
+            raise
+
+    async def _cancel_run_async(self, async_client, thread_id: str, run_id: str):
+        try:
+            await async_client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception:
+            pass
@@ -0,0 +1,113 @@
+# single_flight.py
+import threading
+import time
+
+from answer_cache import normalize_query
+
+
+class Flight:
+    """One in-flight query that duplicates wait on"""
+
+    __slots__ = ("done", "result", "progress", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        # Latest partial HTML of a streamed answer, for followers to show meanwhile
+        self.progress = None
+        self.followers = 0
+
+    def publish(self, html: str):
+        self.progress = html
+
+
+class SingleFlight:
+    """Coalesce identical context-free queries that are in flight at the same time
+
+    The first session to ask a question for an assistant, vector store and
+    language leads: it runs the query as usual and finishes the flight with
+    the processed answer. Sessions asking the same normalized question before
+    it finishes follow: they start no thread or run, show the leader's
+    streamed text while they wait and get its answer. A flight that ends
+    without an answer (failure, rerun, timeout) hands its followers None so
+    they run the query themselves.
+    """
+
+    def __init__(self, timeout: float = 180.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.stats = {"leaders": 0, "followers": 0, "coalesced": 0, "abandoned": 0}
+
+    @staticmethod
+    def key(assistant_id: str, vector_store_id: str, language: str, query: str) -> tuple:
+        return assistant_id, vector_store_id, language, normalize_query(query)
+
+    def join(self, key: tuple):
+        """(flight, True) for the leader of key, (the leader's flight, False) for a duplicate"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.stats["followers"] += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.stats["leaders"] += 1
+            return flight, True
+
+    def finish(self, key: tuple, flight: Flight, result=None):
+        """End the leader's flight; result None sends the followers off to run it themselves"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if result is None and flight.followers:
+                self.stats["abandoned"] += flight.followers
+        flight.result = result
+        flight.done.set()
+
+    def wait(self, flight: Flight, on_progress=None, poll_interval: float = 0.1):
+        """The leader's answer, or None when it ended without one or took longer than timeout"""
+        deadline = time.monotonic() + self.timeout
+        shown = None
+        while not flight.done.wait(poll_interval):
+            if on_progress is not None and flight.progress is not shown:
+                shown = flight.progress
+                on_progress(shown)
+            if time.monotonic() >= deadline:
+                return None
+        if flight.result is not None:
+            with self._lock:
+                self.stats["coalesced"] += 1
+        return flight.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def coalescing_ratio(self) -> float:
+        """Share of queries answered by another session's run"""
+        with self._lock:
+            total = self.stats["leaders"] + self.stats["followers"]
+            return self.stats["coalesced"] / total if total else 0.0
+
+    def render(self) -> list:
+        """Prometheus lines; registered with the telemetry exporter"""
+        with self._lock:
+            stats = dict(self.stats)
+            in_flight = len(self._flights)
+        ratio = self.coalescing_ratio()
+        return [
+            "# HELP ramp_single_flight_queries_total Context-free queries by role in their flight",
+            "# TYPE ramp_single_flight_queries_total counter",
+            f'ramp_single_flight_queries_total{{role="leader"}} {stats["leaders"]}',
+            f'ramp_single_flight_queries_total{{role="follower"}} {stats["followers"]}',
+            "# HELP ramp_single_flight_coalesced_total Queries answered by another session's run",
+            "# TYPE ramp_single_flight_coalesced_total counter",
+            f"ramp_single_flight_coalesced_total {stats['coalesced']}",
+            "# HELP ramp_single_flight_coalescing_ratio Coalesced share of all context-free queries",
+            "# TYPE ramp_single_flight_coalescing_ratio gauge",
+            f"ramp_single_flight_coalescing_ratio {ratio:.4f}",
+            "# HELP ramp_single_flight_in_flight Queries other sessions can currently join",
+            "# TYPE ramp_single_flight_in_flight gauge",
+            f"ramp_single_flight_in_flight {in_flight}",
+        ]
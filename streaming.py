@@ -0,0 +1,162 @@
+# streaming.py
+import threading
+import time
+from collections import deque
+
+from run_waiter import TERMINAL_STATUSES
+
+
+class ResponseTimer:
+    """Time-to-first-token, total latency and API request count of a single query"""
+
+    def __init__(self, mode: str, first_turn: bool = False):
+        self.mode = mode
+        self.first_turn = first_turn
+        self.api_calls = 0
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+
+    @property
+    def key(self) -> str:
+        """Tracker bucket; first turns pay for creating the thread, so they are kept apart"""
+        return f"{self.mode}/first-turn" if self.first_turn else self.mode
+
+    def count_calls(self, calls: int = 1):
+        self.api_calls += calls
+
+    def mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self):
+        self.mark_first_token()
+        self.finished_at = time.perf_counter()
+
+    @property
+    def ttft(self) -> float:
+        return (self.first_token_at or self.started) - self.started
+
+    @property
+    def total(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LatencyTracker:
+    """Collect recent latency samples per response mode so the modes can be compared"""
+
+    def __init__(self, max_samples: int = 500):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, timer: ResponseTimer):
+        with self._lock:
+            samples = self._samples.setdefault(timer.key, deque(maxlen=self.max_samples))
+            samples.append((timer.ttft, timer.total, timer.api_calls))
+
+    def summary(self, key: str) -> dict:
+        """Return count, mean API calls and p50/p95 of time-to-first-token and total latency"""
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        ttfts = [s[0] for s in samples]
+        totals = [s[1] for s in samples]
+        return {
+            "count": len(samples),
+            "api_calls": sum(s[2] for s in samples) / len(samples) if samples else 0.0,
+            "ttft_p50": percentile(ttfts, 50),
+            "ttft_p95": percentile(ttfts, 95),
+            "total_p50": percentile(totals, 50),
+            "total_p95": percentile(totals, 95),
+        }
+
+
+# Shared by every session in the process
+LATENCY_TRACKER = LatencyTracker()
+
+
+class SegmentBuffer:
+    """Accumulate streamed text deltas and post-process only complete lines
+
+    Source annotations and timestamps never span a newline, so a finished line
+    can be cleaned and linked once while the unfinished tail stays raw until
+    more deltas arrive.
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.pending = ""
+        self.segments = []
+
+    def feed(self, delta: str):
+        self.pending += delta
+        if "\n" in self.pending:
+            complete, self.pending = self.pending.rsplit("\n", 1)
+            self.segments.append(self.process(complete + "\n"))
+
+    def flush(self):
+        if self.pending:
+            self.segments.append(self.process(self.pending))
+            self.pending = ""
+
+    def html(self) -> str:
+        return "".join(self.segments) + self.pending
+
+
+def _cancel_stream_run(client, stream):
+    """Best-effort cancel of a stream's run; never raises, so the caller's exception survives"""
+    try:
+        run = stream.current_run
+        if run is None or run.status in TERMINAL_STATUSES:
+            return
+        client.beta.threads.runs.cancel(thread_id=run.thread_id, run_id=run.id)
+    except Exception:
+        pass
+
+
+def stream_run(client, placeholder, process, render, timer: ResponseTimer, thread_id: str = None,
+               min_render_interval: float = 0.05, **run_kwargs):
+    """Stream a run into a Streamlit placeholder and return the final run
+
+    process turns a complete segment of raw text into HTML and render wraps the
+    accumulated HTML for display. Redraws are throttled to min_render_interval
+    so a fast token stream does not flood the websocket. Without a thread_id
+    the run_kwargs are createAndRun arguments and the run starts a new thread.
+    """
+    buffer = SegmentBuffer(process)
+    last_render = 0.0
+
+    if thread_id is None:
+        manager = client.beta.threads.create_and_run_stream(**run_kwargs)
+    else:
+        manager = client.beta.threads.runs.stream(thread_id=thread_id, **run_kwargs)
+    timer.count_calls()
+
+    with manager as stream:
+        try:
+            for delta in stream.text_deltas:
+                timer.mark_first_token()
+                buffer.feed(delta)
+                now = time.perf_counter()
+                if now - last_render >= min_render_interval:
+                    placeholder.markdown(render(buffer.html()), unsafe_allow_html=True)
+                    last_render = now
+            run = stream.get_final_run()
+        except BaseException:
+            # A rerun stops the script mid-stream; don't leave the run holding the thread
+            _cancel_stream_run(client, stream)
+            raise
+
+    buffer.flush()
+    placeholder.markdown(render(buffer.html()), unsafe_allow_html=True)
+    timer.finish()
+    return run
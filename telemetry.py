@@ -0,0 +1,188 @@
+# telemetry.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; wide enough for sub-millisecond post-processing and minute-long runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+# Polls per run
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+# Bytes of conversation sent per rerun
+SIZE_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+# Conversation lengths the render histograms are split by
+LENGTH_BUCKETS = (10, 50, 100, 200)
+
+LABELS = ("assistant", "language")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """Prometheus histogram with one series per label combination"""
+
+    def __init__(self, name: str, help_text: str, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = ",".join(pairs + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {count}")
+            bucket_labels = ",".join(pairs + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{bucket_labels}}} {series[-1]}")
+            label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}_sum{label_text} {series[-2]}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class Telemetry:
+    """Timed spans of a query, exported as Prometheus histograms and optional JSON log lines
+
+    Every span is tagged with the assistant and language of the query, so
+    histogram_quantile() over ramp_span_seconds shows p50/p99 per step.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = Histogram(
+            "ramp_span_seconds", "Duration of each step of answering a query",
+            ("span",) + LABELS, DEFAULT_BUCKETS
+        )
+        self.counts = Histogram(
+            "ramp_run_polls", "Status polls per assistant run",
+            LABELS, COUNT_BUCKETS
+        )
+        self.payloads = Histogram(
+            "ramp_render_payload_bytes", "Conversation bytes sent to the browser per rerun",
+            ("messages",), SIZE_BUCKETS
+        )
+        self.json_logs = False
+        self._server = None
+        self._collectors = []
+
+    def configure(self, json_logs: bool = False):
+        self.json_logs = json_logs
+
+    def add_collector(self, collect):
+        """Append collect()'s exposition lines to every scrape, e.g. a queue gauge"""
+        self._collectors.append(collect)
+
+    @staticmethod
+    def _labels(labels: dict) -> tuple:
+        return tuple(labels.get(name) or "" for name in LABELS)
+
+    def observe(self, span: str, seconds: float, **labels):
+        with self._lock:
+            self.spans.observe((span,) + self._labels(labels), seconds)
+        if self.json_logs:
+            record = {"ts": round(time.time(), 3), "span": span, "seconds": round(seconds, 6)}
+            record.update((name, labels.get(name)) for name in LABELS)
+            os.write(1, (json.dumps(record, ensure_ascii=False) + "\n").encode())
+
+    def observe_polls(self, polls: int, **labels):
+        with self._lock:
+            self.counts.observe(self._labels(labels), polls)
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time the body of a with block; failed steps are recorded too"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, fn, **labels):
+        """Wrap fn so every call is observed as a span"""
+        def wrapper(*args, **kwargs):
+            with self.span(name, **labels):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    def observe_run(self, outcome, **labels):
+        """Queue and in-progress time of a finished run from its server timestamps, plus its polls"""
+        run = outcome.run
+        created, started, finished = (
+            getattr(run, "created_at", None),
+            getattr(run, "started_at", None),
+            getattr(run, "completed_at", None) or getattr(run, "failed_at", None)
+            or getattr(run, "cancelled_at", None) or getattr(run, "expired_at", None),
+        )
+        if created and started:
+            self.observe("run_queued", max(0, started - created), **labels)
+        if started and finished:
+            self.observe("run_in_progress", max(0, finished - started), **labels)
+        if outcome.polls:
+            self.observe_polls(outcome.polls, **labels)
+
+    def observe_render(self, stats: dict, **labels):
+        """Render time and payload of the message list, by conversation length"""
+        length = next((str(bound) for bound in LENGTH_BUCKETS if stats["messages"] <= bound), "+Inf")
+        self.observe("render", stats["seconds"], **labels)
+        with self._lock:
+            self.payloads.observe((length,), stats["bytes"])
+
+    def observe_timings(self, timings: dict, **labels):
+        """Record spans measured elsewhere, e.g. inside a background run"""
+        for span, seconds in (timings or {}).items():
+            self.observe(span, seconds, **labels)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = self.spans.render() + self.counts.render() + self.payloads.render()
+        for collect in self._collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """Serve /metrics on a daemon thread; repeated calls reuse the first server"""
+        if self._server is not None:
+            return self._server
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server
+
+
+# Shared by every session in the process
+TELEMETRY = Telemetry()
@@ -0,0 +1,40 @@
+# tests/test_answer_cache.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_cache import create_answer_cache
+
+SCOPE = ("asst_1", "vs_1", "English")
+
+
+def semantic_cache():
+    return create_answer_cache(semantic=True)
+
+
+def test_semantic_matching_is_off_by_default():
+    cache = create_answer_cache()
+    cache.put(*SCOPE, "What are the key digital initiatives?", ["answer"])
+    assert cache.get(*SCOPE, "What are the key digital initiatives??") == ["answer"]
+    assert cache.get(*SCOPE, "What are the main digital initiatives?") is None
+
+
+def test_reworded_question_still_matches():
+    cache = semantic_cache()
+    cache.put(*SCOPE, "What are the key digital initiatives mentioned?", ["answer"])
+    assert cache.get(*SCOPE, "What are the key digital initiatives mentioned here?") == ["answer"]
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("What happens at 00:12:31?", "What happens at 00:12:30?"),
+    ("Is he not in favour of the 5G rollout?", "Is he in favour of the 5G rollout?"),
+    ("Is he in favour of the 5G rollout?", "Isn't he in favour of the 5G rollout?"),
+    ("What was said in 2023 about broadband?", "What was said in 2024 about broadband?"),
+])
+def test_different_numbers_or_negation_never_match(stored, asked):
+    cache = semantic_cache()
+    cache.put(*SCOPE, stored, ["wrong answer"])
+    assert cache.get(*SCOPE, asked) is None
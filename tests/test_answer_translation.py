@@ -0,0 +1,87 @@
+# tests/test_answer_translation.py
+import json
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_cache import create_answer_cache
+from answer_translation import AnswerTranslator
+from translations import TRANSLATIONS
+
+ASSISTANT = ("asst_1", "vs_1")
+MALAY = "Bahasa Melayu"
+QUESTION = "Apakah inisiatif digital utama?"
+
+
+class FakeChat:
+    """Chat completions that translate questions to a fixed text and answers block by block"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        if "response_format" in kwargs:
+            blocks = json.loads(messages[-1]["content"])["blocks"]
+            content = json.dumps({"blocks": [f"[ms] {block}" for block in blocks]})
+        else:
+            content = "What are the key digital initiatives?"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def translator():
+    chat = FakeChat()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=chat))
+    return AnswerTranslator(client, create_answer_cache(), TRANSLATIONS), chat
+
+
+def test_miss_makes_no_completion():
+    answers, chat = translator()
+    # Canonical answers exist for the assistant, but not for this question
+    answers.remember(*ASSISTANT, "English", "What does the minister say about talent?", ["Talent"])
+    assert answers.lookup(*ASSISTANT, MALAY, QUESTION) is None
+    assert answers.lookup(*ASSISTANT, MALAY, "Soalan yang tiada kaitan?") is None
+    assert chat.calls == 0
+    assert answers.stats["misses"] == 2 and answers.stats["unknown"] == 2
+
+
+def test_question_asked_before_is_served_from_the_canonical_answer():
+    answers, chat = translator()
+    answers.remember(*ASSISTANT, "English", "What are the key digital initiatives?", ["Broadband at 00:01:00"])
+    # The same Malay question answered for another assistant; its translation runs in the background
+    answers.remember("asst_2", "vs_2", MALAY, QUESTION, ["Jalur lebar"])
+    answers._background.shutdown(wait=True)
+    calls = chat.calls
+    assert answers.lookup(*ASSISTANT, MALAY, QUESTION) == ["[ms] Broadband at 00:01:00"]
+    # Only the answer was translated
+    assert chat.calls == calls + 1
+    assert answers.stats["hits"] == 1
+
+
+def test_suggestion_is_translated_without_translating_the_question():
+    answers, chat = translator()
+    english, malay = TRANSLATIONS["English"]["suggestions"][0], TRANSLATIONS[MALAY]["suggestions"][0]
+    answers.remember(*ASSISTANT, "English", english, ["Answer at 00:01:00"])
+    assert answers.lookup(*ASSISTANT, MALAY, malay) == ["[ms] Answer at 00:01:00"]
+    # Only the answer was translated
+    assert chat.calls == 1
+
+
+def test_remember_translates_the_question_in_the_background():
+    answers, chat = translator()
+    chat.release.clear()
+    answers.remember(*ASSISTANT, MALAY, QUESTION, ["Jalur lebar"])
+    assert chat.started.wait(5)
+    chat.release.set()
+    answers._background.shutdown(wait=True)
+    assert answers.answer_cache.peek(
+        *ASSISTANT, f"canonical:{MALAY}", "What are the key digital initiatives?"
+    ) == ["Jalur lebar"]
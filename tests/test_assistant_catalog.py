@@ -0,0 +1,97 @@
+# tests/test_assistant_catalog.py
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistant_catalog import AssistantCatalog, page_of
+
+
+def entry(key: str, name: str, i: int) -> dict:
+    return {"key": key, "name": name, "assistant_id": f"asst_{i}", "vector_store": f"vs_{i}", "file_id": str(i)}
+
+
+ENTRIES = [
+    entry("Honouring_Karpal_Singh", "Honouring Karpal Singh Analyst", 1),
+    entry("Budget_2024", "Budget 2024 Debate", 2),
+    entry("Digital_Economy", "Digital Economy Forum", 3),
+]
+
+
+def write(path, entries, bump: int = 0):
+    write_text(path, json.dumps({"assistants": entries}), bump)
+
+
+def write_text(path, text: str, bump: int = 0):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    # Coarse filesystem clocks could give a quick rewrite the same mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = str(tmp_path / "assistants.json")
+    write(path, ENTRIES)
+    return path
+
+
+def test_changed_file_is_reloaded_and_a_broken_one_ignored(catalog_path):
+    catalog = AssistantCatalog(catalog_path, check_interval=0)
+    assert catalog.keys() == ("Honouring_Karpal_Singh", "Budget_2024", "Digital_Economy")
+    assert catalog.refresh() is False
+
+    write(catalog_path, ENTRIES + [entry("Cyber_Security", "Cyber Security Talk", 4)], bump=1)
+    assert catalog.refresh() is True
+    assert len(catalog) == 4 and catalog.get("Cyber_Security").vector_store == "vs_4"
+
+    write_text(catalog_path, "{not json", bump=2)
+    assert catalog.refresh() is False
+    assert len(catalog) == 4 and catalog.stats["reload_errors"] == 1
+    # Not retried until the file changes again
+    assert catalog.refresh() is False and catalog.stats["reload_errors"] == 1
+
+
+def test_refresh_checks_the_file_at_most_every_interval(catalog_path):
+    catalog = AssistantCatalog(catalog_path, check_interval=60)
+    write(catalog_path, ENTRIES[:1], bump=1)
+    assert catalog.refresh() is False and len(catalog) == 3
+    assert catalog.reload() is True and len(catalog) == 1
+
+
+def test_registry_ids_take_precedence(catalog_path):
+    registry = SimpleNamespace(assistant_ids=lambda: {"Budget_2024": "asst_provisioned", "Unknown": "asst_x"})
+    catalog = AssistantCatalog(catalog_path, registry)
+    assert catalog.get("Budget_2024").assistant_id == "asst_provisioned"
+    assert catalog.get("Digital_Economy").assistant_id == "asst_3"
+    assert "Unknown" not in catalog
+
+
+def test_duplicate_keys_are_rejected(tmp_path):
+    path = str(tmp_path / "assistants.json")
+    write(path, ENTRIES + ENTRIES[:1])
+    with pytest.raises(ValueError):
+        AssistantCatalog(path)
+
+
+def test_search_matches_every_word_of_key_or_name(catalog_path):
+    catalog = AssistantCatalog(catalog_path)
+    assert catalog.search("karpal") == ["Honouring_Karpal_Singh"]
+    assert catalog.search("DIGITAL forum") == ["Digital_Economy"]
+    assert catalog.search("budget_2024") == ["Budget_2024"]
+    assert catalog.search("analyst debate") == []
+    assert catalog.search("") == list(catalog.keys())
+
+
+def test_page_of_clamps_the_page():
+    keys = [f"key_{i}" for i in range(45)]
+    assert page_of(keys, 0, 20) == (keys[:20], 0, 3)
+    assert page_of(keys, 2, 20) == (keys[40:], 2, 3)
+    assert page_of(keys, 7, 20) == (keys[40:], 2, 3)
+    assert page_of(keys, -1, 20) == (keys[:20], 0, 3)
+    assert page_of([], 3, 20) == ([], 0, 1)
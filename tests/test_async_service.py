@@ -0,0 +1,77 @@
+# tests/test_async_service.py
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from async_service import AsyncAssistantService, ServiceOverloaded
+from fake_assistants_api import FakeAssistantsState, start_server
+from run_waiter import RunWaiter, RunWaitTimeout
+
+
+@pytest.fixture
+def server():
+    server, base_url = start_server(FakeAssistantsState(run_latency=0.2, run_jitter=0.0, seed=1))
+    yield server, base_url
+    server.shutdown()
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def service(base_url, **kwargs):
+    waiter = RunWaiter(None, initial_delay=0.05, max_delay=0.1)
+    return AsyncAssistantService("sk-test", waiter, base_url=base_url, **kwargs)
+
+
+def test_ask_returns_the_processed_answer(server):
+    _, base_url = server
+    assistants = service(base_url)
+    try:
+        result = assistants.ask("asst_1", "vs_1", "FINAS", "920357", "English", "What happens?").result(10)
+    finally:
+        assistants.close()
+    answer = "\n".join(result.answer)
+    assert "†source" not in answer and "【" not in answer
+    assert "FleId=920357&offset=75.0" in answer
+    assert result.outcome.completed and result.api_calls >= 3
+    assert assistants.stats["completed"] == 1 and assistants.stats["in_flight"] == 0
+
+
+def test_requests_beyond_the_queue_are_rejected(server):
+    _, base_url = server
+    assistants = service(base_url, max_in_flight=1, max_queue=1)
+    try:
+        futures = []
+        # One request in flight, one waiting for its slot, and the third turned away
+        for i, (key, count) in enumerate((("in_flight", 1), ("queued", 1), ("rejected", 1))):
+            futures.append(assistants.ask("asst_1", "vs_1", "FINAS", "920357", "English", f"Question {i}?"))
+            assert wait_until(lambda: assistants.stats[key] == count)
+        with pytest.raises(ServiceOverloaded):
+            futures[2].result(10)
+        assert [future.result(10).outcome.completed for future in futures[:2]] == [True, True]
+    finally:
+        assistants.close()
+    assert assistants.stats["rejected"] == 1 and assistants.stats["max_in_flight_seen"] == 1
+
+
+def test_missed_deadline_cancels_the_run(server):
+    fake, base_url = server
+    fake.state.run_latency = 5.0
+    assistants = service(base_url, deadline=0.5)
+    try:
+        with pytest.raises(RunWaitTimeout):
+            assistants.ask("asst_1", "vs_1", "FINAS", "920357", "English", "Slow question?").result(10)
+        wait_until(lambda: [run["status"] for run in fake.state.runs.values()] == ["cancelled"])
+    finally:
+        assistants.close()
+    assert [run["status"] for run in fake.state.runs.values()] == ["cancelled"]
+    assert assistants.stats["timeouts"] == 1
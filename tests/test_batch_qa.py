@@ -0,0 +1,90 @@
+# tests/test_batch_qa.py
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import batch_qa
+from fake_assistants_api import FakeAssistantsState, start_server
+from rate_limiter import BATCH, RateLimiter, current_priority
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_batch_context_leaves_out_ui_services(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("ASSISTANT_CATALOG_PATH", os.path.join(ROOT, "assistants.json"))
+    monkeypatch.setenv("ASSISTANT_REGISTRY_PATH", str(tmp_path / "registry.json"))
+    context = batch_qa.build_batch_context(requests_per_minute=120)
+    try:
+        assert context.history_store is None
+        assert context.warmer is None
+        assert context.answer_cache is None
+        assert context.answer_translator is None
+        assert not list(tmp_path.glob("*.sqlite3"))
+        # Batch requests share the process-wide limiter, with the job's limit
+        assert isinstance(context.rate_limiter, RateLimiter)
+        assert context.rate_limiter.requests.capacity == 120
+    finally:
+        if context.async_service is not None:
+            context.async_service.close()
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.mark.parametrize("async_pipeline", ["true", "false"])
+def test_resumed_run_asks_only_unanswered_questions_through_the_limiter(tmp_path, monkeypatch, async_pipeline):
+    server, base_url = start_server(FakeAssistantsState(run_latency=0.1, run_jitter=0.0, seed=1))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("ASYNC_PIPELINE", async_pipeline)
+    monkeypatch.setenv("ASSISTANT_CATALOG_PATH", os.path.join(ROOT, "assistants.json"))
+    monkeypatch.setenv("ASSISTANT_REGISTRY_PATH", str(tmp_path / "registry.json"))
+
+    # Every request the job sends, with the priority it waited at
+    priorities = []
+    acquire, acquire_async = RateLimiter.acquire, RateLimiter.acquire_async
+
+    def spy(self, *args, **kwargs):
+        priorities.append(current_priority())
+        return acquire(self, *args, **kwargs)
+
+    async def spy_async(self, *args, **kwargs):
+        priorities.append(current_priority())
+        return await acquire_async(self, *args, **kwargs)
+
+    monkeypatch.setattr(RateLimiter, "acquire", spy)
+    monkeypatch.setattr(RateLimiter, "acquire_async", spy_async)
+
+    questions = [{"id": f"q{i}", "question": f"What happens in part {i}?"} for i in range(4)]
+    write_jsonl(tmp_path / "questions.jsonl", questions)
+    # An earlier, interrupted run answered q0 and failed q1
+    write_jsonl(tmp_path / "answers.jsonl", [
+        {"id": "q0", "status": "ok", "answer": "Already answered"},
+        {"id": "q1", "status": "error", "error": "RateLimitError"},
+    ])
+    monkeypatch.setattr(sys, "argv", ["batch_qa.py", "questions.jsonl", "answers.jsonl", "--workers", "2"])
+    try:
+        batch_qa.main()
+        requests = server.state.requests
+    finally:
+        server.shutdown()
+
+    records = batch_qa.read_jsonl(str(tmp_path / "answers.jsonl"))
+    # q0 is not asked again; the failed q1 is
+    assert sorted(record["id"] for record in records[2:]) == ["q1", "q2", "q3"]
+    assert all(record["status"] == "ok" for record in records[2:])
+    assert batch_qa.completed_ids(str(tmp_path / "answers.jsonl")) == {"q0", "q1", "q2", "q3"}
+    # Every API request of the job waited for the shared limiter, at batch priority
+    assert len(priorities) == requests > 0
+    assert set(priorities) == {BATCH}
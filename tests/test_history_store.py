@@ -0,0 +1,75 @@
+# tests/test_history_store.py
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore
+from message_cache import ConversationCache
+
+TOKEN = "0123456789abcdef0123456789abcdef"
+DAY = 86400
+
+
+def conversation(thread_id: str, question: str = "What happens at 00:12:30?") -> ConversationCache:
+    cache = ConversationCache(thread_id)
+    cache.add_local("user", [question])
+    cache.add_local("assistant", ["At [00:12:30] the minister speaks"])
+    return cache
+
+
+def store(tmp_path, **kwargs) -> HistoryStore:
+    return HistoryStore(str(tmp_path / "history.sqlite3"), **kwargs)
+
+
+def test_conversations_past_retention_are_evicted(tmp_path):
+    history = store(tmp_path, retention_days=30)
+    history.save(TOKEN, conversation("thread_1"), "karpal", "English")
+    assert history.evict(time.time() + 29 * DAY) == 0
+    assert history.evict(time.time() + 31 * DAY) == 1
+    assert history.latest(TOKEN) == (None, None)
+    # Their messages go with them
+    assert history._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+
+def test_each_user_keeps_only_their_newest_conversations(tmp_path):
+    history = store(tmp_path, max_conversations=2)
+    for i in range(3):
+        history.save(TOKEN, conversation(f"thread_{i}"))
+    history.save("other", conversation("thread_other"))
+    assert history.evict() == 1
+    assert [row["thread_id"] for row in history.conversations(TOKEN)] == ["thread_2", "thread_1"]
+    assert [row["thread_id"] for row in history.conversations("other")] == ["thread_other"]
+
+
+def test_latest_conversation_is_found_by_token_after_a_restart(tmp_path):
+    saved = conversation("thread_1")
+    history = store(tmp_path)
+    assert history.save(TOKEN, saved, "karpal", "Bahasa Melayu") == 2
+    saved.add_local("user", ["And after that?"])
+    # Only the new message is stored on the next save
+    assert history.save(TOKEN, saved) == 1
+
+    restored, summary = store(tmp_path).latest(TOKEN)
+    assert restored.key == saved.key and restored.thread_id == "thread_1"
+    assert restored.entries == saved.entries
+    assert summary["assistant"] == "karpal" and summary["language"] == "Bahasa Melayu"
+    assert store(tmp_path).latest("f" * 32) == (None, None)
+
+
+@pytest.mark.parametrize("cookie, kept", [(TOKEN, True), ("not-a-token", False), (None, False)])
+def test_history_token_comes_from_the_cookie(monkeypatch, cookie, kept):
+    import app
+
+    cookies = {app.HISTORY_COOKIE: cookie} if cookie else {}
+    monkeypatch.setattr(app.st, "context", SimpleNamespace(cookies=cookies))
+    # A shared link's ?u= parameter is dropped, never used as the token
+    app.st.query_params["u"] = TOKEN
+    token = app.AssistantUI.history_token(None)
+    assert "u" not in app.st.query_params
+    assert (token == TOKEN) is kept
+    assert app._TOKEN_RE.fullmatch(token)
@@ -0,0 +1,79 @@
+# tests/test_local_retrieval.py
+import json
+import random
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_retrieval import HashingEmbedder, LocalRetriever
+
+
+def write_transcript(directory, name: str, lines) -> str:
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([{"start": 90 * i, "end": 90 * i + 60, "text": text} for i, text in enumerate(lines)], f)
+    return path
+
+
+def test_selected_video_gets_chunks_when_another_dominates(tmp_path):
+    # Video A talks about broadband in every chunk, B only once
+    dominant = [f"Broadband rollout for rural broadband users, part {i}" for i in range(80)]
+    other = ["The budget covers broadband briefly", "Cyber security talent programmes", "Data centre investment"]
+    transcripts = {
+        "A": write_transcript(tmp_path, "A", dominant),
+        "B": write_transcript(tmp_path, "B", other),
+    }
+    LocalRetriever.build(str(tmp_path / "index"), transcripts, HashingEmbedder(256), window=60)
+    retriever = LocalRetriever(str(tmp_path / "index"))
+
+    chunks = retriever.search_many(["rural broadband rollout"], k=3, file_id="B", candidates=10)[0]
+
+    assert chunks
+    assert {chunk["file_id"] for chunk in chunks} == {"B"}
+    assert "broadband" in chunks[0]["text"]
+
+
+def test_unfiltered_search_spans_videos_and_unknown_video_is_empty(tmp_path):
+    transcripts = {
+        "A": write_transcript(tmp_path, "A", ["Broadband for rural areas"]),
+        "B": write_transcript(tmp_path, "B", ["Broadband tax incentives"]),
+    }
+    LocalRetriever.build(str(tmp_path / "index"), transcripts, HashingEmbedder(256))
+    retriever = LocalRetriever(str(tmp_path / "index"))
+
+    assert {chunk["file_id"] for chunk in retriever.search("broadband", k=5)} == {"A", "B"}
+    assert retriever.search("broadband", k=5, file_id="C") == []
+
+
+def test_default_fusion_keeps_bm25_recall(tmp_path):
+    # A line every 5 seconds with one planted fact per question, as in benchmarks/bench_retrieval.py
+    rng = random.Random(11)
+    filler = ("digital economy minister policy broadband agency reform data centre cyber talent investment "
+              "startup platform village network budget parliament citizens services connectivity").split()
+    topics = ("rural broadband", "cyber security training", "data centre investment", "startup grants")
+    names = [f"9{i:05d}" for i in range(5)]
+    videos = {name: [" ".join(rng.choice(filler) for _ in range(12)) for _ in range(360)] for name in names}
+    planted = []
+    for i, (name, line) in enumerate(rng.sample([(name, line) for name in names for line in range(360)], 40)):
+        programme, topic = f"Programme-{100 + i}", rng.choice(topics)
+        videos[name][line] = f"The minister announced the {programme} programme for {topic} in every state"
+        planted.append((f"Which programme did the minister announce for {topic}, the {programme} one?", name, line))
+    transcripts = {}
+    for name, lines in videos.items():
+        transcripts[name] = str(tmp_path / f"{name}.json")
+        with open(transcripts[name], "w", encoding="utf-8") as f:
+            json.dump([{"start": 5 * i, "end": 5 * i + 4, "text": text} for i, text in enumerate(lines)], f)
+    LocalRetriever.build(str(tmp_path / "index"), transcripts, HashingEmbedder(512), window=60)
+    retriever = LocalRetriever(str(tmp_path / "index"))
+
+    def recall(rankings):
+        hits = 0
+        for chunks, (_, name, line) in zip(rankings, planted):
+            hits += any(chunk["file_id"] == name and chunk["start"] <= 5 * line <= chunk["end"] for chunk in chunks)
+        return hits / len(planted)
+
+    questions = [question for question, _, _ in planted]
+    bm25 = [[retriever.chunks[row] for _, row in retriever.bm25.search(q, 5)] for q in questions]
+    assert retriever.dense_weight == 0.0
+    assert recall(retriever.search_many(questions, k=5)) >= recall(bm25) >= 0.9
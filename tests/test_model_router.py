@@ -0,0 +1,70 @@
+# tests/test_model_router.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_context import build_context
+from model_router import ANALYTICAL, FACTUAL, TIMESTAMP, ModelRouter, classify
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What happens at 00:12:30?", TIMESTAMP),
+    ("When is broadband mentioned?", TIMESTAMP),
+    ("Bilakah jalur lebar disebut?", TIMESTAMP),
+    ("什么时候提到宽带？", TIMESTAMP),
+    ("Who opens the session?", FACTUAL),
+    ("Siapakah yang membuka sesi?", FACTUAL),
+    ("Why does the minister stress rural broadband?", ANALYTICAL),
+    ("How is he transforming Malaysia's digital landscape?", ANALYTICAL),
+    ("Bandingkan dua ucapan menteri", ANALYTICAL),
+    ("为什么部长强调宽带？", ANALYTICAL),
+    # An analytical cue wins over a timestamp
+    ("Explain what happens at 00:12:30", ANALYTICAL),
+    # Long questions without a cue go to the heavy model too
+    (" ".join(["word"] * 15), ANALYTICAL),
+])
+def test_classify(query, expected):
+    assert classify(query) == expected
+
+
+def test_fast_classes_get_the_fast_model_and_the_rest_the_assistants():
+    router = ModelRouter(fast_model="gpt-4o-mini")
+    assert router.choose("When is broadband mentioned?") == (TIMESTAMP, "gpt-4o-mini")
+    assert router.choose("Who opens the session?") == (FACTUAL, "gpt-4o-mini")
+    assert router.choose("Why does he stress broadband?") == (ANALYTICAL, None)
+    assert router.run_kwargs("gpt-4o-mini") == {"model": "gpt-4o-mini"}
+    # No override keeps the assistant's own model
+    assert router.run_kwargs(None) == {}
+
+
+def test_heavy_model_and_fast_classes_are_configurable():
+    router = ModelRouter(fast_model="gpt-4o-mini", heavy_model="gpt-4o", fast_classes=(TIMESTAMP,),
+                         factual_max_words=4)
+    assert router.choose("Who opens the session?") == (FACTUAL, "gpt-4o")
+    assert router.choose("What happens at 01:02?") == (TIMESTAMP, "gpt-4o-mini")
+    assert router.choose("Who opens the long session today?") == (ANALYTICAL, "gpt-4o")
+
+
+def test_route_counts_decisions(capfd):
+    router = ModelRouter()
+    router.route("When is broadband mentioned?")
+    router.route("Why does he stress broadband?")
+    assert router.stats == {TIMESTAMP: 1, FACTUAL: 0, ANALYTICAL: 1}
+    assert "[route] class=analytical model=assistant" in capfd.readouterr().out
+    assert 'ramp_routed_queries_total{query_class="timestamp"} 1' in router.render()
+
+
+def test_routing_is_off_by_default(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("MODEL_ROUTING", raising=False)
+    quiet = dict(warmup=False, history_path=None, async_pipeline=False, answer_cache=None)
+    # Without a router the app adds no model override, so every run uses the assistant's model
+    assert build_context(**quiet).model_router is None
+
+    monkeypatch.setenv("MODEL_ROUTING", "true")
+    monkeypatch.setenv("ROUTER_FAST_MODEL", "gpt-4.1-nano")
+    router = build_context(**quiet).model_router
+    assert router.choose("Who opens the session?") == (FACTUAL, "gpt-4.1-nano")
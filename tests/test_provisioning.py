@@ -0,0 +1,79 @@
+# tests/test_provisioning.py
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from provisioning import AssistantProvisioner, AssistantRegistry
+
+CONFIGS = {
+    "karpal": {"name": "Honouring Karpal Singh", "vector_store": "vs_1", "additional_instructions": "Video one."},
+    "budget": {"name": "Budget 2024", "vector_store": "vs_2", "additional_instructions": "Video two."},
+}
+
+
+class FakeAssistants:
+    """assistants.create/update/list against an in-memory list, counting the calls"""
+
+    def __init__(self):
+        self.assistants = []
+        self.calls = {"create": 0, "update": 0, "list": 0}
+
+    def create(self, **spec):
+        self.calls["create"] += 1
+        assistant = SimpleNamespace(id=f"asst_{len(self.assistants) + 1}", **spec)
+        self.assistants.insert(0, assistant)
+        return assistant
+
+    def update(self, assistant_id, **spec):
+        self.calls["update"] += 1
+        assistant = next(a for a in self.assistants if a.id == assistant_id)
+        assistant.__dict__.update(spec)
+        return assistant
+
+    def list(self, order, limit):
+        self.calls["list"] += 1
+        return list(self.assistants)
+
+
+def provisioner(assistants, path) -> AssistantProvisioner:
+    client = SimpleNamespace(beta=SimpleNamespace(assistants=assistants))
+    return AssistantProvisioner(client, AssistantRegistry(str(path)))
+
+
+def test_unchanged_config_makes_no_second_call(tmp_path):
+    assistants = FakeAssistants()
+    registry = tmp_path / "assistant_registry.json"
+    first = provisioner(assistants, registry).provision(CONFIGS, "Base")
+    assert assistants.calls == {"create": 2, "update": 0, "list": 1}
+
+    again = provisioner(assistants, registry)
+    assert again.provision(CONFIGS, "Base") == first
+    assert assistants.calls == {"create": 2, "update": 0, "list": 1}
+    assert again.stats == {"created": 0, "updated": 0, "unchanged": 2, "api_calls": 0}
+
+
+def test_lost_registry_adopts_existing_assistants(tmp_path):
+    assistants = FakeAssistants()
+    registry = tmp_path / "assistant_registry.json"
+    first = provisioner(assistants, registry).provision(CONFIGS, "Base")
+    registry.unlink()
+
+    assert provisioner(assistants, registry).provision(CONFIGS, "Base") == first
+    assert assistants.calls == {"create": 2, "update": 0, "list": 2}
+    assert provisioner(assistants, registry).provision(CONFIGS, "Base", force=True) == first
+    assert assistants.calls == {"create": 2, "update": 0, "list": 3}
+
+
+def test_changed_config_updates_in_place(tmp_path):
+    assistants = FakeAssistants()
+    registry = tmp_path / "assistant_registry.json"
+    first = provisioner(assistants, registry).provision(CONFIGS, "Base")
+
+    changed = dict(CONFIGS, budget=dict(CONFIGS["budget"], additional_instructions="Video two, revised."))
+    again = provisioner(assistants, registry)
+    assert again.provision(changed, "Base") == first
+    assert assistants.calls == {"create": 2, "update": 1, "list": 2}
+    assert again.stats["updated"] == 1 and again.stats["unchanged"] == 1
+    assert "Video two, revised." in assistants.assistants[0].instructions
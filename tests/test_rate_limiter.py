@@ -0,0 +1,132 @@
+# tests/test_rate_limiter.py
+import asyncio
+import email.utils
+import os
+import sys
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI, OpenAI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import (
+    BATCH, INTERACTIVE, WARMUP, AsyncRateLimitedTransport, RateLimitedTransport, RateLimiter, request_priority,
+    retry_after
+)
+
+
+def throttle(calls: list, status: int = 429, headers=None):
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(status, headers=headers or {"retry-after-ms": "1"},
+                              json={"error": {"message": "slow down"}})
+
+    return handler
+
+
+def limiter():
+    return RateLimiter(max_retries=2, base_delay=0.001)
+
+
+def test_429_is_retried_by_the_transport_only():
+    calls = []
+    transport = RateLimitedTransport(limiter(), httpx.MockTransport(throttle(calls)))
+    client = OpenAI(api_key="sk-test", base_url="http://fake/v1", max_retries=2,
+                    http_client=httpx.Client(transport=transport))
+    with pytest.raises(openai.RateLimitError):
+        client.models.retrieve("gpt-4o")
+    # One first attempt plus the limiter's two retries, not multiplied by the client's
+    assert len(calls) == 3
+
+
+def test_429_is_retried_by_the_async_transport_only():
+    calls = []
+    transport = AsyncRateLimitedTransport(limiter(), httpx.MockTransport(throttle(calls)))
+    client = AsyncOpenAI(api_key="sk-test", base_url="http://fake/v1", max_retries=2,
+                         http_client=httpx.AsyncClient(transport=transport))
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(client.models.retrieve("gpt-4o"))
+    assert len(calls) == 3
+
+
+def test_server_errors_are_still_retried_by_the_client():
+    calls = []
+    transport = RateLimitedTransport(limiter(), httpx.MockTransport(throttle(calls, status=500)))
+    client = OpenAI(api_key="sk-test", base_url="http://fake/v1", max_retries=2,
+                    http_client=httpx.Client(transport=transport))
+    with pytest.raises(openai.InternalServerError):
+        client.models.retrieve("gpt-4o")
+    assert len(calls) == 3
+
+
+def test_retry_after_formats():
+    assert retry_after({"retry-after-ms": "250"}, 9.0) == 0.25
+    assert retry_after({"retry-after": "3"}, 9.0) == 3.0
+    later = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 < retry_after({"retry-after": later}, 9.0) <= 30
+    assert retry_after({}, 9.0) == 9.0
+
+
+@pytest.mark.parametrize("value", ["soon", "Wed, 99 Foo 2024 25:61:00 GMT", "1,5"])
+def test_malformed_retry_after_falls_back_to_the_backoff(value):
+    assert retry_after({"retry-after": value}, 9.0) == 9.0
+
+
+def test_malformed_retry_after_is_still_retried():
+    calls = []
+    transport = RateLimitedTransport(limiter(), httpx.MockTransport(throttle(calls, headers={"retry-after": "soon"})))
+    client = OpenAI(api_key="sk-test", base_url="http://fake/v1", max_retries=0,
+                    http_client=httpx.Client(transport=transport))
+    with pytest.raises(openai.RateLimitError):
+        client.models.retrieve("gpt-4o")
+    assert len(calls) == 3
+
+
+def test_higher_priority_goes_first():
+    # 5 requests a second, with the bucket two requests in debt so everyone queues up
+    rate_limiter = RateLimiter(requests_per_minute=300)
+    rate_limiter.requests.take(rate_limiter.requests.level + 2)
+    served = []
+
+    def request(priority):
+        with request_priority(priority):
+            rate_limiter.acquire()
+        served.append(priority)
+
+    threads = [threading.Thread(target=request, args=(priority,)) for priority in (BATCH, WARMUP, INTERACTIVE)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert served == [INTERACTIVE, WARMUP, BATCH]
+    assert rate_limiter.stats["max_queue_depth"] == 3
+
+
+def test_requests_per_minute():
+    rate_limiter = RateLimiter(requests_per_minute=120)
+    started = time.monotonic()
+    for _ in range(120):
+        rate_limiter.acquire()
+    assert time.monotonic() - started < 0.2
+    rate_limiter.acquire()
+    # Two requests a second refill
+    assert 0.35 < time.monotonic() - started < 1.0
+    assert rate_limiter.stats["waited"] == 1
+
+
+def test_tokens_per_minute_and_settle():
+    rate_limiter = RateLimiter(tokens_per_minute=600)
+    rate_limiter.acquire(600)
+    started = time.monotonic()
+    rate_limiter.acquire(5)
+    # Ten tokens a second refill
+    assert 0.35 < time.monotonic() - started < 1.0
+    # The run used far less than was charged up front, so the difference is available again
+    rate_limiter.settle(600, 100)
+    started = time.monotonic()
+    rate_limiter.acquire(400)
+    assert time.monotonic() - started < 0.1
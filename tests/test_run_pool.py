@@ -0,0 +1,96 @@
+# tests/test_run_pool.py
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_pool import RunPool
+from run_waiter import RunWaiter
+
+
+class FakeRuns:
+    """Runs that stay in_progress until released; retrieve fails while failures are queued"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.cancelled = threading.Event()
+        self.failures = 0
+        self.retrieves = 0
+
+    def create(self, thread_id, **kwargs):
+        return SimpleNamespace(id="run_1", thread_id=thread_id, status="queued")
+
+    def retrieve(self, thread_id, run_id):
+        self.retrieves += 1
+        if self.failures:
+            self.failures -= 1
+            raise openai.APIConnectionError(request=httpx.Request("GET", "https://api.test/runs"))
+        if self.cancelled.is_set():
+            return SimpleNamespace(id=run_id, thread_id=thread_id, status="cancelled")
+        status = "completed" if self.release.is_set() else "in_progress"
+        return SimpleNamespace(id=run_id, thread_id=thread_id, status=status)
+
+    def cancel(self, thread_id, run_id):
+        raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.test/cancel"))
+
+
+def pool(**kwargs):
+    runs = FakeRuns()
+    messages = SimpleNamespace(list=lambda **params: ["reply"])
+    client = SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs, messages=messages)))
+    return RunPool(client, RunWaiter(client, initial_delay=0.01, max_delay=0.02), **kwargs), runs
+
+
+def started(job):
+    deadline = time.monotonic() + 5
+    while job.run_id is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_collect_returns_the_replies():
+    runs_pool, runs = pool()
+    runs.release.set()
+    job = runs_pool.submit("session", "thread_1", "msg_1", assistant_id="asst_1")
+    result = runs_pool.collect(job.id, timeout=5)
+    assert result.outcome.completed and result.replies == ["reply"]
+    assert runs_pool.get(job.id) is None
+    assert runs_pool.stats["collected"] == 1
+
+
+def test_cancel_returns_before_the_run_settles_and_survives_api_errors():
+    runs_pool, runs = pool()
+    job = started(runs_pool.submit("session", "thread_1", "msg_1"))
+    runs.failures = 2
+    begun = time.monotonic()
+    settled = runs_pool.cancel(job.id, settle_timeout=5)
+    assert time.monotonic() - begun < 0.1
+    assert not settled.done()
+    runs.cancelled.set()
+    # The failed cancel call and polls are swallowed; the thread is reported free once the run stops
+    assert settled.result(timeout=5) is True
+    assert runs.failures == 0
+    assert runs_pool.get(job.id) is None and runs_pool.stats["cancelled"] == 1
+
+
+def test_cancel_gives_up_after_settle_timeout():
+    runs_pool, runs = pool()
+    job = started(runs_pool.submit("session", "thread_1", "msg_1"))
+    assert runs_pool.cancel(job.id, settle_timeout=0.3).result(timeout=5) is False
+    assert runs_pool.cancel(job.id) is None
+
+
+def test_sweep_cancels_jobs_of_ended_sessions():
+    active = {"session"}
+    runs_pool, runs = pool(is_session_active=lambda session_id: session_id in active)
+    job = started(runs_pool.submit("session", "thread_1", "msg_1"))
+    active.clear()
+    runs_pool.sweep()
+    assert job.cancel_event.is_set()
+    assert runs_pool.get(job.id) is None and runs_pool.pending() == 0
@@ -0,0 +1,127 @@
+# tests/test_run_waiter.py
+import asyncio
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_waiter import RunWaiter, RunWaitCancelled, RunWaitTimeout
+
+
+class RecordingEvent(threading.Event):
+    """Cancel event that records the requested sleeps instead of sleeping"""
+
+    def __init__(self):
+        super().__init__()
+        self.sleeps = []
+
+    def wait(self, timeout=None):
+        self.sleeps.append(timeout)
+        return self.is_set()
+
+
+class FakeRuns:
+    """Returns the given runs in order, repeating the last one"""
+
+    def __init__(self, *runs):
+        self.runs = list(runs)
+        self.cancelled = []
+        self.submitted = []
+
+    def retrieve(self, thread_id, run_id):
+        return self.runs.pop(0) if len(self.runs) > 1 else self.runs[0]
+
+    def cancel(self, thread_id, run_id):
+        self.cancelled.append(run_id)
+
+    def submit_tool_outputs(self, thread_id, run_id, tool_outputs):
+        self.submitted.append(tool_outputs)
+
+
+class AsyncRuns(FakeRuns):
+    async def retrieve(self, thread_id, run_id):
+        return FakeRuns.retrieve(self, thread_id, run_id)
+
+    async def cancel(self, thread_id, run_id):
+        FakeRuns.cancel(self, thread_id, run_id)
+
+
+def run(status: str, **fields):
+    return SimpleNamespace(id="run_1", status=status, **fields)
+
+
+def client(runs):
+    return SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs)))
+
+
+def test_backoff_doubles_up_to_one_second():
+    runs = FakeRuns(*[run("in_progress")] * 6, run("completed"))
+    waiter = RunWaiter(client(runs), jitter=0.0)
+    event = RecordingEvent()
+    outcome = waiter.wait("thread_1", "run_1", cancel_event=event)
+    assert outcome.completed and outcome.polls == 7
+    assert event.sleeps == [0.25, 0.5, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_jitter_stays_within_bounds():
+    waiter = RunWaiter(None, jitter=0.25)
+    delays = [waiter.next_delay(1.0) for _ in range(1000)]
+    assert all(0.75 <= delay <= 1.25 for delay in delays)
+    assert max(delays) - min(delays) > 0.1
+
+
+def test_incomplete_run_is_terminal_with_its_reason():
+    runs = FakeRuns(run("in_progress"), run("incomplete", incomplete_details=SimpleNamespace(reason="max_tokens")))
+    outcome = RunWaiter(client(runs)).wait("thread_1", "run_1", cancel_event=RecordingEvent())
+    assert outcome.status == "incomplete" and not outcome.completed
+    assert outcome.reason == "max_tokens"
+    assert runs.cancelled == []
+
+
+def test_requires_action_without_handler_cancels_the_run():
+    runs = FakeRuns(run("requires_action"))
+    outcome = RunWaiter(client(runs)).wait("thread_1", "run_1", cancel_event=RecordingEvent())
+    assert outcome.status == "requires_action" and outcome.polls == 1
+    assert runs.cancelled == ["run_1"]
+
+
+def test_requires_action_submits_outputs_and_polls_eagerly_again():
+    runs = FakeRuns(run("in_progress"), run("in_progress"), run("requires_action"), run("in_progress"),
+                    run("completed"))
+    waiter = RunWaiter(client(runs), jitter=0.0)
+    event = RecordingEvent()
+    outcome = waiter.wait("thread_1", "run_1", cancel_event=event,
+                          on_requires_action=lambda current: [{"tool_call_id": "call_1", "output": "{}"}])
+    assert outcome.completed
+    assert runs.submitted == [[{"tool_call_id": "call_1", "output": "{}"}]]
+    assert event.sleeps == [0.25, 0.5, 0.25]
+
+
+def test_cancel_and_timeout_stop_the_run():
+    runs = FakeRuns(run("in_progress"))
+    event = RecordingEvent()
+    event.set()
+    waiter = RunWaiter(client(runs))
+    with pytest.raises(RunWaitCancelled):
+        waiter.wait("thread_1", "run_1", cancel_event=event)
+    with pytest.raises(RunWaitTimeout):
+        waiter.wait("thread_1", "run_1", timeout=0)
+    assert runs.cancelled == ["run_1", "run_1"]
+    assert waiter.stats["cancelled"] == 1 and waiter.stats["timeouts"] == 1
+
+
+def test_async_wait_handles_terminal_states():
+    waiter = RunWaiter(None, initial_delay=0.01)
+    incomplete = AsyncRuns(run("queued"), run("incomplete", incomplete_details=None))
+    outcome = asyncio.run(waiter.wait_async(client(incomplete), "thread_1", "run_1"))
+    assert outcome.status == "incomplete" and outcome.polls == 2
+    assert incomplete.cancelled == []
+
+    requires_action = AsyncRuns(run("requires_action"))
+    outcome = asyncio.run(waiter.wait_async(client(requires_action), "thread_1", "run_1"))
+    assert outcome.status == "requires_action"
+    assert requires_action.cancelled == ["run_1"]
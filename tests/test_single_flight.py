@@ -0,0 +1,76 @@
+# tests/test_single_flight.py
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight
+
+KEY_ARGS = ("asst_1", "vs_1", "English", "What are the key digital initiatives?")
+
+
+def join_followers(flights: SingleFlight, key, count: int, pool: ThreadPoolExecutor, on_progress=None):
+    """Followers joined on the calling thread, each waiting on a pool thread"""
+    waits = []
+    for _ in range(count):
+        flight, leader = flights.join(key)
+        assert not leader
+        waits.append(pool.submit(flights.wait, flight, on_progress, 0.01))
+    return waits
+
+
+def test_concurrent_joiners_get_the_leaders_answer():
+    flights = SingleFlight()
+    key = flights.key(*KEY_ARGS)
+    flight, leader = flights.join(key)
+    assert leader
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # The same question, differently spelt, is the same flight
+        waits = join_followers(flights, flights.key(*KEY_ARGS[:3], "  what are the KEY digital initiatives "), 8, pool)
+        flights.finish(key, flight, ["Broadband at 00:01:00"])
+        assert [wait.result(5) for wait in waits] == [["Broadband at 00:01:00"]] * 8
+    assert flights.stats == {"leaders": 1, "followers": 8, "coalesced": 8, "abandoned": 0}
+    assert flights.coalescing_ratio() == 8 / 9
+
+
+def test_failed_leader_reaches_every_waiter():
+    flights = SingleFlight()
+    key = flights.key(*KEY_ARGS)
+    flight, _ = flights.join(key)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        waits = join_followers(flights, key, 4, pool)
+        # A leader whose run failed finishes without an answer
+        flights.finish(key, flight)
+        assert [wait.result(5) for wait in waits] == [None] * 4
+    assert flights.stats["abandoned"] == 4 and flights.stats["coalesced"] == 0
+
+
+def test_key_is_released_after_the_flight():
+    flights = SingleFlight()
+    key = flights.key(*KEY_ARGS)
+    flight, _ = flights.join(key)
+    assert flights.in_flight() == 1
+    flights.finish(key, flight, ["Answer"])
+    assert flights.in_flight() == 0
+    # The next asker leads a flight of its own rather than getting the finished one
+    second, leader = flights.join(key)
+    assert leader and second is not flight
+    # Finishing the old flight again leaves the new one in place
+    flights.finish(key, flight, ["Answer"])
+    assert flights.in_flight() == 1
+
+
+def test_followers_see_progress_and_give_up_after_timeout():
+    flights = SingleFlight(timeout=0.3)
+    key = flights.key(*KEY_ARGS)
+    flight, _ = flights.join(key)
+    shown = []
+    flight.publish("At 00:01")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        waits = join_followers(flights, key, 1, pool, shown.append)
+        started = time.monotonic()
+        assert waits[0].result(5) is None
+    assert 0.25 < time.monotonic() - started < 2
+    assert shown == ["At 00:01"]
@@ -0,0 +1,79 @@
+# tests/test_streaming.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from openai.lib.streaming import AssistantEventHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming import ResponseTimer, stream_run
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's rerun/stop exceptions, which are BaseExceptions too"""
+
+
+class InterruptedStream(AssistantEventHandler):
+    """A real event handler whose text deltas stop with an exception after the first one"""
+
+    def __init__(self, run, error):
+        super().__init__()
+        self._AssistantEventHandler__current_run = run
+        self.error = error
+        self.text_deltas = self._deltas()
+
+    def _deltas(self):
+        yield "At 00:01"
+        raise self.error
+
+
+class Manager:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __enter__(self):
+        return self.stream
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Placeholder:
+    def markdown(self, *args, **kwargs):
+        pass
+
+
+def fake_client(stream, cancelled):
+    runs = SimpleNamespace(
+        stream=lambda **kwargs: Manager(stream),
+        cancel=lambda **kwargs: cancelled.append(kwargs),
+    )
+    return SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs)))
+
+
+@pytest.mark.parametrize("error", [Interrupted(), RuntimeError("connection reset")])
+def test_interrupted_stream_cancels_run_and_reraises(error):
+    run = SimpleNamespace(id="run_1", thread_id="thread_1", status="in_progress")
+    cancelled = []
+    client = fake_client(InterruptedStream(run, error), cancelled)
+
+    with pytest.raises(type(error)) as raised:
+        stream_run(client, Placeholder(), lambda text: text, lambda html: html, ResponseTimer("stream"),
+                   thread_id="thread_1", assistant_id="asst_1")
+
+    assert raised.value is error
+    assert cancelled == [{"thread_id": "thread_1", "run_id": "run_1"}]
+
+
+def test_finished_run_is_not_cancelled():
+    run = SimpleNamespace(id="run_1", thread_id="thread_1", status="completed")
+    cancelled = []
+    client = fake_client(InterruptedStream(run, Interrupted()), cancelled)
+
+    with pytest.raises(Interrupted):
+        stream_run(client, Placeholder(), lambda text: text, lambda html: html, ResponseTimer("stream"),
+                   thread_id="thread_1", assistant_id="asst_1")
+
+    assert cancelled == []
@@ -0,0 +1,123 @@
+# tests/test_text_processing.py
+import os
+import random
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_processing import clean_source_annotations, process_text
+
+FILE_ID = "920357"
+
+# The previous implementation, kept as the reference process_text must match
+OLD_PATTERNS = [
+    r'\【\d+:\d+†source\】',
+    r'\[\d+:\d+†source\]',
+    r'\【\d+:\d+\】',
+    r'†source',
+    r'\[\d+:\d+\](?!.*\])',
+]
+
+
+def old_convert(timestamp_str):
+    try:
+        if ":" in timestamp_str:
+            parts = timestamp_str.split(":")
+            if len(parts) == 3:
+                h, m, s = map(float, parts)
+                total_seconds = h * 3600 + m * 60 + s
+            elif len(parts) == 2:
+                m, s = map(float, parts)
+                total_seconds = m * 60 + s
+            else:
+                return None
+            return int(total_seconds * 10)
+        return None
+    except:
+        return None
+
+
+def old_link(match, file_id):
+    timestamp = match.group(0)
+    deciseconds = old_convert(timestamp)
+    if deciseconds is not None:
+        return f'<a href="https://finas.ortana.tv/Clips/View?FleId={file_id}&offset={deciseconds/10}" target="_blank">{timestamp}</a>'
+    return timestamp
+
+
+def old_clean(text):
+    for pattern in OLD_PATTERNS:
+        text = re.sub(pattern, '', text)
+    return text
+
+
+def old_process(text, file_id):
+    content = old_clean(old_clean(text))
+    return re.sub(r'\b\d{1,2}:\d{2}(:\d{2})?(\.\d{1,3})?\b', lambda m: old_link(m, file_id), content)
+
+
+def long_answer(lines: int) -> str:
+    body = []
+    for i in range(lines):
+        h, m, s = i // 3600 % 24, i // 60 % 60, i % 60
+        body.append(
+            f"- At [{h:02d}:{m:02d}:{s:02d}] scene {i} continues【{i}:1†source】 "
+            f"from {m:02d}:{s:02d} to {h:02d}:{m:02d}:{s:02d}.5 [{i}:2]"
+        )
+    return "\n".join(body)
+
+
+def long_line(markers: int) -> str:
+    return " ".join(f"[{i}:{i}] 00:{i % 60:02d}:{i % 60:02d} text†source" for i in range(markers))
+
+
+CORPUS = [
+    "",
+    "No timestamps or annotations here.",
+    "At [01:23:45] the minister speaks.",
+    "From [00:01:02] to [00:03:04] the crowd cheers【5:1†source】.",
+    "Scene starts at 12:34 and ends at 1:02:03.5【12:3】",
+    "A reference [5:1] at the end of the line [3:4]",
+    "Kept [12:34] marker because a later bracket] follows",
+    "Stripped [5:1] marker [6:2†source]",
+    "Standalone †source marker and 【7:8†source】 done.",
+    "Multi\nline [1:2] text\nwith 00:00:10 and [3:4]\nend 99:59:59",
+    "Fractions 01:02:03.123 and 4:05.5 and 10:20.99",
+    "Not timestamps: 123:45, 1:2, 12:345, a12:30",
+    "At [00:12:30]【4:0†source】, then at [00:15:00]†source, finally [2:1]",
+    "Arabic text 00:01:00 نص عربي 【1:1】",
+    # Markers next to digits or other markers: removing them joins or splits timestamps
+    "5:[1:2]00",
+    "0[1:2]:05",
+    "x[1:2]12:30",
+    "12:30[1:2]5",
+    "5[1:2]:12:30",
+    "At 1:1[12:34]0 and [1:2][3:4]",
+    "[1:2][00:12:30][3:4]",
+    long_answer(50),
+    long_line(50),
+]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_matches_old_implementation(text):
+    assert process_text(text, FILE_ID) == old_process(text, FILE_ID)
+    assert clean_source_annotations(text) == old_clean(text)
+
+
+def test_matches_old_implementation_on_random_text():
+    pieces = ["[1:2]", "[12:34]", "1", "0", "5", "]", "[", ":", " ", "x", "\n", "00:01:02", "†source",
+              "【1:2】", "12:30", ".5"]
+    rng = random.Random(5)
+    for _ in range(5000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+        assert process_text(text, FILE_ID) == old_process(text, FILE_ID), text
+
+
+def test_annotation_formed_by_removing_another_is_kept():
+    # The one documented difference: the old sequential patterns stripped this too
+    assert process_text("†【1:2】source", FILE_ID) == "†source"
+    assert old_process("†【1:2】source", FILE_ID) == ""
@@ -0,0 +1,85 @@
+# tests/test_timestamp_index.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_processing import process_text
+from timestamp_index import TimestampIndex, parse_transcript
+
+FILE_ID = "920357"
+
+SEGMENTS = [
+    (0.0, 60.0, "Opening remarks by the minister"),
+    (30.0, 200.0, "Rural broadband rollout across every state"),
+    (90.0, 90.0, "Scene change"),
+    (120.0, 150.0, "Cyber security talent programme"),
+    (750.0, None, "Closing and broadband questions"),
+]
+
+
+def index() -> TimestampIndex:
+    return TimestampIndex(FILE_ID, SEGMENTS)
+
+
+def test_at_finds_overlapping_and_zero_length_segments():
+    timestamps = index()
+    assert timestamps.at(45) == [0, 1]
+    # A long earlier segment is still found past shorter ones that ended
+    assert timestamps.at(160) == [1]
+    assert timestamps.at(90) == [1, 2]
+    assert timestamps.at(300) == []
+    assert timestamps.at(750) == [4]
+
+
+def test_between_returns_overlapping_segments():
+    timestamps = index()
+    assert timestamps.between(100, 130) == [1, 3]
+    assert timestamps.between(60, 91) == [1, 2]
+    assert timestamps.between(201, 700) == []
+
+
+def test_snap_within_tolerance_only():
+    timestamps = index()
+    assert timestamps.snap(118) == 120.0
+    assert timestamps.snap(32, tolerance=5) == 30.0
+    assert timestamps.snap(400) is None
+
+
+def test_snap_text_leaves_far_and_out_of_range_timestamps():
+    timestamps = index()
+    text = "At [00:01:58] talent, at 00:06:40 nothing, and at 05:00:00 past the end"
+    assert timestamps.snap_text(text) == "At [00:02:00] talent, at 00:06:40 nothing, and at 05:00:00 past the end"
+
+
+def test_snap_runs_after_annotations_are_stripped():
+    timestamps = TimestampIndex(FILE_ID, [(750.0, 760.0, "Closing")])
+    snap = lambda text: timestamps.snap_text(text, 5)
+    linked = process_text("Closing at 00:12:33【12:34†source】.", FILE_ID, snap)
+    assert "【" not in linked and "†source" not in linked
+    assert ">00:12:30</a>." in linked
+
+
+def test_local_answer():
+    timestamps = index()
+    assert timestamps.local_answer("What happens at 00:02:05?") == (
+        "At [00:00:30] Rural broadband rollout across every state\n"
+        "At [00:02:00] Cyber security talent programme"
+    )
+    assert timestamps.local_answer("When is broadband mentioned?") == (
+        "At [00:00:30] Rural broadband rollout across every state\n"
+        "At [00:12:30] Closing and broadband questions"
+    )
+    assert timestamps.local_answer("When is the budget mentioned?") is None
+    assert timestamps.local_answer("What happens at 00:05:00?") is None
+    assert timestamps.local_answer("Summarise the video") is None
+
+
+def test_parse_transcript_formats():
+    srt = "1\n00:00:01,500 --> 00:00:04,000\nHello\nthere\n\n2\n00:00:05,000 --> 00:00:06,000\nBye\n"
+    assert parse_transcript(srt, "a.srt") == [(1.5, 4.0, "Hello there"), (5.0, 6.0, "Bye")]
+    lines = "[00:12:30] Opening\n00:13:00-00:13:10 - Broadband\nno timestamp here"
+    assert parse_transcript(lines) == [(750.0, None, "Opening"), (780.0, 790.0, "Broadband")]
+    csv_text = "start,end,description\n00:00:10,00:00:20,Scene one\n"
+    assert parse_transcript(csv_text, "scenes.csv") == [(10.0, 20.0, "Scene one")]
+    assert parse_transcript('{"segments": [{"start": 3, "text": " Hi "}]}') == [(3.0, None, "Hi")]
@@ -0,0 +1,70 @@
+# tests/test_warmup.py
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warmup import SuggestionWarmer
+
+
+class RecordingWarmer(SuggestionWarmer):
+    """Records warm() calls instead of running suggestions"""
+
+    def __init__(self, **kwargs):
+        super().__init__(None, None, None, {}, **kwargs)
+        self.warmed = []
+        self.event = threading.Event()
+
+    def warm(self, *config, refresh=True):
+        self.warmed.append((config, refresh))
+        self.event.set()
+        return 0
+
+
+def wait_for(warmer, count: int):
+    deadline = time.monotonic() + 5
+    while len(warmer.warmed) < count and time.monotonic() < deadline:
+        warmer.event.wait(0.05)
+        warmer.event.clear()
+
+
+def test_reruns_share_one_scheduler_and_warm_once():
+    warmer = RecordingWarmer()
+    try:
+        for _ in range(20):
+            warmer.ensure("asst_1", "vs_1", "Budget", "101")
+        wait_for(warmer, 1)
+        time.sleep(0.1)
+        assert warmer.warmed == [(("asst_1", "vs_1", "Budget", "101"), False)]
+        assert warmer._scheduler is not None
+    finally:
+        warmer.stop()
+
+
+def test_replaced_configuration_is_dropped():
+    warmer = RecordingWarmer()
+    try:
+        warmer.ensure("asst_old", "vs_1", "Budget", "101")
+        wait_for(warmer, 1)
+        warmer.ensure("asst_new", "vs_1", "Budget", "101")
+        wait_for(warmer, 2)
+        assert [config[0] for config, _ in warmer.warmed] == ["asst_old", "asst_new"]
+        assert [job["config"][0] for job in warmer._jobs.values()] == ["asst_new"]
+    finally:
+        warmer.stop()
+
+
+def test_inactive_and_surplus_assistants_are_dropped():
+    warmer = RecordingWarmer(max_assistants=2, active_window=3600)
+    warmer.stop()
+    for i in range(3):
+        warmer.ensure(f"asst_{i}", "vs", f"Assistant {i}", str(i))
+    assert sorted(warmer._jobs) == ["Assistant 1", "Assistant 2"]
+
+    warmer._jobs["Assistant 1"]["seen"] -= 7200
+    name, job = warmer._due(time.monotonic())
+    assert name == "Assistant 2"
+    assert sorted(warmer._jobs) == ["Assistant 2"]
+    assert warmer.stats["dropped"] == 2
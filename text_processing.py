@@ -0,0 +1,87 @@
+# text_processing.py
+import re
+
+
+# Source annotations the retrieval tool leaves in answers, e.g. 【5:1†source】
+ANNOTATION_RE = re.compile(
+    r'【\d+:\d+†source】'
+    r'|\[\d+:\d+†source\]'
+    r'|【\d+:\d+】'
+    r'|†source'
+)
+
+# A bare [5:1] marker; only stripped when it is at the end of its line
+_MARKER = r'\[\d+:\d+\]'
+
+# HH:MM:SS or MM:SS with optional fractional seconds; the lookahead lets the
+# engine skip positions that cannot start one
+_TIMESTAMP = r'(?=\d)\b(?P<a>\d{1,2}):(?P<b>\d{2})(?::(?P<c>\d{2}))?(?P<frac>\.\d{1,3})?\b'
+
+TIMESTAMP_RE = re.compile(_TIMESTAMP)
+
+# Each pass of the old (?!.*\]) lookahead stripped the marker holding the last
+# "]" of its line, so one pass strips a marker with no "]" after it on its line
+# and two passes also one followed only by another marker. The old lookahead rescanned the rest
+# of the line for every candidate and went quadratic on long lines; these stop
+# at the next "]" or two, so the work stays linear.
+TRAILING_MARKER_RE = re.compile(_MARKER + r'(?=[^\]\n]*$)', re.M)
+TRAILING_MARKERS_2_RE = re.compile(_MARKER + r'(?=[^\]\n]*(?:' + _MARKER + r'[^\]\n]*)?$)', re.M)
+
+
+def timestamp_to_deciseconds(timestamp_str):
+    """Convert an HH:MM:SS or MM:SS timestamp to deciseconds, or None if invalid"""
+    try:
+        parts = timestamp_str.split(":")
+        if len(parts) == 3:
+            h, m, s = map(float, parts)
+            total_seconds = h * 3600 + m * 60 + s
+        elif len(parts) == 2:
+            m, s = map(float, parts)
+            total_seconds = m * 60 + s
+        else:
+            return None
+        return int(total_seconds * 10)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _link(match, file_id) -> str:
+    """Build the clickable link for a timestamp match without re-parsing it"""
+    a, b, c, frac = match.groups()
+    if frac:
+        if c is not None:
+            seconds = float(a) * 3600 + float(b) * 60 + float(c + frac)
+        else:
+            seconds = float(a) * 60 + float(b + frac)
+        offset = int(seconds * 10) / 10
+    elif c is not None:
+        # Whole seconds convert exactly, so integer maths gives the same offset
+        offset = float(int(a) * 3600 + int(b) * 60 + int(c))
+    else:
+        offset = float(int(a) * 60 + int(b))
+    return f'<a href="https://finas.ortana.tv/Clips/View?FleId={file_id}&offset={offset}" target="_blank">{match[0]}</a>'
+
+
+def clean_source_annotations(text: str) -> str:
+    """Remove source annotations and trailing [5:1] markers from text"""
+    return TRAILING_MARKER_RE.sub('', ANNOTATION_RE.sub('', text))
+
+
+def process_text(text: str, file_id, snap=None) -> str:
+    """Strip source annotations and link timestamps
+
+    Annotations and markers go in two C-level substitutions instead of ten
+    and timestamps are linked after, so digits a removed marker sat between
+    join up as before. Gives the same result as the old
+    clean_source_annotations followed by process_message_content, which
+    cleaned the text twice, except for annotations that only form once
+    another one inside them is removed (e.g. "†【1:2】source"), which the old
+    sequential patterns also stripped. tests/test_text_processing.py holds
+    the comparison. snap, if given, rewrites the cleaned text before linking,
+    e.g. TimestampIndex.snap_text, so it never sees the digits inside
+    annotations.
+    """
+    text = TRAILING_MARKERS_2_RE.sub('', ANNOTATION_RE.sub('', text))
+    if snap is not None:
+        text = snap(text)
+    return TIMESTAMP_RE.sub(lambda match: _link(match, file_id), text)
@@ -0,0 +1,306 @@
+# timestamp_index.py
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+
+from text_processing import TIMESTAMP_RE
+
+# SRT/WebVTT cue timing line: 00:01:02,500 --> 00:01:05,000
+_CUE_RE = re.compile(
+    r'(?P<start>(?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?)\s*-->\s*(?P<end>(?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?)'
+)
+# Plain transcript or scene list line: "00:12:30 text", "[00:12:30] text" or "00:12:30-00:13:10 text"
+_LINE_RE = re.compile(
+    r'^\s*\[?(?P<start>\d{1,2}:\d{2}(?::\d{2})?(?:\.\d{1,3})?)\]?'
+    r'(?:\s*(?:-|–|-->|to)\s*\[?(?P<end>\d{1,2}:\d{2}(?::\d{2})?(?:\.\d{1,3})?)\]?)?'
+    r'\s*[-:|]?\s*(?P<text>.*)$'
+)
+_WORD_RE = re.compile(r'\w+')
+# Question words that say nothing about where something is mentioned
+_STOPWORDS = frozenset(("a", "an", "the", "of", "to", "in", "on", "and", "or", "about", "for"))
+
+# Questions answered from the index without a retrieval run
+_AT_QUERY_RE = re.compile(r'^\s*what\s+(?:happens|is\s+happening|is\s+shown|is\s+said)\s+at\s+\[?(?P<ts>[\d:.]+)\]?\s*\??\s*$', re.I)
+_WHEN_QUERY_RE = re.compile(
+    r'^\s*when\s+(?:is|was|are|were|does|did)\s+(?P<what>.+?)\s+'
+    r'(?:mentioned|discussed|said|shown|talked\s+about|brought\s+up)\s*\??\s*$',
+    re.I
+)
+
+
+def parse_seconds(value: str) -> float:
+    """Seconds of an HH:MM:SS(.mmm), MM:SS, SRT (comma decimal) or plain seconds value; raises ValueError"""
+    parts = value.strip().replace(",", ".").split(":")
+    if len(parts) > 3:
+        raise ValueError(f"Not a timestamp: {value!r}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """HH:MM:SS, the format the assistants are told to use"""
+    whole = int(seconds)
+    return f"{whole // 3600:02d}:{whole % 3600 // 60:02d}:{whole % 60:02d}"
+
+
+def parse_transcript(text: str, path: str = ""):
+    """(start, end or None, text) segments from SRT, WebVTT, CSV, JSON or timestamped lines"""
+    stripped = text.lstrip("﻿").lstrip()
+    data = None
+    if path.endswith(".json"):
+        data = json.loads(stripped)
+    elif stripped.startswith(("[", "{")):
+        # "[00:12:30] text" lines start like JSON too
+        try:
+            data = json.loads(stripped)
+        except ValueError:
+            pass
+    if data is not None:
+        rows = data.get("segments", []) if isinstance(data, dict) else data
+        return [
+            (parse_seconds(str(row["start"])),
+             parse_seconds(str(row["end"])) if row.get("end") not in (None, "") else None,
+             str(row.get("text", "")).strip())
+            for row in rows
+        ]
+
+    if path.endswith(".csv"):
+        return [
+            (parse_seconds(row["start"]),
+             parse_seconds(row["end"]) if row.get("end") else None,
+             (row.get("text") or row.get("description") or "").strip())
+            for row in csv.DictReader(io.StringIO(stripped))
+        ]
+
+    segments = []
+    if _CUE_RE.search(stripped):
+        # SRT / WebVTT: a timing line followed by text lines up to a blank line
+        for block in re.split(r'\n\s*\n', stripped.replace("\r\n", "\n")):
+            lines = block.strip().split("\n")
+            for i, line in enumerate(lines):
+                cue = _CUE_RE.search(line)
+                if cue:
+                    cue_text = " ".join(l.strip() for l in lines[i + 1:] if l.strip())
+                    segments.append((parse_seconds(cue.group("start")), parse_seconds(cue.group("end")), cue_text))
+                    break
+        return segments
+
+    for line in stripped.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            end = match.group("end")
+            segments.append((parse_seconds(match.group("start")), parse_seconds(end) if end else None,
+                             match.group("text").strip()))
+    return segments
+
+
+class TimestampIndex:
+    """Sorted interval index over the transcript or scene list of one video
+
+    Segments are parallel lists sorted by start time, plus a running maximum of
+    end times so point lookups stay a binary search even when segments
+    overlap. A word -> segment-number index answers "when is X mentioned".
+    """
+
+    def __init__(self, file_id: str, segments):
+        self.file_id = file_id
+        ordered = sorted(segments, key=lambda s: s[0])
+        self.starts = [s[0] for s in ordered]
+        self.texts = [s[2] for s in ordered]
+        # A segment without an end lasts until the next one starts
+        self.ends = [
+            s[1] if s[1] is not None else (ordered[i + 1][0] if i + 1 < len(ordered) else s[0])
+            for i, s in enumerate(ordered)
+        ]
+        self._max_ends = []
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self._max_ends.append(running)
+        self._words = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return self._max_ends[-1] if self._max_ends else 0.0
+
+    def at(self, seconds: float) -> list:
+        """Numbers of the segments playing at a time, earliest start first"""
+        i = bisect_right(self.starts, seconds) - 1
+        found = []
+        # Walk back only while an earlier segment could still be running;
+        # zero-length segments (scene markers) match their exact start
+        while i >= 0 and (self._max_ends[i] > seconds or self.starts[i] == seconds):
+            if self.ends[i] > seconds or self.starts[i] == seconds:
+                found.append(i)
+            i -= 1
+        found.reverse()
+        return found
+
+    def between(self, start: float, end: float) -> list:
+        """Numbers of the segments overlapping [start, end)"""
+        first = bisect_left(self._max_ends, start)
+        last = bisect_left(self.starts, end)
+        return [i for i in range(first, last) if self.ends[i] > start or self.starts[i] >= start]
+
+    def snap(self, seconds: float, tolerance: float = 5.0):
+        """Start of the segment boundary nearest to a time, or None if none is within tolerance"""
+        i = bisect_left(self.starts, seconds)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self.starts):
+                distance = abs(self.starts[j] - seconds)
+                if distance <= tolerance and (best is None or distance < abs(best - seconds)):
+                    best = self.starts[j]
+        return best
+
+    def _word_index(self) -> dict:
+        if self._words is None:
+            words = {}
+            for number, text in enumerate(self.texts):
+                for word in set(_WORD_RE.findall(text.lower())):
+                    words.setdefault(word, []).append(number)
+            self._words = words
+        return self._words
+
+    def search(self, phrase: str, limit: int = 20) -> list:
+        """Numbers of the segments mentioning every word of phrase, in time order"""
+        words = [word for word in _WORD_RE.findall(phrase.lower()) if word not in _STOPWORDS]
+        if not words:
+            return []
+        index = self._word_index()
+        postings = sorted((index.get(word, []) for word in set(words)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(candidates)[:limit]
+
+    def snap_text(self, text: str, tolerance: float = 5.0) -> str:
+        """Move timestamps in a model answer onto the nearest segment start within tolerance
+
+        Timestamps with no segment nearby, or past the end of the video, are
+        left alone so they stay visible as they were produced. Run it on text
+        whose source annotations are already stripped (process_text's snap),
+        or their digits are rewritten too.
+        """
+        def replace(match):
+            seconds = parse_seconds(match.group(0))
+            if seconds > self.duration + tolerance:
+                return match.group(0)
+            snapped = self.snap(seconds, tolerance)
+            return format_timestamp(snapped) if snapped is not None else match.group(0)
+
+        return TIMESTAMP_RE.sub(replace, text)
+
+    def describe(self, numbers) -> str:
+        """Answer lines in the assistants' format, e.g. "At [00:12:30] text" """
+        return "\n".join(f"At [{format_timestamp(self.starts[i])}] {self.texts[i]}" for i in numbers)
+
+    def local_answer(self, query: str):
+        """Answer a "what happens at HH:MM:SS" or "when is X mentioned" question, or None"""
+        match = _AT_QUERY_RE.match(query)
+        if match:
+            try:
+                seconds = parse_seconds(match.group("ts"))
+            except ValueError:
+                return None
+            numbers = self.at(seconds)
+            return self.describe(numbers) if numbers else None
+        match = _WHEN_QUERY_RE.match(query)
+        if match:
+            numbers = self.search(match.group("what"))
+            return self.describe(numbers) if numbers else None
+        return None
+
+    def to_dict(self) -> dict:
+        return {"file_id": self.file_id, "starts": self.starts, "ends": self.ends, "texts": self.texts}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TimestampIndex":
+        return cls(data["file_id"], list(zip(data["starts"], data["ends"], data["texts"])))
+
+
+class TimestampIndexStore:
+    """Built indexes in a directory, one <file_id>.json each, loaded on first use"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._indexes = {}
+
+    def path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.json")
+
+    def get(self, file_id: str):
+        """The index of a video, or None when none was built"""
+        if not file_id:
+            return None
+        with self._lock:
+            if file_id in self._indexes:
+                return self._indexes[file_id]
+        try:
+            with open(self.path(file_id), encoding="utf-8") as f:
+                index = TimestampIndex.from_dict(json.load(f))
+        except FileNotFoundError:
+            index = None
+        with self._lock:
+            self._indexes[file_id] = index
+        return index
+
+    def build(self, file_id: str, transcript_path: str) -> TimestampIndex:
+        """Parse a transcript or scene list and save its index"""
+        with open(transcript_path, encoding="utf-8") as f:
+            index = TimestampIndex(file_id, parse_transcript(f.read(), transcript_path))
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path(file_id)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path(file_id))
+        with self._lock:
+            self._indexes[file_id] = index
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query per-video timestamp indexes")
+    parser.add_argument("--dir", default=os.getenv("TIMESTAMP_INDEX_DIR", "timestamp_indexes"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a transcript or scene list (SRT, VTT, CSV, JSON, text)")
+    build.add_argument("file_id")
+    build.add_argument("transcript")
+    at = commands.add_parser("at", help="segments playing at a timestamp")
+    at.add_argument("file_id")
+    at.add_argument("timestamp")
+    search = commands.add_parser("search", help="segments mentioning a phrase")
+    search.add_argument("file_id")
+    search.add_argument("phrase")
+    args = parser.parse_args()
+
+    store = TimestampIndexStore(args.dir)
+    if args.command == "build":
+        index = store.build(args.file_id, args.transcript)
+        print(f"{args.file_id}: {len(index)} segments, {format_timestamp(index.duration)} -> {store.path(args.file_id)}")
+        return
+
+    index = store.get(args.file_id)
+    if index is None:
+        raise SystemExit(f"No index for {args.file_id} in {args.dir}; build it first")
+    if args.command == "at":
+        print(index.describe(index.at(parse_seconds(args.timestamp))) or "(nothing)")
+    else:
+        print(index.describe(index.search(args.phrase)) or "(no mentions)")
+
+
+if __name__ == "__main__":
+    main()
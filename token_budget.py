@@ -0,0 +1,115 @@
+# token_budget.py
+import os
+import threading
+from collections import OrderedDict, deque
+
+from streaming import percentile
+
+
+def run_usage(run):
+    """(prompt_tokens, completion_tokens) of a finished run, or None when the API reported none"""
+    usage = getattr(run, "usage", None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+class TokenLedger:
+    """Prompt and completion tokens of every run, per thread and process-wide
+
+    Per-thread totals feed ContextBudget; recent per-run samples show whether
+    the prompt size per turn stays flat as conversations get longer.
+    """
+
+    def __init__(self, max_threads: int = 10000, max_samples: int = 500, rate_limiter=None):
+        self.max_threads = max_threads
+        # Swaps the limiter's up-front token estimate for the real usage
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+        self._threads = OrderedDict()
+        self._samples = deque(maxlen=max_samples)
+        self.stats = {"runs": 0, "unreported": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def record(self, thread_id: str, run) -> tuple:
+        """Add a run's usage; returns (prompt, completion) or None"""
+        usage = run_usage(run)
+        with self._lock:
+            if usage is None:
+                self.stats["unreported"] += 1
+                return None
+            prompt, completion = usage
+            self.stats["runs"] += 1
+            self.stats["prompt_tokens"] += prompt
+            self.stats["completion_tokens"] += completion
+            self._samples.append((prompt, completion))
+            totals = self._threads.pop(thread_id, (0, 0, 0))
+            self._threads[thread_id] = (totals[0] + prompt, totals[1] + completion, totals[2] + 1)
+            # Forget the least recently used threads
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(self.rate_limiter.run_tokens, prompt + completion)
+        return usage
+
+    def thread_usage(self, thread_id: str) -> tuple:
+        """(prompt_tokens, completion_tokens, runs) spent on a thread so far"""
+        with self._lock:
+            return self._threads.get(thread_id, (0, 0, 0))
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = list(self._samples)
+        prompts = [s[0] for s in samples]
+        completions = [s[1] for s in samples]
+        return {
+            "runs": len(samples),
+            "prompt_p50": percentile(prompts, 50),
+            "prompt_p95": percentile(prompts, 95),
+            "completion_p50": percentile(completions, 50),
+        }
+
+
+class ContextBudget:
+    """Run arguments that keep the context of a run bounded however long the thread is
+
+    Every run only sees the last last_messages messages and at most
+    max_prompt_tokens of prompt. Once a thread has used up thread_token_budget
+    prompt tokens, its runs drop to min_last_messages so the remainder of the
+    conversation stays as cheap as possible.
+    """
+
+    def __init__(self, ledger: TokenLedger, last_messages: int = 6, min_last_messages: int = 2,
+                 max_prompt_tokens: int = 0, thread_token_budget: int = 0):
+        self.ledger = ledger
+        self.last_messages = last_messages
+        self.min_last_messages = min_last_messages
+        self.max_prompt_tokens = max_prompt_tokens
+        self.thread_token_budget = thread_token_budget
+
+    def exhausted(self, thread_id: str) -> bool:
+        if not thread_id or not self.thread_token_budget:
+            return False
+        return self.ledger.thread_usage(thread_id)[0] >= self.thread_token_budget
+
+    def run_kwargs(self, thread_id: str = None) -> dict:
+        """truncation_strategy and max_prompt_tokens for the next run on a thread; 0 disables either"""
+        kwargs = {}
+        last_messages = self.min_last_messages if self.exhausted(thread_id) else self.last_messages
+        if last_messages:
+            kwargs["truncation_strategy"] = {"type": "last_messages", "last_messages": last_messages}
+        if self.max_prompt_tokens:
+            kwargs["max_prompt_tokens"] = self.max_prompt_tokens
+        return kwargs
+
+    def log(self, thread_id: str, usage):
+        """Write a run's usage and the thread's running total to the console"""
+        if usage is None:
+            return
+        prompt, completion, runs = self.ledger.thread_usage(thread_id)
+        budget = f"/{self.thread_token_budget}" if self.thread_token_budget else ""
+        os.write(1, (
+            f"\n[tokens] prompt={usage[0]} completion={usage[1]} "
+            f"thread prompt={prompt}{budget} over {runs} runs\n"
+        ).encode())
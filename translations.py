@@ -0,0 +1,139 @@
+# translations.py
+
+# UI strings for every supported language, built once per process
+TRANSLATIONS = {
+    "English": {
+        "placeholder": "Ask your question about Minister Gobind Singh Deo...",
+        "ask_button": "Ask",
+        "creative_button": "I'm Feeling Creative",
+        "suggested_questions": "Suggested Questions",
+        "suggestions": [
+            "What are Gobind Singh Deo's key digital initiatives?",
+            "How is he transforming Malaysia's digital landscape?",
+            "What are his main technology policies?",
+            "How does he approach digital economy development?"
+        ],
+        "processing": "Processing your query...",
+        "select_assistant": "Select Assistant",
+        "start_new_conversation": "Start New Conversation",
+        "busy": "The assistant is busy right now. Please try again in a moment."
+    },
+    "Bahasa Melayu": {
+        "placeholder": "Tanya soalan anda tentang Menteri Gobind Singh Deo...",
+        "ask_button": "Tanya",
+        "creative_button": "Rasa Kreatif",
+        "suggested_questions": "Soalan Dicadangkan",
+        "suggestions": [
+            "Apakah inisiatif digital utama Gobind Singh Deo?",
+            "Bagaimana beliau mengubah landskap digital Malaysia?",
+            "Apakah dasar-dasar teknologi utama beliau?",
+            "Bagaimana pendekatan beliau dalam pembangunan ekonomi digital?"
+        ],
+        "processing": "Memproses pertanyaan anda...",
+        "select_assistant": "Pilih Pembantu",
+        "start_new_conversation": "Mulakan Perbualan Baru",
+        "busy": "Pembantu sedang sibuk. Sila cuba lagi sebentar lagi."
+    },
+    "عربي": {  
+        "placeholder": "...اطرح سؤالك حول محتوى فيناس",
+        "ask_button": "اسأل",
+        "creative_button": "أشعر بالإبداع",
+        "suggested_questions": "الأسئلة المقترحة",
+        "suggestions": [
+            "أرني المشهد حيث يلتقي البطل مع الخصم؟",
+            "أي مشهد فيه لحظة سعيدة؟",
+            "ما هو ملخص الفيديو؟",
+            "ماذا يمكننا أن نتعلم من هذا الفيديو؟"
+        ],
+        "processing": "...جاري معالجة استفسارك",
+        "select_assistant": "اختر مساعد",
+        "start_new_conversation": "ابدأ محادثة جديدة",
+        "busy": "المساعد مشغول الآن. يرجى المحاولة مرة أخرى بعد قليل."
+    },
+    "中文": {
+        "placeholder": "询问有关Minister Gobind Singh Deo的问题...",
+        "ask_button": "询问",
+        "creative_button": "创意灵感",
+        "suggested_questions": "建议问题",
+        "suggestions": [
+            "Gobind Singh Deo的主要数字倡议是什么？",
+            "他如何改变马来西亚的数字景观？",
+            "他的主要技术政策是什么？",
+            "他如何处理数字经济开发？"
+        ],
+        "processing": "正在处理您的查询...",
+        "select_assistant": "选择助手",
+        "start_new_conversation": "开始新对话",
+        "busy": "助手目前繁忙，请稍后再试。"
+    },
+    "தமிழ்": {
+        "placeholder": "பிரதான அந்வர் இப்ராஹிம் பற்றி கேள்வி கேளுங்கள்...",
+        "ask_button": "கேள்",
+        "creative_button": "படைப்பாற்றல் உணர்கிறேன்",
+        "suggested_questions": "பரிந்துரைக்கப்பட்ட கேள்விகள்",
+        "suggestions": [
+            "நந்வர் இப்ராஹிம் பிரதான மாநில மேல்வாய்ப்பு என்ன?",
+            "அந்வர் குறித்து மாதிரி மலையில் எவ்வாறு வளர்ந்திருக்கிறது?",
+            "அவரின் முக்கிய நிதி நோக்கங்கள் என்ன?",
+            "அவர் விரிவாக்க வழியாக இருப்பது ன்ன?"
+        ],
+        "processing": "உங்கள் கேள்வியை செயலாக்குகிறது...",
+        "select_assistant": "உதவியாளரை தேர்ந்தெடுக்கவும்",
+        "start_new_conversation": "புதிய உரையாடலை தொடங்கவும்",
+        "busy": "உதவியாளர் தற்போது பணியில் உள்ளார். சிறிது நேரம் கழித்து மீண்டும் முயற்சிக்கவும்."
+    }
+}
+
+# Creative prompts focused on video analysis and scene understanding
+CREATIVE_PROMPTS = {
+    "English": [
+        "Analyze the emotional journey of characters throughout this scene",
+        "Identify key visual storytelling techniques used in this segment",
+        "Examine the scene transitions and their impact on storytelling",
+        "Explore how lighting and color are used to convey mood in this scene",
+        "Break down the camera movements and their narrative significance",
+        "Analyze the pacing and rhythm of dialogue and action",
+        "Identify symbolism and visual metaphors in this sequence",
+        "Examine character dynamics and relationships in this scene"
+    ],
+    "Bahasa Melayu": [
+        "Analisis perjalanan emosi watak dalam babak ini",
+        "Kenalpasti teknik penceritaan visual dalam segmen ini",
+        "Teliti peralihan babak dan kesannya terhadap penceritaan",
+        "Terokai penggunaan pencahayaan dan warna untuk menyampaikan suasana",
+        "Huraikan pergerakan kamera dan kepentingannya dalam naratif",
+        "Analisis tempo dan ritma dialog serta aksi",
+        "Kenalpasti simbolisme dan metafora visual dalam urutan ini",
+        "Teliti dinamik dan hubungan antara watak dalam babak ini"
+    ],
+    "عربي": [
+        "تحليل الرحلة العاطفية للشخصيات في هذا المشهد",
+        "تحديد تقنيات السرد البصري في هذا المقطع",
+        "دراسة انتقالات المشهد وتأثيرها على السرد",
+        "استكشاف استخدام الإضاءة واللون لنقل المزاج",
+        "تحليل حركات الكاميرا وأهميتها السردية",
+        "تحليل وتيرة وإيقاع الحوار والعمل",
+        "تحديد الرمزية والاستعارات البصرية في هذا التسلسل",
+        "دراسة ديناميكيات وعلاقات الشخصيات في هذا المشهد"
+    ],
+    "中文": [
+        "分析这个场景中人物的情感变化",
+        "识别此片段中使用的视觉叙事技巧",
+        "研究场景转换及其对故事叙述的影响",
+        "探索光线和色彩如何传达情绪",
+        "分析摄像机运动及其叙事意义",
+        "分析对话和动作的节奏感",
+        "识别此序列中的象征主义和视觉隐喻",
+        "研究这个场景中的角色互动和关系"
+    ],
+    "தமிழ்": [
+        "இந்த காட்சியில் கதாபாத்திரங்களின் உணர்ச்சி பயணத்தை பகுப்பாய்வு செய்க",
+        "இந்த பகுதியில் பயன்படுத்தப்படும் விஷுவல் கதை சொல்லும் நுட்பங்களை கண்டறியவும்",
+        "காட்சி மாற்றங்களையும் கதை சொல்லலில் அவற்றின் தாக்கத்தையும் ஆராயுங்கள்",
+        "மனநிலையை வெளிப்படுத்த ஒளி மற்றும் வண்ணம் பயன்படுத்தப்படும் விதத்தை ஆராயுங்கள்",
+        "கேமரா அசைவுகள் மற்றும் அவற்றின் விவரிப்பு முக்கியத்துவத்தை பகுப்பாய்வு செய்யவும்",
+        "உரையாடல் மற்றும் செயலின் வேகம் ம்ும் ரித்தத்தை பகுப்பாய்வு செய்யவும்",
+        "இந்த வரிசையில் உள்ள சின்னங்கள் மற்றும் காட்சி உருவகங்களை கண்டறியவும்",
+        "இந்த காட்சியில் கதாபாத்திர இயக்கவியல் மற்றும் உறவுகளை ஆராயவும்"
+    ]
+}
@@ -0,0 +1,184 @@
+# warmup.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from query_pipeline import answer_once
+from rate_limiter import WARMUP, with_priority
+
+
+class SuggestionWarmer:
+    """Keep answers to the suggested questions of each assistant in the answer cache
+
+    ensure() is cheap and idempotent, so the UI calls it on every rerun; it
+    marks the assistant as active. One scheduler thread warms every active
+    assistant in turn, running every suggestion in every language with
+    bounded parallelism, and refreshes them before the cached answers expire.
+    Assistants nobody selected within active_window are dropped, as is a
+    configuration that a newer one for the same assistant (e.g. after
+    re-provisioning) replaced; at most max_assistants are kept. With a
+    translator, the canonical language is run first and the other languages
+    are translated from its answers, falling back to a run.
+    """
+
+    def __init__(self, client, run_waiter, answer_cache, translations, translator=None,
+                 max_workers: int = 4, refresh_interval: float = 6 * 3600, active_window: float = 6 * 3600,
+                 max_assistants: int = 50):
+        self.client = client
+        self.run_waiter = run_waiter
+        self.answer_cache = answer_cache
+        self.translations = translations
+        self.translator = translator
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval
+        self.active_window = active_window
+        self.max_assistants = max_assistants
+
+        self._lock = threading.Lock()
+        # Assistant name -> {"config", "seen", "warmed"}; one current configuration per assistant
+        self._jobs = {}
+        self._scheduler = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.stats = {"runs": 0, "failures": 0, "skipped": 0, "translated": 0, "rounds": 0, "dropped": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def questions(self):
+        """(language, suggestion) pairs to keep warm"""
+        return [
+            (language, suggestion)
+            for language, texts in self.translations.items()
+            for suggestion in texts["suggestions"]
+        ]
+
+    def ensure(self, assistant_id: str, vector_store_id: str, assistant_name: str, file_id: str):
+        """Mark this assistant configuration as active; the scheduler warms it when due"""
+        config = (assistant_id, vector_store_id, assistant_name, file_id)
+        now = time.monotonic()
+        with self._lock:
+            job = self._jobs.get(assistant_name)
+            if job is not None and job["config"] == config:
+                job["seen"] = now
+                return
+            # New, or replaced by re-provisioning: the old IDs are never warmed again
+            self._jobs[assistant_name] = {"config": config, "seen": now, "warmed": None}
+            if job is not None:
+                self.stats["dropped"] += 1
+            while len(self._jobs) > self.max_assistants:
+                stalest = min(self._jobs, key=lambda name: self._jobs[name]["seen"])
+                del self._jobs[stalest]
+                self.stats["dropped"] += 1
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._loop, name="warmup-scheduler", daemon=True)
+                self._scheduler.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _due(self, now: float):
+        """Drop inactive assistants; return (name, job) of the most recently selected one due for warming"""
+        due = None
+        with self._lock:
+            for name, job in list(self._jobs.items()):
+                if now - job["seen"] > self.active_window:
+                    del self._jobs[name]
+                    self.stats["dropped"] += 1
+                elif job["warmed"] is None or now - job["warmed"] >= self.refresh_interval:
+                    if due is None or job["seen"] > due[1]["seen"]:
+                        due = (name, job)
+            return due
+
+    def _next_wait(self, now: float) -> float:
+        with self._lock:
+            deadlines = [job["warmed"] + self.refresh_interval - now for job in self._jobs.values()]
+            deadlines += [job["seen"] + self.active_window - now for job in self._jobs.values()]
+        return max(1.0, min(deadlines, default=self.refresh_interval))
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            due = self._due(time.monotonic())
+            if due is None:
+                self._wake.wait(self._next_wait(time.monotonic()))
+                continue
+            _, job = due
+            self.warm(*job["config"], refresh=job["warmed"] is not None)
+            with self._lock:
+                # Stamped even if replaced meanwhile; a replacement is its own job and stays due
+                job["warmed"] = time.monotonic()
+
+    def warm(self, assistant_id: str, vector_store_id: str, assistant_name: str, file_id: str,
+             refresh: bool = True) -> int:
+        """Run the suggestions in parallel and store their answers; returns how many were stored
+
+        Without refresh, questions that already have a fresh answer (for example
+        from a persistent cache backend) are skipped.
+        """
+        pending = []
+        for language, question in self.questions():
+            if not refresh and self.answer_cache.peek(assistant_id, vector_store_id, language, question) is not None:
+                self._count("skipped")
+                continue
+            pending.append((language, question))
+
+        # Canonical answers first, so the other languages can be translated from them
+        phases = [pending]
+        if self.translator is not None:
+            canonical = self.translator.canonical_language
+            phases = [
+                [item for item in pending if item[0] == canonical],
+                [item for item in pending if item[0] != canonical],
+            ]
+
+        stored = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup") as pool:
+            for phase in phases:
+                futures = {
+                    pool.submit(
+                        # Behind interactive questions in the shared rate limit queue
+                        with_priority(WARMUP, self._answer), assistant_id, vector_store_id, assistant_name, file_id,
+                        language, question
+                    ): (language, question)
+                    for language, question in phase
+                }
+                for future in as_completed(futures):
+                    language, question = futures[future]
+                    try:
+                        answer = future.result()
+                    except Exception as e:
+                        self._count("failures")
+                        os.write(1, f"\nWarm-up failed for [{language}] {question}: {e}\n".encode())
+                        continue
+                    stored += bool(answer)
+
+        self._count("rounds")
+        return stored
+
+    def _answer(self, assistant_id: str, vector_store_id: str, assistant_name: str, file_id: str,
+                language: str, question: str):
+        """Translate or run one suggestion and store its answer"""
+        translator = self.translator
+        if translator is not None and language != translator.canonical_language:
+            # From the canonical answer stored in the phase before, so refreshes stay fresh
+            answer = translator.lookup(
+                assistant_id, vector_store_id, language, question, sources=[translator.canonical_language]
+            )
+            if answer is not None:
+                self._count("translated")
+                return answer
+        answer = answer_once(
+            self.client, self.run_waiter, assistant_id, vector_store_id, assistant_name, file_id, language, question,
+            should_cancel=self._stop.is_set
+        )
+        self._count("runs")
+        if answer:
+            self.answer_cache.put(assistant_id, vector_store_id, language, question, answer)
+            if translator is not None:
+                translator.remember(assistant_id, vector_store_id, language, question, answer)
+        return answer